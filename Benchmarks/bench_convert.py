@@ -0,0 +1,137 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Speed of ConverterClass.convert_scene on generated ConverterFake scenes, for every rules file in Rules.
+Reports the converted nodes per second, the scene commands called per converted node and the peak
+python memory, as json comparable between commits.
+
+    python Benchmarks/bench_convert.py --materials 1000 --textures 2 --utilities 1 --depth 2 --shared 20
+    python Benchmarks/bench_convert.py --rules mayaSoftware_To_arnold --materials 5000 --output before.json
+    python Benchmarks/bench_convert.py --rules mayaSoftware_To_arnold --profile-dir profiles
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Converter  # noqa: E402
+import ConverterBackend as Backend  # noqa: E402
+import ConverterFake  # noqa: E402
+import ConverterLog as Log  # noqa: E402
+import ConverterProfile as Profile  # noqa: E402
+import ConverterRules as Rules  # noqa: E402
+
+rules_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Rules')
+
+
+def git_revision():
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=rules_dir,
+                                         stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode().strip()
+
+
+def run(rules_name, args):
+    rules = Rules.load_rules(os.path.join(rules_dir, rules_name + '.json'))
+    scene = ConverterFake.generate_scene(rules, materials=args.materials, textures=args.textures,
+                                         utilities=args.utilities, lights=args.lights, seed=args.seed,
+                                         depth=args.depth, shared=args.shared)
+    if args.selected:
+        scene.select(scene.ls(type='transform'))
+    scene_nodes = len(scene.nodes)
+    backend = Profile.ProfiledBackend(scene, trace=bool(args.profile_dir))
+    converter = Converter.ConverterClass(backend=backend)
+    backend.profile.reset()
+
+    if args.memory:
+        tracemalloc.start()
+    start = time.time()
+    result = converter.convert_scene(rules_name, selected=args.selected, in_render=False)
+    elapsed = time.time() - start
+    peak = None
+    if args.memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    if args.profile_dir:
+        if not os.path.isdir(args.profile_dir):
+            os.makedirs(args.profile_dir)
+        backend.profile.save_stats(os.path.join(args.profile_dir, rules_name + '.prof'))
+        backend.profile.save_trace(os.path.join(args.profile_dir, rules_name + '.trace.json'))
+
+    # the scene commands, not the bulk methods made of them
+    calls = dict((name, stats.calls) for name, stats in backend.profile.stats.items()
+                 if name in Backend.scene_commands)
+    converted = len(result['converted_nodes']) if result else 0
+    total_calls = sum(calls.values())
+    return {'rules': rules_name,
+            'scene_nodes': scene_nodes,
+            'converted_nodes': converted,
+            'unconverted_nodes': len(result['unconverted_nodes']) if result else None,
+            'unconverted_attributes': len(result['unconverted_attributes']) if result else None,
+            'skipped_values': result['skipped_values'] if result else None,
+            'seconds': round(elapsed, 4),
+            'nodes_per_second': round(converted / elapsed, 1) if elapsed and converted else None,
+            'calls': total_calls,
+            'calls_per_node': round(total_calls / float(converted), 2) if converted else None,
+            'calls_by_command': calls,
+            'peak_memory_mb': round(peak / float(1 << 20), 2) if peak is not None else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', nargs='+', help='rules file names, every file in Rules by default')
+    parser.add_argument('--materials', type=int, default=500)
+    parser.add_argument('--textures', type=int, default=2, help='textures connected to every material')
+    parser.add_argument('--utilities', type=int, default=1, help='utility chains connected to every texture')
+    parser.add_argument('--depth', type=int, default=1, help='utilities in every chain')
+    parser.add_argument('--shared', type=int, default=0, help='utilities shared between all the textures')
+    parser.add_argument('--lights', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--selected', action='store_true', help='select every mesh and light, convert the selection')
+    parser.add_argument('--memory', action='store_true', help='trace the peak python memory, slower')
+    parser.add_argument('--output', help='json file to write, printed otherwise')
+    parser.add_argument('--profile-dir', help='directory to write the pstats and Chrome trace of every rules file')
+    args = parser.parse_args(argv)
+
+    Log.configure(logging.WARNING)
+    rules_names = args.rules or sorted(Rules.list_rules(rules_dir))
+    parameters = dict((key, value) for key, value in vars(args).items()
+                      if key not in ('rules', 'output', 'profile_dir'))
+    output = {'revision': git_revision(),
+              'python': platform.python_version(),
+              'parameters': parameters,
+              'results': [run(rules_name, args) for rules_name in rules_names]}
+    text = json.dumps(output, indent=4, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            outfile.write(text)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,283 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Scaling of the scene listing (list_materials, list_lights, list_utilities) on a ConverterFake scene.
+Every list_* column reads its own scene inventory, the shared_inventory columns read it once for the three.
+
+    python Benchmarks/bench_listing.py --sizes 1000 10000 100000 --legacy-max 10000
+
+The legacy columns time the listing of the baseline, its list based filtering without the cached
+classification, only up to --legacy-max nodes since it grows quadratically.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Converter  # noqa: E402
+import ConverterFake  # noqa: E402
+import ConverterRules as Rules  # noqa: E402
+
+plugin_types = {'shader': ['aiStandardSurface', 'aiFlat', 'aiLambert'],
+                'texture': ['aiImage', 'aiNoise', 'aiCellNoise'],
+                'utility': ['aiMultiply', 'aiRange', 'aiColorCorrect'],
+                'light': ['aiAreaLight', 'aiSkyDomeLight']}
+maya_types = {'shader': ['lambert', 'blinn', 'phong'],
+              'texture': ['file', 'ramp', 'checker'],
+              'utility': ['reverse', 'multiplyDivide', 'place2dTexture'],
+              'light': ['pointLight', 'spotLight']}
+
+
+def build_scene(count):
+    """About 30% materials, 40% textures, 25% utilities and 5% lights, half of each from the plugin."""
+    scene = ConverterFake.FakeScene()
+    scene.load_plugin('mtoa', 'arnold')
+    scene.set_current_renderer('arnold')
+    for table, plugin in ((plugin_types, 'mtoa'), (maya_types, None)):
+        for classification, type_names in table.items():
+            for type_name in type_names:
+                scene.register_type(type_name, classification, plugin, {'outColor': 'float3', 'input': 'float3'})
+
+    created = dict((classification, []) for classification in plugin_types)
+    shares = (('shader', 0.3), ('texture', 0.4), ('utility', 0.25), ('light', 0.05))
+    for classification, share in shares:
+        type_names = plugin_types[classification] + maya_types[classification]
+        for i in range(int(count * share)):
+            node_type = type_names[i % len(type_names)]
+            if classification == 'light':
+                transform = scene.createNode('transform', name='light{0}'.format(i))
+                created[classification].append(scene.createNode(node_type, parent=transform))
+            else:
+                created[classification].append(scene.createNode(node_type))
+
+    textures = created['texture']
+    utilities = created['utility']
+    for i, material in enumerate(created['shader']):
+        transform = scene.createNode('transform', name='mesh{0}'.format(i))
+        shape = scene.createNode('mesh', name='meshShape{0}'.format(i), parent=transform)
+        shading_engine = scene.createNode('shadingEngine', name='SG{0}'.format(i))
+        scene.connectAttr(shape + '.message', shading_engine + '.dagSetMembers', na=True)
+        scene.connectAttr(material + '.outColor', shading_engine + '.surfaceShader')
+        for j, texture in enumerate(textures[i * 2:i * 2 + 2]):
+            scene.connectAttr(texture + '.outColor', material + ('.input' if j else '.outColor'))
+    # texture trees shared by many materials: every texture reads from one of a few utilities
+    for i, texture in enumerate(textures):
+        if utilities:
+            scene.connectAttr(utilities[i % min(len(utilities), 64)] + '.outColor', texture + '.input')
+
+    # a quarter of the objects selected
+    selection = ['mesh{0}'.format(i) for i in range(0, len(created['shader']), 4)]
+    selection += ['light{0}'.format(i) for i in range(len(created['light']))]
+    selection += utilities[::4]
+    scene.select(selection)
+    return scene
+
+
+class LegacyListing(object):
+    """
+    The listing of ConverterClass before the cached classification and the typed ls, copied from the
+    baseline on the same cmds commands so that the scene is the only difference.
+    """
+
+    def __init__(self, cmds):
+        # cmds is the scene, FakeScene implements the maya.cmds commands
+        self.cmds = cmds
+        self.all_plugins_nodes = self.get_all_engines_nodes()
+
+    def is_plugin_loaded(self, plugin):
+        loaded_plugins = self.cmds.pluginInfo(query=True, listPlugins=True)
+        if plugin in loaded_plugins:
+            return True
+        else:
+            return False
+
+    def get_engine_nodes(self, engine):
+        if engine != 'mayaSoftware':
+            render_plugin = Rules.render_engines_dic[engine]
+            nodes = self.cmds.pluginInfo(render_plugin, dn=1, query=True)
+        else:
+            nodes = []
+        return nodes
+
+    def get_all_engines_nodes(self):
+        all_engines_node = []
+        for render_plugin in Rules.render_engines_dic.values():
+            if self.is_plugin_loaded(render_plugin):
+                nodes = self.cmds.pluginInfo(render_plugin, dn=1, query=True)
+                all_engines_node.extend(nodes)
+        return all_engines_node
+
+    def get_type_nodes(self, engine, node_type):
+        engine_nodes = []
+        plugin_nodes = self.get_engine_nodes(engine)
+        type_nodes = self.cmds.listNodeTypes(node_type)
+        for node in type_nodes:
+            if engine != 'mayaSoftware':
+                if node in plugin_nodes:
+                    engine_nodes.append(node)
+            else:
+                if node not in self.all_plugins_nodes:
+                    engine_nodes.append(node)
+        return engine_nodes
+
+    def get_shapes_from_objects(self, objects):
+        objects_shapes = []
+        if objects:
+            for o in objects:
+                shape = self.cmds.listRelatives(o, shapes=True, fullPath=True) or []
+                objects_shapes.extend(shape)
+        return objects_shapes
+
+    def mat_and_tex_from_objects(self):
+        cmds = self.cmds
+        selection = cmds.ls(sl=True)
+        selection_shapes = self.get_shapes_from_objects(selection)
+        selection_shapes = list(set(selection_shapes))
+        shading_engine = cmds.listConnections(selection_shapes, type='shadingEngine')
+        materials_connections = cmds.listConnections(shading_engine)
+        materials = list(set(cmds.ls(materials_connections, materials=True)))
+        textures = []
+        for material in materials:
+            textures_connections = cmds.listConnections(material)
+            textures.extend(cmds.ls(textures_connections, textures=True))
+        textures = list(set(textures))
+        return materials, textures
+
+    def list_materials(self, engine, selected=True, in_render=True):
+        cmds = self.cmds
+        if in_render:
+            material_types = self.get_type_nodes(engine, 'shader')
+            engine_materials = cmds.ls(type=material_types)
+            texture_types = self.get_type_nodes(engine, 'texture')
+            engine_textures = cmds.ls(type=texture_types)
+
+            if selected:
+                selected_materials, selected_textures = self.mat_and_tex_from_objects()
+
+                materials = []
+                for material in selected_materials:
+                    if material in engine_materials:
+                        materials.append(material)
+
+                textures = []
+                for texture in selected_textures:
+                    if texture in engine_textures:
+                        textures.append(texture)
+            else:
+                materials = cmds.ls(engine_materials, mat=True)
+                textures = cmds.ls(engine_textures, tex=True)
+        else:
+            if selected:
+                materials, textures = self.mat_and_tex_from_objects()
+            else:
+                materials = cmds.ls(mat=True)
+                textures = cmds.ls(tex=True)
+
+        default_materials = cmds.ls(dn=True, mat=True)
+        correct_materials = [i for i in materials if i not in default_materials]
+        ignore_textures = cmds.ls(type=['file'])
+        correct_textures = [i for i in textures if i not in ignore_textures]
+
+        return correct_materials, correct_textures
+
+    def list_lights(self, engine, selected=True, in_render=True):
+        cmds = self.cmds
+        if in_render:
+            light_types = self.get_type_nodes(engine, 'light')
+        else:
+            light_types = cmds.listNodeTypes('light')
+
+        if light_types:
+            if selected:
+                selection = cmds.ls(sl=True)
+                selection_shapes = self.get_shapes_from_objects(selection)
+                light_shape_names = cmds.ls(selection_shapes, type=light_types)
+            else:
+                light_shape_names = cmds.ls(type=light_types)
+        else:
+            light_shape_names = []
+        return light_shape_names
+
+    def list_utilities(self, engine, selected=True, in_render=True):
+        cmds = self.cmds
+        if in_render:
+            type_list = self.get_type_nodes(engine, 'utility')  # only from specific render engine
+        else:
+            type_list = cmds.listNodeTypes('utility')  # all utilities
+
+        if selected:
+            selection = cmds.ls(sl=True)
+            utilities = cmds.ls(selection, type=type_list)
+        else:
+            utilities = cmds.ls(type=type_list)
+
+        exclude_software = self.get_type_nodes('mayaSoftware', 'utility')
+        ignore_utilities = cmds.ls(type=exclude_software)
+        correct_utilities = [i for i in utilities if i not in ignore_utilities]
+
+        return correct_utilities
+
+
+def list_shared(converter, engine, selected, in_render):
+    """All the listings of a conversion over one inventory, as plan_scene does."""
+    inventory = converter.scene_inventory(selected)
+    converter.list_materials(engine, selected, in_render, inventory)
+    converter.list_lights(engine, selected, in_render, inventory)
+    converter.list_utilities(engine, selected, in_render, inventory)
+
+
+def measure(function, *args):
+    start = time.time()
+    result = function(*args)
+    return round(time.time() - start, 4), result
+
+
+def run(size, legacy_max):
+    scene = build_scene(size)
+    converter = Converter.ConverterClass(backend=scene)
+
+    row = {'nodes': len(scene.nodes)}
+    for engine, in_render in (('arnold', True), ('arnold', False)):
+        for selected in (True, False):
+            key = '{0}_{1}'.format('render' if in_render else 'all', 'selected' if selected else 'scene')
+            row['materials_' + key] = measure(converter.list_materials, engine, selected, in_render)[0]
+            row['utilities_' + key] = measure(converter.list_utilities, engine, selected, in_render)[0]
+            row['lights_' + key] = measure(converter.list_lights, engine, selected, in_render)[0]
+            row['shared_inventory_' + key] = measure(list_shared, converter, engine, selected, in_render)[0]
+    if size <= legacy_max:
+        legacy = LegacyListing(scene)
+        for engine, in_render in (('arnold', True), ('arnold', False)):
+            for selected in (True, False):
+                key = '{0}_{1}'.format('render' if in_render else 'all', 'selected' if selected else 'scene')
+                row['legacy_materials_' + key] = measure(legacy.list_materials, engine, selected, in_render)[0]
+                row['legacy_utilities_' + key] = measure(legacy.list_utilities, engine, selected, in_render)[0]
+                row['legacy_lights_' + key] = measure(legacy.list_lights, engine, selected, in_render)[0]
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--legacy-max', type=int, default=10000, help='largest size timed with the legacy listing')
+    args = parser.parse_args(argv)
+    print(json.dumps([run(size, args.legacy_max) for size in args.sizes], indent=4, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Throughput and memory of the offline .ma converter on a generated scene.
+
+    python Benchmarks/bench_offline.py --size-mb 512 --materials 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ConverterOffline as Offline  # noqa: E402
+import ConverterRules as Rules  # noqa: E402
+
+aliases = {'blinn': {'c': 'color', 'it': 'transparency', 'dc': 'diffuse', 'oc': 'outColor',
+                     'ec': 'eccentricity'}}
+
+
+def write_scene(file_path, size_mb, materials, mesh_mb=8):
+    """Writes a scene of about size_mb made of large inline meshes and simple shading networks."""
+    vertices_per_line = '\t\t 0.5 -0.25 0.125 0.5 -0.25 0.125 0.5 -0.25 0.125\n'
+    lines_per_mesh = int(mesh_mb * (1 << 20) / len(vertices_per_line))
+    with open(file_path, 'w') as scene:
+        scene.write('//Maya ASCII 2020 scene\n//Codeset: 1252\nrequires maya "2020";\n')
+        for i in range(materials):
+            scene.write('createNode blinn -n "blinn{0}";\n'.format(i))
+            scene.write('\tsetAttr ".c" -type "float3" 0.2 0.3 0.4 ;\n')
+            scene.write('\tsetAttr ".it" -type "float3" 0.25 0.5 1 ;\n')
+            scene.write('\tsetAttr ".dc" 0.8;\n')
+            scene.write('createNode file -n "file{0}";\n'.format(i))
+            scene.write('\tsetAttr ".ftn" -type "string" "textures/file{0}.png";\n'.format(i))
+        mesh = 0
+        while scene.tell() < size_mb * (1 << 20):
+            scene.write('createNode mesh -n "meshShape{0}" -p "mesh{0}";\n'.format(mesh))
+            scene.write('\tsetAttr -s {0} ".vt";\n'.format(lines_per_mesh * 3))
+            scene.write('\tsetAttr ".vt[0:{0}]"\n'.format(lines_per_mesh * 3 - 1))
+            for _ in range(lines_per_mesh):
+                scene.write(vertices_per_line)
+            scene.write('\t;\n')
+            mesh += 1
+        for i in range(materials):
+            scene.write('connectAttr "file{0}.oc" "blinn{0}.c";\n'.format(i))
+            scene.write('connectAttr "file{0}.oc" "blinn{0}.it";\n'.format(i))
+        scene.write('// End of scene.ma\n')
+
+
+def run(rules_name, size_mb, materials, memory):
+    rules = Rules.load_rules(Rules.rules_path(rules_name))
+    directory = tempfile.mkdtemp()
+    in_path = os.path.join(directory, 'scene.ma')
+    out_path = os.path.join(directory, 'converted.ma')
+    write_scene(in_path, size_mb, materials)
+    file_size = os.path.getsize(in_path)
+
+    converter = Offline.MayaAsciiConverter(rules, aliases)
+    if memory:
+        tracemalloc.start()
+    start = time.time()
+    result = converter.convert_file(in_path, out_path)
+    elapsed = time.time() - start
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    os.remove(in_path)
+    os.remove(out_path)
+    os.rmdir(directory)
+    return {'rules': rules_name,
+            'file_mb': round(file_size / float(1 << 20), 2),
+            'seconds': round(elapsed, 3),
+            'mb_per_second': round(file_size / float(1 << 20) / elapsed, 2),
+            'peak_memory_mb': round(peak / float(1 << 20), 2) if peak is not None else None,
+            'converted_nodes': len(result['converted_nodes']),
+            'reverse_nodes': len(result['reverse_nodes'])}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', default='mayaSoftware_To_arnold')
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--materials', type=int, default=1000)
+    parser.add_argument('--memory', action='store_true', help='trace the peak python memory, slower')
+    args = parser.parse_args(argv)
+    print(json.dumps(run(args.rules, args.size_mb, args.materials, args.memory), indent=4, sort_keys=True))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
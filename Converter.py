@@ -13,464 +13,844 @@
 
 import json
 import os
-import traceback
 
-import maya.cmds as cmds
+try:
+    import maya.api.OpenMaya as om
+except ImportError:  # outside of Maya, the scene is given by another backend e.g. ConverterFake.FakeScene
+    om = None
 
-# the name of  render engines differs from their plugins, so this needs to be edited if adding new renderer
-render_engines_dic = {'arnold': 'mtoa', 'vray': 'vrayformaya', 'renderman': 'RenderMan_for_Maya',
-                      'redshift': 'redshift4maya'}
+import ConverterBackend as Backend
+import ConverterLog as Log
+import ConverterPlan as Plan
+import ConverterReport as Report
+import ConverterRules as Rules
+import ConverterSchema as Schema
+from ConverterRules import ignore_attributes, render_engines_dic
 
 other_types_list = ['enum', 'double', 'typed', 'compound', 'short',
                    'time', 'double3', 'float2', 'byte', 'fltMatrix', 'char', 'doubleAngle', 'floatLinear',
                    'double2', 'long2', 'doubleLinear', 'matrix', 'double4', 'generic']
 
 mayaLightTypes = ["ambientLight", "pointLight", "spotLight", "areaLight", "directionalLight", "volumeLight"]
-ignore_attributes = ['message', 'caching', 'frozen', 'isHistoricallyInteresting', 'nodeState', 'binMembership',
-                     'lightData', 'iconName']
 ignore_types = ['message', 'compound', 'byte', 'fltMatrix', 'char', 'matrix', 'generic']
 script_dir = os.path.dirname(__file__)
+logger = Log.logger
 
+# node type classification per session: (engine, classification) and plugin queries, cleared on plugin (un)load
+_type_cache = {}
+try:
+    _plugin_callbacks  # module globals survive reload(), drop the callbacks of the previous load
+except NameError:
+    _plugin_callbacks = []
+
+
+# attribute schemas of the node types, kept on disk between sessions, see ConverterSchema
+_schema = Schema.SchemaCache(Schema.default_path())
+
+
+def invalidate_type_cache(*args):
+    _type_cache.clear()
+
+
+def register_plugin_callbacks():
+    if om is None:
+        return
+    if _plugin_callbacks:
+        om.MMessage.removeCallbacks(_plugin_callbacks)
+        del _plugin_callbacks[:]
+    for message in (om.MSceneMessage.kAfterPluginLoad, om.MSceneMessage.kAfterPluginUnload):
+        _plugin_callbacks.append(om.MSceneMessage.addStringArrayCallback(message, invalidate_type_cache))
+
+
+register_plugin_callbacks()
 
-class ConverterClass(object):
+
+def unique(items):
+    """items without duplicates, in order."""
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
+
+
+class NodeSnapshot(object):
+    """Values and connections of the mapped attributes of a node, captured once before it is replaced."""
+    __slots__ = ('node', 'node_type', 'values', 'inputs', 'outputs')
+
+    def __init__(self, node, node_type):
+        self.node = node
+        self.node_type = node_type
+        self.values = {}
+        self.inputs = {}
+        self.outputs = {}
+
+
+class ConnectionIndex(object):
+    """Plug to plugs index of the connections of a batch of nodes, harvested once."""
 
     def __init__(self):
+        self.inputs = {}
+        self.outputs = {}
+
+    def add(self, source, destination):
+        self.inputs[destination] = source
+        destinations = self.outputs.setdefault(source, [])
+        if destination not in destinations:
+            destinations.append(destination)
+
+    def source(self, plug):
+        return self.inputs.get(plug)
+
+    def destinations(self, plug):
+        return self.outputs.get(plug, [])
+
+
+class SceneInventory(object):
+    """
+    Every node of the scene with its type and the shading networks of the selection, read once per
+    conversion and shared by the list_* functions.
+    """
+
+    def __init__(self):
+        self.types = {}
+        self.by_type = {}
+        self.materials = []
+        self.textures = []
+        self.defaults = frozenset()
+        self.selection = []
+        self.selected_shapes = []
+        self.shading_engines = []
+        # every shading node upstream of the selected shading engines, in dependency order
+        self.selected_network = []
+        self.selected_materials = []
+        self.selected_textures = []
+
+    def add(self, node, node_type):
+        self.types[node] = node_type
+        self.by_type.setdefault(node_type, []).append(node)
+
+    def of_types(self, types, nodes=None):
+        """Nodes of the given types, in scene order or in the order of nodes."""
+        if nodes is None:
+            result = []
+            for node_type in types:
+                result.extend(self.by_type.get(node_type, []))
+            return result
+        types = frozenset(types)
+        return [node for node in nodes if self.types.get(node) in types]
+
+
+class ConverterClass(object):
+
+    def __init__(self, backend=None):
+        # scene reads and writes of the conversions, see ConverterBackend
+        self.backend = Backend.create_backend(backend)
         self.render_engines = self.get_render_engines()
         self.current_engine = self.get_current_render()
-        self.all_plugins_nodes = self.get_all_engines_nodes()
+
+    @property
+    def type_cache(self):
+        if self.backend.type_cache is not None:
+            return self.backend.type_cache
+        return _type_cache
+
+    @property
+    def schema(self):
+        if self.backend.schema is not None:
+            return self.backend.schema
+        return _schema
+
+    @property
+    def all_plugins_nodes(self):
+        return self.get_all_engines_nodes()
 
     def get_render_engines(self):
         renders = []
-        plugins = cmds.renderer(query=True, namesOfAvailableRenderers=True)
+        plugins = self.backend.renderer(query=True, namesOfAvailableRenderers=True)
         for plugin in plugins:
             if plugin not in ['mayaHardware2', 'mayaVector', 'turtle']:
                 renders.append(plugin)
         return renders
 
     def is_plugin_loaded(self, plugin):
-        loaded_plugins = cmds.pluginInfo(query=True, listPlugins=True)
+        loaded_plugins = self.backend.pluginInfo(query=True, listPlugins=True)
         if plugin in loaded_plugins:
             return True
         else:
             return False
 
     def get_current_render(self):
-        current_render = cmds.getAttr("defaultRenderGlobals.currentRenderer")
+        current_render = self.backend.getAttr("defaultRenderGlobals.currentRenderer")
         if current_render not in ['mayaHardware2', 'mayaVector', 'turtle']:
             return current_render
         else:
             return
 
     def get_engine_nodes(self, engine):
-        if engine != 'mayaSoftware':
-            render_plugin = render_engines_dic[engine]
-            nodes = cmds.pluginInfo(render_plugin, dn=1, query=True)
-        else:
-            nodes = []
-        return nodes
+        key = ('engine', engine)
+        if key not in self.type_cache:
+            if engine != 'mayaSoftware':
+                render_plugin = render_engines_dic[engine]
+                nodes = self.backend.pluginInfo(render_plugin, dn=1, query=True) or []
+            else:
+                nodes = []
+            self.type_cache[key] = frozenset(nodes)
+        return self.type_cache[key]
 
     def get_all_engines_nodes(self):
-        all_engines_node = []
-        for render_plugin in render_engines_dic.values():
-            if self.is_plugin_loaded(render_plugin):
-                nodes = cmds.pluginInfo(render_plugin, dn=1, query=True)
-                all_engines_node.extend(nodes)
-        return all_engines_node
+        key = ('engines',)
+        if key not in self.type_cache:
+            all_engines_node = set()
+            for render_plugin in render_engines_dic.values():
+                if self.is_plugin_loaded(render_plugin):
+                    nodes = self.backend.pluginInfo(render_plugin, dn=1, query=True) or []
+                    all_engines_node.update(nodes)
+            self.type_cache[key] = frozenset(all_engines_node)
+        return self.type_cache[key]
+
+    def list_node_types(self, classification):
+        key = ('classification', classification)
+        if key not in self.type_cache:
+            self.type_cache[key] = tuple(self.backend.listNodeTypes(classification) or [])
+        return self.type_cache[key]
 
     def get_type_nodes(self, engine, node_type):
-        engine_nodes = []
-        plugin_nodes = self.get_engine_nodes(engine)
-        type_nodes = cmds.listNodeTypes(node_type)
-        for node in type_nodes:
+        key = ('type', engine, node_type)
+        if key not in self.type_cache:
+            type_nodes = self.list_node_types(node_type)
             if engine != 'mayaSoftware':
-                if node in plugin_nodes:
-                    engine_nodes.append(node)
+                plugin_nodes = self.get_engine_nodes(engine)
+                engine_nodes = [node for node in type_nodes if node in plugin_nodes]
             else:
-                if node not in self.all_plugins_nodes:
-                    engine_nodes.append(node)
-        return engine_nodes
+                all_plugins_nodes = self.get_all_engines_nodes()
+                engine_nodes = [node for node in type_nodes if node not in all_plugins_nodes]
+            self.type_cache[key] = tuple(engine_nodes)
+        return list(self.type_cache[key])
+
+    def type_versions(self):
+        """{node type: plugin and version} of the node types of every loaded plugin."""
+        key = ('versions',)
+        if key not in self.type_cache:
+            versions = {}
+            for plugin in self.backend.pluginInfo(query=True, listPlugins=True) or []:
+                version = '{0} {1}'.format(plugin, self.backend.pluginInfo(plugin, query=True, version=True))
+                for node_type in self.backend.pluginInfo(plugin, query=True, dependNode=True) or []:
+                    versions[node_type] = version
+            self.type_cache[key] = versions
+        return self.type_cache[key]
+
+    def type_version(self, node_type):
+        version = self.type_versions().get(node_type)
+        if version is None:
+            key = ('maya version',)
+            if key not in self.type_cache:
+                self.type_cache[key] = 'maya {0}'.format(self.backend.about(version=True))
+            version = self.type_cache[key]
+        return version
+
+    def attribute_schema(self, node_type, attribute):
+        """The schema record of an attribute, see ConverterSchema.query_attribute."""
+        return self.schema.attribute(self.backend, node_type, self.type_version(node_type), attribute)
+
+    def attribute_default(self, node_type, attribute):
+        """The default value of an attribute, None when it has none or the type is unknown."""
+        try:
+            return self.attribute_schema(node_type, attribute)['default']
+        except RuntimeError:
+            return None
+
+    def save_schema(self):
+        return self.schema.save()
 
     def get_type_attributes(self, node_type, inherited, others, excluded_types):
         result_attrs = {}
-        if inherited:
-            type_attrs = cmds.attributeInfo(leaf=False, type=node_type)
-        else:
-            type_attrs = cmds.attributeInfo(inherited=False, leaf=False, logicalAnd=True, type=node_type)
-
-        if type_attrs is not None:
-            for attribute in type_attrs:
-                if attribute not in ignore_attributes:
-                    attr_type = cmds.attributeQuery(attribute, type=node_type, attributeType=True)
-                    if attr_type not in ignore_types and attr_type not in excluded_types:
-                        if others:
+        type_attrs = self.schema.attribute_names(self.backend, node_type, self.type_version(node_type), inherited)
+        for attribute in type_attrs:
+            if attribute not in ignore_attributes:
+                attr_type = self.attribute_schema(node_type, attribute)['type']
+                if attr_type not in ignore_types and attr_type not in excluded_types:
+                    if others:
+                        result_attrs[attribute] = attr_type
+                    else:
+                        if attr_type not in other_types_list:
                             result_attrs[attribute] = attr_type
-                        else:
-                            if attr_type not in other_types_list:
-                                result_attrs[attribute] = attr_type
         return result_attrs
 
     def get_attribute_children(self, attribute, node_type):
-        attr_children = cmds.attributeQuery(attribute, type=node_type, listChildren=True)
-        return attr_children
+        return self.attribute_schema(node_type, attribute)['children'] or None
 
     def get_attribute_list(self, attribute, node_type):
-        attr_enum = cmds.attributeQuery(attribute, type=node_type, listEnum=True)
-        return attr_enum
+        return self.attribute_schema(node_type, attribute)['enum']
+
+    def export_attribute_aliases(self, rules, file_path):
+        # short to long attribute names of the source types, used by ConverterOffline to read .ma files
+        aliases = {}
+        for node_type, node_rule in rules.nodes.items():
+            type_aliases = {}
+            for attribute in node_rule.attributes:
+                try:
+                    short_name = self.attribute_schema(node_type, attribute)['short']
+                except RuntimeError:
+                    continue
+                if short_name != attribute:
+                    type_aliases[short_name] = attribute
+            aliases[node_type] = type_aliases
+            # the defaults of the source attributes are recorded above with their short names, the ones of the
+            # target attributes here, ConverterOffline reads both from the schema file
+            if node_rule.target_type:
+                for attribute_rule in node_rule.attributes.values():
+                    if attribute_rule.target:
+                        self.attribute_default(node_rule.target_type, attribute_rule.target)
+        self.save_json_file(file_path, aliases)
+        self.save_schema()
+        return aliases
 
     def save_json_file(self, file_path, data):
         with open(file_path, 'w') as outfile:
             json.dump(data, outfile, sort_keys=True, indent=4, separators=(',', ': '))
+        Rules.invalidate_rules(file_path)
 
     def load_json_file(self, file_path):
         with open(file_path) as json_file:
             data = json.load(json_file)
             return data
 
-    def is_target_engine_loaded(self, file_data):
-        target_engine = file_data['Engines'][1]
+    def load_rules(self, file_path):
+        return Rules.load_rules(file_path)
+
+    def is_target_engine_loaded(self, rules):
+        target_engine = rules.target_engine
         if target_engine != 'mayaSoftware':
             target_plugin = render_engines_dic[target_engine]
             return self.is_plugin_loaded(target_plugin)
         else:
             return True
 
-    def fetch_attributes(self, file_data, node):
-        node_type = cmds.nodeType(node)
-        in_node_dic = {}
-        out_node_dic = {}
-        attributes_dic = {}
-        if node_type in file_data.keys():
-            attributes = file_data[node_type]
+    def harvest_connections(self, nodes, index=None):
+        if index is None:
+            index = ConnectionIndex()
+        for source, destination in self.backend.list_connections(nodes):
+            index.add(source, destination)
+        return index
+
+    def snapshot_node(self, rules, node, node_type=None, connections=None):
+        if node_type is None:
+            node_type = self.backend.node_type(node)
+        if connections is None:
+            connections = self.harvest_connections([node])
+        snapshot = NodeSnapshot(node, node_type)
+        node_rule = rules.node(node_type)
+        if node_rule is not None:
+            attributes = [a for a in node_rule.attributes if not self.attribute_schema(node_type, a)['message']]
             for attribute in attributes:
-                if attribute not in ignore_attributes and attribute != node_type:
-                    if not cmds.attributeQuery(attribute, type=node_type, message=True):
-                        node_attr = node + '.' + attribute
-                        if cmds.connectionInfo(node_attr, isExactDestination=True):
-                            source = cmds.connectionInfo(node_attr, sourceFromDestination=True)
-                            in_node_dic[attribute] = source
-                        elif cmds.connectionInfo(node_attr, isExactSource=True):
-                            destinations = cmds.connectionInfo(node_attr, destinationFromSource=True)
-                            for destination in destinations:
-                                out_node_dic[attribute] = destination
-                        attr_value = cmds.getAttr(node_attr)
-                        attributes_dic[attribute] = attr_value
-        return attributes_dic, in_node_dic, out_node_dic
-
-    def convert_node(self, file_data, in_node):
-        if in_node in file_data.keys():
-            node_attributes = file_data[in_node]
-            out_node = node_attributes[in_node]
-            return out_node
+                node_attr = node + '.' + attribute
+                source = connections.source(node_attr)
+                if source is not None:
+                    snapshot.inputs[attribute] = source
+                destinations = connections.destinations(node_attr)
+                if destinations:
+                    snapshot.outputs[attribute] = list(destinations)
+            # the values of the children of mapped compounds come with the compound
+            snapshot.values = self.backend.get_attributes(node, node_rule.value_attributes(attributes))
+        return snapshot
+
+    def final_node_name(self, node, category):
+        # lights are replaced from their transform, the new light takes the transform name
+        if category == 'light':
+            in_transform = self.backend.listRelatives(node, parent=True, fullPath=True)
+            if in_transform:
+                return in_transform[0].split('|')[-1]
+        return node
+
+    def plan_nodes(self, rules, nodes, rules_name='', connections=None, report=None):
+        """Builds the plan of (node, category) pairs without touching the scene."""
+        if connections is None:
+            connections = self.harvest_connections([node for node, _ in nodes])
+        entries = []
+        for node, category in nodes:
+            start = Report.timer()
+            snapshot = self.snapshot_node(rules, node, connections=connections)
+            entries.append((snapshot, category, self.final_node_name(node, category)))
+            if report is not None:
+                report.node(node, snapshot.node_type, rules.target_type(snapshot.node_type), category)
+                report.add_time(node, 'snapshot', Report.timer() - start)
+        plan = Plan.build_plan(rules, entries, rules_name, defaults=self.attribute_default)
+        self.save_schema()
+        return plan
+
+    def plan_scene(self, file_name, lights=True, materials=True, selected=False, in_render=True, report=None):
+        """Reads the scene once and returns the ConversionPlan that convert_scene would execute."""
+        rules = self.load_rules(Rules.rules_path(file_name))
+        source_engine = rules.source_engine
+
+        inventory = self.scene_inventory(selected)
+        scene_materials, scene_textures, scene_lights = [], [], []
+        if materials:
+            scene_materials, scene_textures = self.list_materials(source_engine, selected=selected,
+                                                                  in_render=in_render, inventory=inventory)
+        if lights:
+            scene_lights = self.list_lights(source_engine, selected=selected, in_render=in_render,
+                                            inventory=inventory)
+        scene_utilities = self.list_utilities(source_engine, selected=selected, in_render=in_render,
+                                              inventory=inventory)
+
+        nodes = [(node, 'material') for node in scene_materials]
+        nodes.extend((node, 'texture') for node in scene_textures)
+        nodes.extend((node, 'light') for node in scene_lights)
+        nodes.extend((node, 'utility') for node in scene_utilities)
+        return self.plan_nodes(rules, nodes, file_name, report=report)
+
+    def create_node(self, node_type, category):
+        return self.backend.create_node(node_type, category)
+
+    def execute_plan(self, plan, report=None):
+        """
+        Applies a ConversionPlan to the scene, returns the same lists as convert_scene plus the
+        ConversionReport of the execution under 'report'.
+        """
+        if report is None:
+            report = Report.ConversionReport(plan.rules_name)
+        converted_nodes = []
+        unconverted_nodes = []
+        unconverted_attributes = []
+        for failure in plan.failures:
+            if failure['attribute'] is None:
+                unconverted_nodes.append(failure['node_type'] + ' : ' + failure['node'])
+                report.node(failure['node'], failure['node_type'], category=failure.get('category'))
+                report.set_status(failure['node'], Report.STATUS_FAILED)
+            else:
+                unconverted_attributes.append(failure['attribute'])
+            report.add_failure(failure['node'], failure['reason'], failure['attribute'])
+
+        report.skipped_values += plan.skipped_values
+
+        renamed = {}
+        # nodes of failed steps still in the scene, their connections keep their scene plugs
+        kept = set()
+        buffer = self.command_buffer()
+        reverse_pool = self.reverse_pool()
+        multiply_pool = self.multiply_pool()
+        if plan.steps:
+            # steps are in dependency order, the categories are mixed
+            self.print_title('Converting Nodes:')
+        try:
+            for step in plan.steps:
+                logger.debug('%s: %s', step.category.title(), step.node,
+                             extra={'data': {'event': 'node', 'node': step.node, 'node_type': step.node_type,
+                                             'target_type': step.target_type}})
+                report.node(step.node, step.node_type, step.target_type, step.category)
+                try:
+                    converted = self.execute_step(step, renamed, unconverted_attributes, report, buffer,
+                                                  reverse_pool, multiply_pool, kept)
+                except Exception as error:
+                    # the nodes already swapped still need their queued values and connections
+                    converted = False
+                    report.add_failure(step.node, 'conversion failed', error=str(error))
+                    logger.warning('Failed to convert %s: %s', step.node, error,
+                                   extra={'data': {'event': 'convert_failed', 'node': step.node,
+                                                   'error': str(error)}})
+                if converted:
+                    converted_nodes.append(step.node)
+                    report.set_status(step.node, Report.STATUS_CONVERTED)
+                else:
+                    unconverted_nodes.append(step.node_type + ' : ' + step.node)
+                    report.set_status(step.node, Report.STATUS_FAILED)
+                    if self.is_kept(step):
+                        kept.add(step.node)
+                        self.restore_connections(step, renamed, buffer)
+                if buffer.is_full():
+                    self.flush_buffer(buffer, unconverted_attributes, report)
+        finally:
+            self.flush_buffer(buffer, unconverted_attributes, report)
+
+        return {'converted_nodes': converted_nodes, 'unconverted_nodes': unconverted_nodes,
+                'unconverted_attributes': unconverted_attributes, 'skipped_values': plan.skipped_values,
+                'reverse_nodes': list(reverse_pool.nodes), 'multiply_nodes': list(multiply_pool.nodes),
+                'report': report}
+
+    def execute_step(self, step, renamed, unconverted_attributes, report, buffer=None, reverse_pool=None,
+                     multiply_pool=None, kept=()):
+        """
+        Replaces one node. Its values and connections are queued in buffer and made when the buffer is
+        flushed, right away when no buffer is given. The inverse and multiply connections share the
+        utility nodes of reverse_pool and multiply_pool, see ConverterPlan.UtilityPool. The connections
+        to the kept nodes, left as they were by failed steps, are made to their scene plugs.
+        """
+        flush = buffer is None
+        if flush:
+            buffer = self.command_buffer()
+        if reverse_pool is None:
+            reverse_pool = self.reverse_pool()
+        if multiply_pool is None:
+            multiply_pool = self.multiply_pool()
+        timings = report.node(step.node).timings
+        start = Report.timer()
+        new_node = self.create_node(step.target_type, step.category)
+        if self.backend.node_type(new_node) == 'unknown':
+            self.backend.delete(new_node)
+            timings['create'] += Report.timer() - start
+            report.add_failure(step.node, 'target node type could not be created')
+            logger.warning('Failed to create a new node of type: %s', step.target_type,
+                           extra={'data': {'event': 'create_failed', 'node': step.node,
+                                           'target_type': step.target_type}})
+            return False
+        now = Report.timer()
+        timings['create'] += now - start
+        start = now
+
+        #  swap the nodes ###################################
+        if step.category == 'light':
+            in_transform = self.backend.listRelatives(step.node, parent=True, fullPath=True)
+            self.backend.matchTransform(new_node, in_transform)
+            in_parent = self.backend.listRelatives(in_transform, parent=True, fullPath=True)
+            if in_parent:
+                self.backend.parent(new_node, in_parent)
+            self.backend.delete(in_transform)
         else:
-            return
+            self.backend.delete(step.node)
+        new_node = self.backend.rename(new_node, step.final_name)
+        renamed[step.final_name] = new_node
+        now = Report.timer()
+        timings['swap'] += now - start
+        start = now
+
+        #  static values ##################################
+        for out_attribute, value, value_type, in_attribute in step.values:
+            buffer.set_attr(new_node + '.' + out_attribute, value, value_type,
+                            {'event': 'set', 'node': step.node, 'attribute': out_attribute,
+                             'source_attribute': in_attribute, 'value': value})
+        now = Report.timer()
+        timings['set'] += now - start
+        start = now
+
+        #  connections ###################################
+        def final_plug(plug, scene_plug):
+            if scene_plug is not None and Plan.split_plug(scene_plug)[0] in kept:
+                return scene_plug
+            node, attribute = Plan.split_plug(plug)
+            return renamed.get(node, node) + '.' + attribute
+
+        def kept_destination(scene_destination):
+            return scene_destination is not None and Plan.split_plug(scene_destination)[0] in kept
+
+        direct = [connection[:2] + connection[-2:] for connection in step.reverse_nodes + step.multiply_nodes
+                  if kept_destination(connection[-1])]
+        for source, destination, scene_source, scene_destination in step.connections + direct:
+            source, destination = final_plug(source, scene_source), final_plug(destination, scene_destination)
+            buffer.connect_attr(source, destination, {'event': 'connect', 'node': step.node, 'source': source,
+                                                      'destination': destination})
+
+        for source, destination, compound, scene_source, scene_destination in step.reverse_nodes:
+            if kept_destination(scene_destination):
+                continue
+            source, destination = final_plug(source, scene_source), final_plug(destination, scene_destination)
+            reverse_output, reverse_input = reverse_pool.inverse(source, compound)
+            tag = {'event': 'connect_inverse', 'node': step.node, 'source': source, 'destination': destination,
+                   'reverse_node': Plan.split_plug(reverse_output)[0]}
+            if reverse_input is not None:
+                buffer.connect_attr(source, reverse_input, tag)
+            buffer.connect_attr(reverse_output, destination, tag)
+
+        for source, destination, compound, factor, scene_source, scene_destination in step.multiply_nodes:
+            if kept_destination(scene_destination):
+                continue
+            source, destination = final_plug(source, scene_source), final_plug(destination, scene_destination)
+            multiply_output, multiply_input, factor_input = multiply_pool.multiply(source, compound, factor)
+            tag = {'event': 'connect_multiply', 'node': step.node, 'source': source, 'destination': destination,
+                   'factor': factor, 'multiply_node': Plan.split_plug(multiply_output)[0]}
+            if multiply_input is not None:
+                if compound:
+                    buffer.set_attr(factor_input, [factor] * 3, 'float3', tag)
+                else:
+                    buffer.set_attr(factor_input, factor, None, tag)
+                buffer.connect_attr(source, multiply_input, tag)
+            buffer.connect_attr(multiply_output, destination, tag)
+        timings['connect'] += Report.timer() - start
 
-    def convert_attributes(self, file_data, in_node, in_attribute):
-        node_attributes = file_data[in_node]
-        if in_attribute in node_attributes.keys():
-            return node_attributes[in_attribute]
-        else:
-            return
+        if flush:
+            self.flush_buffer(buffer, unconverted_attributes, report)
+        return True
 
-    def replace_node(self, file_data, in_node, category):
-        unconverted_attributes = []
-        node_type = cmds.nodeType(in_node)
-        out_node_type = self.convert_node(file_data, node_type)
-        if out_node_type is not None:
-            if category == 'light':
-                new_node = cmds.shadingNode(out_node_type, asLight=True)
-            elif category == 'texture':
-                new_node = cmds.shadingNode(out_node_type, asTexture=True)
-            elif category == 'material':
-                new_node = cmds.shadingNode(out_node_type, asShader=True)
-            elif category == 'utility':
-                new_node = cmds.shadingNode(out_node_type, asUtility=True)
+    def is_kept(self, step):
+        """True when the node of a failed step is still in the scene as it was."""
+        try:
+            return self.backend.node_type(step.node) == step.node_type
+        except (RuntimeError, ValueError):
+            return False
+
+    def restore_connections(self, step, renamed, buffer):
+        """
+        Queues the scene connections of a failed step whose other node was already replaced, the kept
+        node lost them when that node was deleted.
+        """
+        for connection in step.connections + step.reverse_nodes + step.multiply_nodes:
+            source, destination, scene_source, scene_destination = connection[:2] + connection[-2:]
+            if scene_source is None:
+                continue
+            if Plan.split_plug(scene_destination)[0] == step.node:
+                other = Plan.split_plug(source)
+                plugs = (renamed.get(other[0], '') + '.' + other[1], scene_destination)
             else:
-                new_node = cmds.createNode(out_node_type, ss=True)
-
-            if cmds.nodeType(new_node) != 'unknown':
-
-                #  static values ##################################
-                in_value_attributes = self.fetch_attributes(file_data, in_node)[0].items()
-                for in_attribute, in_value in in_value_attributes:
-                    out_attribute_list = self.convert_attributes(file_data, node_type, in_attribute)
-                    if out_attribute_list is not None and in_value is not None:
-                        out_attribute = out_attribute_list[0]
-                        out_attribute_type = out_attribute_list[1]
-                        out_attribute_factor = out_attribute_list[2]
-
-                        if isinstance(in_value, (list, dict, tuple)):
-                            if len(in_value) == 3:
-                                if out_attribute_factor == 'Inverse':
-                                    value_a = abs(1 - in_value[0][0])
-                                    value_b = abs(1 - in_value[0][1])
-                                    value_c = abs(1 - in_value[0][2])
-                                elif isfloat(out_attribute_factor):
-                                    value_a = float(out_attribute_factor)
-                                    value_b = float(out_attribute_factor)
-                                    value_c = float(out_attribute_factor)
-                                else:
-                                    value_a = in_value[0][0]
-                                    value_b = in_value[0][1]
-                                    value_c = in_value[0][2]
-
-                                print(in_node + '.' + out_attribute + ' is setting to value(list): ',
-                                      value_a, value_b, value_c)
-                                try:
-                                    cmds.setAttr(new_node + '.' + out_attribute, value_a, value_b, value_c,
-                                                 type=out_attribute_type)
-                                    print('\tValue set successfully \n')
-                                except Exception:
-                                    print('\tFailed to set value \n')
-                                    unconverted_attributes.append(in_node + '.' + out_attribute)
-                                    traceback.print_exc()
-                        else:
-                            if out_attribute_factor == 'Inverse' and isinstance(in_value, float):
-                                in_value = abs(1 - in_value)
-                            elif isfloat(out_attribute_factor):
-                                in_value = float(out_attribute_factor)
-                            print(in_node + '.' + out_attribute + ' is setting to value: ', in_value)
-                            try:
-                                cmds.setAttr(new_node + '.' + out_attribute, in_value)
-                                print('\tValue set  successfully \n')
-                            except Exception:
-                                print('\tFailed to set value \n')
-                                unconverted_attributes.append(new_node + '.' + out_attribute)
-                                traceback.print_exc()
-
-                #  input connections ###################################
-                in_connection_inputs = self.fetch_attributes(file_data, in_node)[1].items()
-                for in_attribute_input, in_connection_input in in_connection_inputs:
-                    out_attribute_list = self.convert_attributes(file_data, node_type, in_attribute_input)
-                    if out_attribute_list is not None:
-                        out_attribute_input = out_attribute_list[0]
-                        out_attribute_factor = out_attribute_list[2]
-                        print(in_connection_input + ' is connecting to ' + in_node + '.' + out_attribute_input)
-                        try:
-                            if out_attribute_factor == 'Inverse':
-                                inverse_node = cmds.shadingNode('reverse', asUtility=True)
-                                cmds.connectAttr(in_connection_input, inverse_node + '.input', f=True)
-                                cmds.connectAttr(inverse_node + '.output', new_node + '.' + out_attribute_input, f=True)
-                                print('\tConnected inversely successfully \n')
-                            else:
-                                cmds.connectAttr(in_connection_input, new_node + '.' + out_attribute_input, f=True)
-                                print('\tConnected successfully \n')
-                        except Exception:
-                            print('\tFailed to connect \n')
-                            unconverted_attributes.append(new_node + '.' + out_attribute_input)
-                            traceback.print_exc()
-
-                #  output connections ###################################
-                in_connection_outputs = self.fetch_attributes(file_data, in_node)[2].items()
-                for in_attribute_output, in_connection_output in in_connection_outputs:
-                    out_attribute_list = self.convert_attributes(file_data, node_type, in_attribute_output)
-                    if out_attribute_list is not None:
-                        out_attribute_output = out_attribute_list[0]
-                        print(in_node + '.' + out_attribute_output + ' is connecting to ' + in_connection_output)
-                        try:
-                            cmds.connectAttr(new_node + '.' + out_attribute_output, in_connection_output, f=True)
-                            print('\tConnected successfully \n')
-                        except Exception:
-                            print('\tFailed to connect \n')
-                            unconverted_attributes.append(new_node + '.' + in_connection_output)
-                            traceback.print_exc()
-
-                if category == 'light':
-                    in_transform = cmds.listRelatives(in_node, parent=True, shapes=True, fullPath=True)
-                    cmds.matchTransform(new_node, in_transform)
-                    in_parent = cmds.listRelatives(in_transform, parent=True, fullPath=True)
-                    if in_parent:
-                        cmds.parent(new_node, in_parent)
-                    cmds.delete(in_transform)
-                    in_name = in_transform[0].split('|')[-1]
-                    cmds.rename(new_node, in_name)
+                other = Plan.split_plug(destination)
+                plugs = (scene_source, renamed.get(other[0], '') + '.' + other[1])
+            # a connection to a node that is not replaced is still there
+            if other[0] not in renamed or Plan.split_plug(scene_source)[0] == Plan.split_plug(scene_destination)[0]:
+                continue
+            buffer.connect_attr(plugs[0], plugs[1], {'event': 'connect', 'node': step.node, 'source': plugs[0],
+                                                     'destination': plugs[1]})
+
+    def command_buffer(self):
+        return self.backend.command_buffer()
+
+    def reverse_pool(self):
+        return Plan.ReversePool(lambda source: self.backend.shadingNode('reverse', asUtility=True))
+
+    def multiply_pool(self):
+        return Plan.MultiplyPool(lambda source: self.backend.shadingNode('multiplyDivide', asUtility=True))
+
+    def flush_buffer(self, buffer, unconverted_attributes, report):
+        """Runs the queued commands, the failures are reported on the attributes they were queued for."""
+        start = Report.timer()
+        results = buffer.flush()
+        if not results:
+            return
+        # one run for all the commands, each gets an equal share of it, see ConverterReport.ESTIMATED_PHASES
+        share = (Report.timer() - start) / len(results)
+        # the commands of a reverse or multiplyDivide node share their tag, it fails if any of them does
+        errors = {}
+        tags = []
+        for tag, error in results:
+            report.add_time(tag['node'], 'flush', share)
+            if id(tag) not in errors:
+                tags.append(tag)
+                errors[id(tag)] = error
+            elif errors[id(tag)] is None:
+                errors[id(tag)] = error
+
+        verbose = Log.verbose()
+        for tag in tags:
+            error = errors[id(tag)]
+            if error is not None:
+                if tag['event'] == 'set':
+                    attribute = tag['node'] + '.' + tag['attribute']
+                    report.add_failure(tag['node'], 'setAttr failed', tag['attribute'], error)
                 else:
-                    cmds.delete(in_node)
-                    cmds.rename(new_node, in_node)
-            else:
-                cmds.delete(new_node)
-                print('Failed to create a new node of type: ' + out_node_type + '\n')
-
-            return None, unconverted_attributes
+                    attribute = tag['destination']
+                    reason = 'connectAttr failed'
+                    if tag['event'] == 'connect_inverse':
+                        reason = 'connectAttr through reverse failed'
+                    elif tag['event'] == 'connect_multiply':
+                        reason = 'connectAttr through multiplyDivide failed'
+                    report.add_failure(tag['node'], reason, attribute, error)
+                unconverted_attributes.append(attribute)
+            if verbose:
+                self.log_command(tag, error)
+
+    def log_command(self, tag, error):
+        succeeded = error is None
+        event = tag['event']
+        if event == 'set':
+            message = '%s.%s is set to %s' if succeeded else 'Failed to set %s.%s to %s'
+            args = (tag['node'], tag['attribute'], tag['value'])
+        elif event == 'connect':
+            message = '%s is connected to %s' if succeeded else 'Failed to connect %s to %s'
+            args = (tag['source'], tag['destination'])
+        elif event == 'connect_multiply':
+            message = '%s is connected to %s times %s' if succeeded else 'Failed to connect %s to %s times %s'
+            args = (tag['source'], tag['destination'], tag['factor'])
         else:
-            return (node_type + ' : ' + in_node), unconverted_attributes
+            message = '%s is connected inversely to %s' if succeeded else 'Failed to connect %s inversely to %s'
+            args = (tag['source'], tag['destination'])
+        data = dict(tag)
+        if not succeeded:
+            data['event'] = event + '_failed' if event == 'set' else 'connect_failed'
+            data['error'] = error
+        logger.debug(message, *args, extra={'data': data})
+
+    def replace_node(self, rules, in_node, category, connections=None):
+        plan = self.plan_nodes(rules, [(in_node, category)], connections=connections)
+        result = self.execute_plan(plan)
+        unconverted_node = result['unconverted_nodes'][0] if result['unconverted_nodes'] else None
+        return unconverted_node, result['unconverted_attributes']
 
     def get_shapes_from_objects(self, objects):
-        objects_shapes = []
-        if objects:
-            for o in objects:
-                shape = cmds.listRelatives(o, shapes=True, fullPath=True) or []
-                objects_shapes.extend(shape)
-        return objects_shapes
-
-    def mat_and_tex_from_objects(self):
-        selection = cmds.ls(sl=True)
-        selection_shapes = self.get_shapes_from_objects(selection)
-        selection_shapes = list(set(selection_shapes))
-        shading_engine = cmds.listConnections(selection_shapes, type='shadingEngine')
-        materials_connections = cmds.listConnections(shading_engine)
-        materials = list(set(cmds.ls(materials_connections, materials=True)))
-        textures = []
-        for material in materials:
-            textures_connections = cmds.listConnections(material)
-            textures.extend(cmds.ls(textures_connections, textures=True))
-        textures = list(set(textures))
-        return materials, textures
-
-    def list_materials(self, engine, selected=True, in_render=True):
-        if in_render:
-            material_types = self.get_type_nodes(engine, 'shader')
-            engine_materials = cmds.ls(type=material_types)
-            texture_types = self.get_type_nodes(engine, 'texture')
-            engine_textures = cmds.ls(type=texture_types)
-
-            if selected:
-                selected_materials, selected_textures = self.mat_and_tex_from_objects()
-
-                materials = []
-                for material in selected_materials:
-                    if material in engine_materials:
-                        materials.append(material)
-
-                textures = []
-                for texture in selected_textures:
-                    if texture in engine_textures:
-                        textures.append(texture)
-            else:
-                materials = cmds.ls(engine_materials, mat=True)
-                textures = cmds.ls(engine_textures, tex=True)
+        if not objects:
+            return []
+        return self.backend.listRelatives(objects, shapes=True, fullPath=True) or []
+
+    def scene_inventory(self, selected=True):
+        """Reads the scene once: node types, materials, textures and the networks of the selection."""
+        inventory = SceneInventory()
+        listed = self.backend.ls(showType=True) or []
+        for i in range(0, len(listed) - 1, 2):
+            inventory.add(listed[i], listed[i + 1])
+        inventory.materials = self.backend.ls(mat=True) or []
+        inventory.textures = self.backend.ls(tex=True) or []
+        inventory.defaults = frozenset(self.backend.ls(dn=True) or [])
+
+        if selected:
+            inventory.selection = self.backend.ls(sl=True) or []
+            shapes = list(set(self.get_shapes_from_objects(inventory.selection)))
+            # same names as the other ls calls instead of full paths
+            inventory.selected_shapes = self.backend.ls(shapes) if shapes else []
+            if inventory.selected_shapes:
+                inventory.shading_engines = list(set(self.backend.listConnections(
+                    inventory.selected_shapes, type='shadingEngine') or []))
+            if inventory.shading_engines:
+                connected = self.backend.listConnections(inventory.shading_engines, source=True,
+                                                         destination=False) or []
+                shading_types = self.shading_node_types()
+                roots = [node for node in unique(connected) if inventory.types.get(node) in shading_types]
+                inventory.selected_network = self.walk_upstream(roots, inventory.types)
+            materials = frozenset(inventory.materials)
+            textures = frozenset(inventory.textures)
+            inventory.selected_materials = [node for node in inventory.selected_network if node in materials]
+            inventory.selected_textures = [node for node in inventory.selected_network if node in textures]
+        return inventory
+
+    def shading_node_types(self):
+        key = ('shading',)
+        if key not in self.type_cache:
+            shading_types = set()
+            for classification in ('shader', 'texture', 'utility'):
+                shading_types.update(self.list_node_types(classification))
+            self.type_cache[key] = frozenset(shading_types)
+        return self.type_cache[key]
+
+    def walk_upstream(self, roots, node_types):
+        """
+        Every shading node upstream of roots, in dependency order: a node comes after the nodes it reads
+        from. The walk is breadth first with one listConnections per level and a visited set, a network
+        shared by many materials is expanded once. node_types maps node names to types, e.g.
+        SceneInventory.types, nodes of other types end the walk.
+        """
+        shading_types = self.shading_node_types()
+        upstream = dict((node, []) for node in roots)
+        frontier = list(upstream)
+        while frontier:
+            pairs = self.backend.listConnections(frontier, source=True, destination=False, connections=True,
+                                         skipConversionNodes=True) or []
+            frontier = []
+            for i in range(0, len(pairs) - 1, 2):
+                node, source = pairs[i].split('.', 1)[0], pairs[i + 1]
+                if node_types.get(source) not in shading_types:
+                    continue
+                sources = upstream.setdefault(node, [])
+                if source not in sources:
+                    sources.append(source)
+                if source not in upstream:
+                    upstream[source] = []
+                    frontier.append(source)
+
+        # iterative depth first post order, cycles are broken where they are met
+        order = []
+        done = set()
+        for root in roots:
+            if root in done:
+                continue
+            done.add(root)
+            stack = [(root, iter(upstream[root]))]
+            while stack:
+                node, sources = stack[-1]
+                for source in sources:
+                    if source not in done:
+                        done.add(source)
+                        stack.append((source, iter(upstream[source])))
+                        break
+                else:
+                    stack.pop()
+                    order.append(node)
+        return order
+
+    def mat_and_tex_from_objects(self, inventory=None):
+        if inventory is None:
+            inventory = self.scene_inventory()
+        return list(inventory.selected_materials), list(inventory.selected_textures)
+
+    def list_materials(self, engine, selected=True, in_render=True, inventory=None):
+        if inventory is None:
+            inventory = self.scene_inventory(selected)
+        if selected:
+            materials, textures = inventory.selected_materials, inventory.selected_textures
         else:
-            if selected:
-                materials, textures = self.mat_and_tex_from_objects()
-            else:
-                materials = cmds.ls(mat=True)
-                textures = cmds.ls(tex=True)
+            materials, textures = inventory.materials, inventory.textures
 
-        default_materials = cmds.ls(dn=True, mat=True)
-        correct_materials = [i for i in materials if i not in default_materials]
-        ignore_textures = cmds.ls(type=['file'])
-        correct_textures = [i for i in textures if i not in ignore_textures]
+        if in_render:
+            materials = inventory.of_types(self.get_type_nodes(engine, 'shader'), materials)
+            textures = inventory.of_types(self.get_type_nodes(engine, 'texture'), textures)
+
+        correct_materials = [i for i in materials if i not in inventory.defaults]
+        correct_textures = [i for i in textures if inventory.types.get(i) != 'file']
 
         return correct_materials, correct_textures
 
-    def list_lights(self, engine, selected=True, in_render=True):
+    def list_lights(self, engine, selected=True, in_render=True, inventory=None):
         if in_render:
             light_types = self.get_type_nodes(engine, 'light')
         else:
-            light_types = cmds.listNodeTypes('light')
+            light_types = list(self.list_node_types('light'))
 
-        if light_types:
-            if selected:
-                selection = cmds.ls(sl=True)
-                selection_shapes = self.get_shapes_from_objects(selection)
-                light_shape_names = cmds.ls(selection_shapes, type=light_types)
-            else:
-                light_shape_names = cmds.ls(type=light_types)
-        else:
-            light_shape_names = []
-        return light_shape_names
+        if inventory is None:
+            inventory = self.scene_inventory(selected)
+        if selected:
+            return inventory.of_types(light_types, inventory.selected_shapes)
+        return inventory.of_types(light_types)
 
-    def list_utilities(self, engine, selected=True, in_render=True):
+    def list_utilities(self, engine, selected=True, in_render=True, inventory=None):
         if in_render:
             type_list = self.get_type_nodes(engine, 'utility')  # only from specific render engine
         else:
-            type_list = cmds.listNodeTypes('utility')  # all utilities
+            type_list = self.list_node_types('utility')  # all utilities
 
-        if selected:
-            selection = cmds.ls(sl=True)
-            utilities = cmds.ls(selection, type=type_list)
-        else:
-            utilities = cmds.ls(type=type_list)
+        # maya software utilities are never converted, drop their types instead of their nodes
+        exclude_software = frozenset(self.get_type_nodes('mayaSoftware', 'utility'))
+        type_list = [node_type for node_type in type_list if node_type not in exclude_software]
 
-        exclude_software = self.get_type_nodes('mayaSoftware', 'utility')
-        ignore_utilities = cmds.ls(type=exclude_software)
-        correct_utilities = [i for i in utilities if i not in ignore_utilities]
-
-        return correct_utilities
+        if inventory is None:
+            inventory = self.scene_inventory(selected)
+        if selected:
+            network = frozenset(inventory.selected_network)
+            selected_nodes = inventory.selected_network + [i for i in inventory.selection if i not in network]
+            return inventory.of_types(type_list, selected_nodes)
+        return inventory.of_types(type_list)
 
     def print_title(self, title):
-        print('\n ################################################ \n')
-        print('\t\t\t' + title)
-        print('\n ################################################ \n')
+        logger.info('\n ################################################ \n')
+        logger.info('\t\t\t' + title)
+        logger.info('\n ################################################ \n')
 
     def convert_scene(self, file_name, lights=True, materials=True, selected=False, in_render=True):
 
-        file_path = script_dir + '/Rules/' + file_name + '.json'
-        data = self.load_json_file(file_path)
+        rules = self.load_rules(Rules.rules_path(file_name))
 
-        source_engine = data['Engines'][0]
-
-        engine_loaded = self.is_target_engine_loaded(data)
+        engine_loaded = self.is_target_engine_loaded(rules)
         if engine_loaded:
 
-            unconverted_nodes = []
-            unconverted_attributes = []
-
-            if materials:
-                scene_materials, scene_textures = self.list_materials(source_engine, selected=selected,
-                                                                      in_render=in_render)
-                self.print_title('Converting Materials:')
-                for material in scene_materials:
-                    print('\n\tMaterial:' + material)
-                    print('****************************\n')
-                    node, attributes = self.replace_node(data, material, 'material')
-                    if node is not None:
-                        unconverted_nodes.append(node)
-                    unconverted_attributes.extend(attributes)
-
-                self.print_title('Converting Textures:')
-                for texture in scene_textures:
-                    print('\n\tTexture:' + texture)
-                    print('****************************\n')
-                    node, attributes = self.replace_node(data, texture, 'texture')
-                    if node is not None:
-                        unconverted_nodes.append(node)
-                    unconverted_attributes.extend(attributes)
-
-            if lights:
-                scene_lights = self.list_lights(source_engine, selected=selected, in_render=in_render)
-                self.print_title('Converting Lights:')
-                for light in scene_lights:
-                    print('\n\tLight:' + light)
-                    print('****************************\n')
-                    node, attributes = self.replace_node(data, light, 'light')
-                    if node is not None:
-                        unconverted_nodes.append(node)
-                    unconverted_attributes.extend(attributes)
-
-            scene_utilities = self.list_utilities(source_engine, selected=selected, in_render=in_render)
-            self.print_title('Converting Utilities:')
-            for utility in scene_utilities:
-                print('\n\tUtility:' + utility)
-                print('****************************\n')
-                node, attributes = self.replace_node(data, utility, 'utility')
-                if node is not None:
-                    unconverted_nodes.append(node)
-                unconverted_attributes.extend(attributes)
-
-            print('\n Nodes failed to be converted:' + str(len(unconverted_nodes)) + '\n')
+            report = Report.ConversionReport(file_name)
+            plan = self.plan_scene(file_name, lights=lights, materials=materials, selected=selected,
+                                   in_render=in_render, report=report)
+            result = self.execute_plan(plan, report)
+            unconverted_nodes = result['unconverted_nodes']
+            unconverted_attributes = result['unconverted_attributes']
+
+            logger.info('\n Nodes converted: %d', len(result['converted_nodes']),
+                        extra={'data': {'event': 'summary', 'converted_nodes': len(result['converted_nodes']),
+                                        'unconverted_nodes': unconverted_nodes,
+                                        'unconverted_attributes': unconverted_attributes,
+                                        'skipped_values': result['skipped_values']}})
+            logger.info('\n Values left at their defaults: %d', result['skipped_values'])
+            logger.info('\n Nodes failed to be converted:' + str(len(unconverted_nodes)) + '\n')
             for node in unconverted_nodes:
-                print('\n\t' + node)
-            print('\n Attributes failed to be connected:' + str(len(unconverted_attributes)) + ' \n')
+                logger.info('\t' + node)
+            logger.info('\n Attributes failed to be connected:' + str(len(unconverted_attributes)) + ' \n')
             for attribute in unconverted_attributes:
-                print('\n\t' + attribute)
+                logger.info('\t' + attribute)
+
+            return result
 
         else:
-            cmds.inViewMessage(amg='In-view message <hl>Target render engine is not loaded</hl>.', pos='midCenter',
-                               fade=True)
+            logger.warning('Target render engine is not loaded: %s', rules.target_engine)
+            self.backend.inViewMessage(amg='In-view message <hl>Target render engine is not loaded</hl>.',
+                                       pos='midCenter', fade=True)
 
     def get_filenames(self, directory):
-        file_list = []
-        for root_paths, _, file_names in os.walk(directory):
-            for f in file_names:
-                if f.endswith('.json'):
-                    file_name = f.strip('.json')
-                    file_list.append(file_name)
-        return file_list
-
-
-def isfloat(value):
-    try:
-        float(value)
-        return True
-    except ValueError:
-        return False
+        return Rules.list_rules(directory)
+
@@ -0,0 +1,359 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Scene access backends of the converter, how node attributes and connections are read and written.
+
+    cmds  maya.cmds and one MEL buffer per flush, the default
+    api   maya.api.OpenMaya, plugs read through MFnDependencyNode and written through MDGModifier
+
+The backend is chosen with ConverterClass(backend='api') or the SCENE_CONVERTER_BACKEND environment
+variable. A backend is anything implementing SceneBackend, e.g. ConverterFake.FakeScene, an in-memory
+scene to run the converter without Maya. ConverterProfile.ProfiledBackend wraps any of them to profile
+the calls made by a conversion.
+"""
+
+import os
+
+import ConverterBuffer as Buffer
+
+try:
+    import maya.api.OpenMaya as om
+    import maya.cmds as cmds
+    import maya.mel as mel
+except ImportError:
+    om = cmds = mel = None
+
+BACKEND_CMDS = 'cmds'
+BACKEND_API = 'api'
+
+# default lists shadingNode connects new nodes to, by category
+default_lists = {'material': 'defaultShaderList1.shaders',
+                 'texture': 'defaultTextureList1.textures',
+                 'utility': 'defaultRenderUtilityList1.utilities'}
+
+
+# the maya.cmds commands a backend implements, with the flags the converter uses
+scene_commands = ('ls', 'nodeType', 'getAttr', 'setAttr', 'connectAttr', 'disconnectAttr', 'createNode',
+                  'shadingNode', 'delete', 'rename', 'parent', 'matchTransform', 'select', 'listConnections',
+                  'listRelatives', 'listNodeTypes', 'pluginInfo', 'renderer', 'attributeQuery', 'attributeInfo',
+                  'inViewMessage', 'about')
+
+
+class SceneBackend(object):
+    """
+    The scene access of the converter: the maya.cmds commands of scene_commands, same names and flags,
+    and the bulk reads and writes of a conversion built on them, which backends may do faster.
+    Plugs are 'node.attribute' strings.
+    """
+    name = None
+    # node type classification cache of the backend, None to share the module cache of Converter
+    type_cache = None
+    # ConverterSchema.SchemaCache of the backend, None to share the schema file of Converter
+    schema = None
+
+    def node_type(self, node):
+        return self.nodeType(node)
+
+    def get_attr(self, plug):
+        """The value as cmds.getAttr returns it, compounds as [(x, y, z)]."""
+        return self.getAttr(plug)
+
+    def get_attributes(self, node, attributes):
+        return dict((attribute, self.get_attr(node + '.' + attribute)) for attribute in attributes)
+
+    def list_connections(self, nodes):
+        """
+        (source plug, destination plug) of every connection to or from the nodes. The unitConversion
+        nodes in between are skipped, Maya deletes them with the converted node.
+        """
+        if not nodes:
+            return []
+        pairs = []
+        incoming = self.listConnections(nodes, connections=True, plugs=True, source=True, destination=False,
+                                        skipConversionNodes=True) or []
+        for i in range(0, len(incoming) - 1, 2):
+            pairs.append((incoming[i + 1], incoming[i]))
+        outgoing = self.listConnections(nodes, connections=True, plugs=True, source=False, destination=True,
+                                        skipConversionNodes=True) or []
+        for i in range(0, len(outgoing) - 1, 2):
+            pairs.append((outgoing[i], outgoing[i + 1]))
+        return pairs
+
+    def create_node(self, node_type, category):
+        if category == 'light':
+            return self.shadingNode(node_type, asLight=True)
+        elif category == 'texture':
+            return self.shadingNode(node_type, asTexture=True)
+        elif category == 'material':
+            return self.shadingNode(node_type, asShader=True)
+        elif category == 'utility':
+            return self.shadingNode(node_type, asUtility=True)
+        else:
+            return self.createNode(node_type, ss=True)
+
+    def command_buffer(self):
+        """A buffer of set_attr/connect_attr calls made on flush(), see ConverterBuffer.MelCommandBuffer."""
+        return Buffer.CallCommandBuffer(self.setAttr, self.connectAttr)
+
+
+def _not_implemented(command):
+    def method(self, *args, **kwargs):
+        raise NotImplementedError('{0} does not implement {1}'.format(type(self).__name__, command))
+    method.__name__ = command
+    return method
+
+
+def _cmds_command(command):
+    def method(self, *args, **kwargs):
+        return getattr(cmds, command)(*args, **kwargs)
+    method.__name__ = command
+    return method
+
+
+for _command in scene_commands:
+    setattr(SceneBackend, _command, _not_implemented(_command))
+
+
+class CmdsBackend(SceneBackend):
+    name = BACKEND_CMDS
+
+    def __init__(self):
+        if cmds is None:
+            raise RuntimeError('maya.cmds is not available, give the converter another scene backend')
+
+    def command_buffer(self):
+        return Buffer.MelCommandBuffer(mel.eval, set_attr=cmds.setAttr, connect_attr=cmds.connectAttr)
+
+
+for _command in scene_commands:
+    setattr(CmdsBackend, _command, _cmds_command(_command))
+
+
+def depend_node(node):
+    selection = om.MSelectionList()
+    selection.add(node)
+    return selection.getDependNode(0)
+
+
+def find_plug(plug):
+    selection = om.MSelectionList()
+    selection.add(plug)
+    return selection.getPlug(0)
+
+
+def plug_name(plug):
+    return plug.partialName(includeNodeName=True, useLongNames=True)
+
+
+def plug_value(plug):
+    """Reads a plug the way cmds.getAttr would, None for data the plan can not write back (arrays, meshes...)."""
+    if plug.isArray:
+        return None
+    if plug.isCompound:
+        values = tuple(plug_value(plug.child(i)) for i in range(plug.numChildren()))
+        if any(value is None or isinstance(value, (list, tuple)) for value in values):
+            return None
+        return [values]
+    attribute = plug.attribute()
+    if attribute.hasFn(om.MFn.kNumericAttribute):
+        numeric_type = om.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == om.MFnNumericData.kBoolean:
+            return plug.asBool()
+        if numeric_type in (om.MFnNumericData.kFloat, om.MFnNumericData.kDouble):
+            return plug.asDouble()
+        return plug.asInt()
+    if attribute.hasFn(om.MFn.kEnumAttribute):
+        return plug.asInt()
+    if attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kDistance:
+            return plug.asMDistance().asUnits(om.MDistance.uiUnit())
+        if unit_type == om.MFnUnitAttribute.kAngle:
+            return plug.asMAngle().asUnits(om.MAngle.uiUnit())
+        if unit_type == om.MFnUnitAttribute.kTime:
+            return plug.asMTime().asUnits(om.MTime.uiUnit())
+        return plug.asDouble()
+    if attribute.hasFn(om.MFn.kTypedAttribute):
+        if om.MFnTypedAttribute(attribute).attrType() == om.MFnData.kString:
+            return plug.asString()
+    return None
+
+
+def set_plug_value(modifier, plug, value):
+    if isinstance(value, (list, tuple)):
+        for i, child_value in enumerate(value):
+            set_plug_value(modifier, plug.child(i), child_value)
+        return
+    attribute = plug.attribute()
+    if isinstance(value, Buffer.string_types):
+        modifier.newPlugValueString(plug, value)
+    elif attribute.hasFn(om.MFn.kUnitAttribute):
+        unit_type = om.MFnUnitAttribute(attribute).unitType()
+        if unit_type == om.MFnUnitAttribute.kDistance:
+            modifier.newPlugValueMDistance(plug, om.MDistance(value, om.MDistance.uiUnit()))
+        elif unit_type == om.MFnUnitAttribute.kAngle:
+            modifier.newPlugValueMAngle(plug, om.MAngle(value, om.MAngle.uiUnit()))
+        elif unit_type == om.MFnUnitAttribute.kTime:
+            modifier.newPlugValueMTime(plug, om.MTime(value, om.MTime.uiUnit()))
+        else:
+            modifier.newPlugValueDouble(plug, value)
+    elif isinstance(value, bool):
+        modifier.newPlugValueBool(plug, value)
+    elif attribute.hasFn(om.MFn.kEnumAttribute):
+        modifier.newPlugValueInt(plug, int(value))
+    elif attribute.hasFn(om.MFn.kNumericAttribute):
+        numeric_type = om.MFnNumericAttribute(attribute).numericType()
+        if numeric_type == om.MFnNumericData.kBoolean:
+            modifier.newPlugValueBool(plug, bool(value))
+        elif numeric_type in (om.MFnNumericData.kFloat, om.MFnNumericData.kDouble):
+            modifier.newPlugValueDouble(plug, float(value))
+        else:
+            modifier.newPlugValueInt(plug, int(value))
+    else:
+        modifier.newPlugValueDouble(plug, float(value))
+
+
+class ModifierCommandBuffer(object):
+    """
+    The MelCommandBuffer interface over one MDGModifier. When the modifier fails as a whole it is undone
+    and the operations are redone one modifier each, to find the ones that fail.
+    """
+
+    def __init__(self, limit=2000):
+        self.limit = limit
+        self.operations = []
+        self.tags = []
+
+    def __len__(self):
+        return len(self.operations)
+
+    def is_full(self):
+        return len(self.operations) >= self.limit
+
+    def set_attr(self, plug, value, value_type=None, tag=None):
+        self.operations.append(('set', plug, value))
+        self.tags.append(tag)
+
+    def connect_attr(self, source, destination, tag=None):
+        self.operations.append(('connect', source, destination))
+        self.tags.append(tag)
+
+    def add_operation(self, modifier, operation, sources):
+        """
+        Queues one operation in modifier. sources maps the destinations connected in the modifier to
+        their queued source, the scene still shows the source they had before doIt.
+        """
+        kind, plug, value = operation
+        if kind == 'set':
+            set_plug_value(modifier, find_plug(plug), value)
+        else:
+            destination = find_plug(value)
+            key = plug_name(destination)
+            if key in sources:
+                modifier.disconnect(sources[key], destination)
+            elif destination.isDestination:
+                modifier.disconnect(destination.source(), destination)
+            source = find_plug(plug)
+            modifier.connect(source, destination)
+            sources[key] = source
+
+    def flush(self):
+        if not self.operations:
+            return []
+        errors = [None] * len(self.operations)
+        modifier = om.MDGModifier()
+        sources = {}
+        for i, operation in enumerate(self.operations):
+            try:
+                self.add_operation(modifier, operation, sources)
+            except Exception as error:
+                errors[i] = str(error)
+        try:
+            modifier.doIt()
+        except Exception:
+            modifier.undoIt()
+            for i, operation in enumerate(self.operations):
+                if errors[i] is not None:
+                    continue
+                single = om.MDGModifier()
+                try:
+                    self.add_operation(single, operation, {})
+                    single.doIt()
+                except Exception as error:
+                    errors[i] = str(error)
+        result = list(zip(self.tags, errors))
+        self.operations = []
+        self.tags = []
+        return result
+
+
+class ApiBackend(CmdsBackend):
+    """Reads and writes through maya.api.OpenMaya, what the API has no equivalent for stays on cmds."""
+    name = BACKEND_API
+
+    def node_type(self, node):
+        return om.MFnDependencyNode(depend_node(node)).typeName
+
+    def get_attr(self, plug):
+        return plug_value(find_plug(plug))
+
+    def get_attributes(self, node, attributes):
+        node_fn = om.MFnDependencyNode(depend_node(node))
+        return dict((attribute, plug_value(node_fn.findPlug(attribute, False))) for attribute in attributes)
+
+    def list_connections(self, nodes):
+        pairs = []
+        for node in nodes:
+            # source() and destinations() skip the unitConversion nodes, like skipConversionNodes
+            for plug in om.MFnDependencyNode(depend_node(node)).getConnections():
+                name = plug_name(plug)
+                if plug.isDestination:
+                    pairs.append((plug_name(plug.source()), name))
+                for destination in plug.destinations():
+                    pairs.append((name, plug_name(destination)))
+        return pairs
+
+    def create_node(self, node_type, category):
+        if category not in default_lists:
+            # lights need their transform, light sets and links, shadingNode does it all
+            return super(ApiBackend, self).create_node(node_type, category)
+        modifier = om.MDGModifier()
+        node = modifier.createNode(node_type)
+        modifier.doIt()
+        name = om.MFnDependencyNode(node).name()
+        modifier.connect(find_plug(name + '.message'), next_available(default_lists[category]))
+        modifier.doIt()
+        return name
+
+    def command_buffer(self):
+        return ModifierCommandBuffer()
+
+
+def next_available(array_plug):
+    plug = find_plug(array_plug)
+    indices = plug.getExistingArrayAttributeIndices()
+    return plug.elementByLogicalIndex(max(indices) + 1 if indices else 0)
+
+
+backends = {BACKEND_CMDS: CmdsBackend, BACKEND_API: ApiBackend}
+
+
+def create_backend(name=None):
+    """A backend by name, SCENE_CONVERTER_BACKEND or cmds by default. Backend instances are returned as is."""
+    if isinstance(name, SceneBackend):
+        return name
+    name = name or os.environ.get('SCENE_CONVERTER_BACKEND') or BACKEND_CMDS
+    if name not in backends:
+        raise ValueError('Unknown scene backend: {0}, expected one of {1}'.format(name, sorted(backends)))
+    return backends[name]()
@@ -0,0 +1,260 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Converts many scene files in parallel over a process pool.
+
+    python ConverterBatch.py vray_To_arnold "shots/*/*.ma" --output-dir converted --workers 16
+    mayapy ConverterBatch.py vray_To_arnold "shots/*/*.mb" --mode maya --output-dir converted
+
+The offline mode rewrites .ma files without Maya, other files fail without being read. The maya
+mode opens every scene in a maya.standalone session per worker and runs ConverterClass.convert_scene
+on it.
+"""
+
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import ConverterOffline as Offline
+import ConverterRules as Rules
+
+try:
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+except ImportError:
+    # the Python 2 mayapy of Maya 2020 and older, see run_jobs
+    ProcessPoolExecutor = as_completed = None
+
+MODE_OFFLINE = 'offline'
+MODE_MAYA = 'maya'
+
+maya_file_types = {'.ma': 'mayaAscii', '.mb': 'mayaBinary'}
+
+# set once per maya worker process
+_maya_initialized = False
+
+
+def collect_files(patterns):
+    """Expands a list of paths and glob patterns into a sorted list of unique files."""
+    if isinstance(patterns, str):
+        patterns = [patterns]
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        files.update(os.path.abspath(f) for f in matches if os.path.isfile(f))
+    return sorted(files)
+
+
+def common_directory(files):
+    """The deepest folder holding all the files."""
+    return os.path.dirname(os.path.commonprefix(files)) if files else ''
+
+
+def output_path(in_path, output_dir=None, suffix='_converted', root=None):
+    """
+    The converted file next to the source with the suffix, or in output_dir under the same path
+    relative to root as the source, so files of the same name in different folders do not collide.
+    """
+    directory, file_name = os.path.split(in_path)
+    if output_dir:
+        return os.path.join(output_dir, os.path.relpath(in_path, root) if root else file_name)
+    name, extension = os.path.splitext(file_name)
+    return os.path.join(directory, name + suffix + extension)
+
+
+def new_record(in_path, out_path):
+    return {'file': in_path, 'output': out_path, 'converted_nodes': [], 'unconverted_nodes': [],
+            'unconverted_attributes': [], 'skipped_values': 0, 'seconds': 0.0, 'error': None}
+
+
+def offline_error(in_path):
+    """Why the offline mode can not convert the file, None when it can."""
+    extension = os.path.splitext(in_path)[1].lower()
+    if extension != '.ma':
+        return 'Only Maya ASCII (.ma) files convert offline, use the maya mode for: ' + (extension or 'no extension')
+    return None
+
+
+def convert_offline(job):
+    in_path, out_path, rules_name, aliases_path = job
+    record = new_record(in_path, out_path)
+    record['error'] = offline_error(in_path)
+    if record['error']:
+        return record
+    start = time.time()
+    try:
+        result = Offline.convert_file(rules_name, in_path, out_path, aliases_path)
+        for key in ('converted_nodes', 'unconverted_nodes', 'unconverted_attributes', 'skipped_values'):
+            record[key] = result[key]
+        if result['missing_aliases']:
+            record['error'] = 'No attribute aliases for: ' + ', '.join(result['missing_aliases'])
+    except Exception:
+        record['error'] = traceback.format_exc()
+    record['seconds'] = time.time() - start
+    return record
+
+
+def initialize_maya(rules):
+    global _maya_initialized
+    import maya.standalone
+    import maya.cmds as cmds
+    if not _maya_initialized:
+        maya.standalone.initialize(name='python')
+        _maya_initialized = True
+    for engine in rules.engines:
+        plugin = Rules.render_engines_dic.get(engine)
+        if plugin is not None and not cmds.pluginInfo(plugin, query=True, loaded=True):
+            cmds.loadPlugin(plugin, quiet=True)
+    return cmds
+
+
+def convert_maya(job):
+    in_path, out_path, rules_name, aliases_path = job
+    record = new_record(in_path, out_path)
+    start = time.time()
+    try:
+        rules = Rules.load_rules(Rules.rules_path(rules_name))
+        cmds = initialize_maya(rules)
+        import Converter
+
+        cmds.file(in_path, open=True, force=True)
+        result = Converter.ConverterClass().convert_scene(rules_name, selected=False)
+        if result is None:
+            raise RuntimeError('Target render engine is not loaded: ' + rules.target_engine)
+        for key in ('converted_nodes', 'unconverted_nodes', 'unconverted_attributes', 'skipped_values'):
+            record[key] = result[key]
+        cmds.file(rename=out_path)
+        file_type = maya_file_types.get(os.path.splitext(out_path)[1].lower(), 'mayaAscii')
+        cmds.file(save=True, type=file_type, force=True)
+    except Exception:
+        record['error'] = traceback.format_exc()
+    record['seconds'] = time.time() - start
+    return record
+
+
+def run_jobs(worker, jobs, workers=None):
+    """
+    Runs the jobs over a process pool and yields (source file, record, error) as they are done, error is the
+    traceback of a worker process that died, e.g. of a crash inside Maya, and record is None then.
+    """
+    if ProcessPoolExecutor is not None:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = dict((executor.submit(worker, job), job[0]) for job in jobs)
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception:
+                    yield futures[future], None, traceback.format_exc()
+        return
+    # multiprocessing.Pool gives the results in submission order, and waits for ever on a dead worker
+    pool = multiprocessing.Pool(workers)
+    try:
+        results = [(pool.apply_async(worker, (job,)), job[0]) for job in jobs]
+        for result, in_path in results:
+            try:
+                yield in_path, result.get(), None
+            except Exception:
+                yield in_path, None, traceback.format_exc()
+    finally:
+        pool.close()
+        pool.join()
+
+
+def convert_files(files, rules_name, output_dir=None, suffix='_converted', mode=MODE_OFFLINE, workers=None,
+                  aliases_path=None, callback=None):
+    """
+    Converts every file over a process pool and returns one result record per file, in input order.
+    callback is called with every record as soon as its file is done.
+    """
+    files = collect_files(files)
+    root = common_directory(files)
+    if output_dir:
+        output_dir = os.path.abspath(output_dir)
+    worker = convert_maya if mode == MODE_MAYA else convert_offline
+    jobs = [(f, output_path(f, output_dir, suffix, root), rules_name, aliases_path) for f in files]
+    # the workers run in parallel, two jobs writing one file would overwrite each other
+    outputs = {}
+    for in_path, out_path, _, _ in jobs:
+        if out_path in outputs or out_path in files:
+            raise ValueError('{0} would overwrite {1}'.format(in_path, outputs.get(out_path, out_path)))
+        outputs[out_path] = in_path
+    for out_path in outputs:
+        if not os.path.isdir(os.path.dirname(out_path)):
+            os.makedirs(os.path.dirname(out_path))
+
+    records = {}
+    if mode != MODE_MAYA:
+        # failed right away rather than parsed as text
+        for job in [job for job in jobs if offline_error(job[0])]:
+            jobs.remove(job)
+            records[job[0]] = convert_offline(job)
+            if callback is not None:
+                callback(records[job[0]])
+    for in_path, record, error in run_jobs(worker, jobs, workers):
+        if record is None:
+            record = new_record(in_path, output_path(in_path, output_dir, suffix, root))
+            record['error'] = error
+        records[in_path] = record
+        if callback is not None:
+            callback(record)
+    return [records[f] for f in files]
+
+
+def summary(records):
+    return {'files': len(records),
+            'failed_files': len([r for r in records if r['error']]),
+            'converted_nodes': sum(len(r['converted_nodes']) for r in records),
+            'unconverted_nodes': sum(len(r['unconverted_nodes']) for r in records),
+            'unconverted_attributes': sum(len(r['unconverted_attributes']) for r in records),
+            'skipped_values': sum(r['skipped_values'] for r in records),
+            'seconds': sum(r['seconds'] for r in records)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert many scene files with a rules file in parallel.')
+    parser.add_argument('rules', help='rules file name from the Rules folder or a path to a rules file')
+    parser.add_argument('files', nargs='+', help='scene files or glob patterns')
+    parser.add_argument('--output-dir', help='folder of the converted files, keeping their folders relative to the '
+                                             'common folder of the sources, next to the sources by default')
+    parser.add_argument('--suffix', default='_converted', help='file name suffix when no output folder is given')
+    parser.add_argument('--mode', choices=[MODE_OFFLINE, MODE_MAYA], default=MODE_OFFLINE)
+    parser.add_argument('--workers', type=int, help='number of worker processes, one per cpu by default')
+    parser.add_argument('--aliases', help='json file of short to long attribute names, offline mode only')
+    parser.add_argument('--report', help='write every result record to this json file')
+    args = parser.parse_args(argv)
+
+    def progress(record):
+        state = 'FAILED' if record['error'] else 'ok'
+        print('{0} {1} ({2:.2f}s)'.format(state, record['file'], record['seconds']))
+
+    try:
+        records = convert_files(args.files, args.rules, output_dir=args.output_dir, suffix=args.suffix,
+                                mode=args.mode, workers=args.workers, aliases_path=args.aliases, callback=progress)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.report:
+        with open(args.report, 'w') as report_file:
+            json.dump({'summary': summary(records), 'files': records}, report_file, indent=4, sort_keys=True)
+    print(json.dumps(summary(records), indent=4, sort_keys=True))
+    return 1 if any(r['error'] for r in records) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
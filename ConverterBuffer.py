@@ -0,0 +1,144 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Command buffers: the setAttr and connectAttr of many nodes queued and sent to Maya in one call.
+Every operation is wrapped in its own catchQuiet, the indices of the failed ones come back from
+the flush and are given back as the tags they were queued with, with the error of each failure.
+catchQuiet only tells that a command failed, the failed commands are run again one by one through
+the set_attr/connect_attr functions given to the buffer to get their error.
+This module must not import maya, the MEL is evaluated by the function given to the buffer.
+CallCommandBuffer keeps the interface for backends without MEL, e.g. ConverterFake.FakeScene.
+"""
+
+try:
+    string_types = basestring  # Python 2.7
+except NameError:
+    string_types = str
+
+PROCEDURE = 'sceneConverterFlush'
+
+
+def mel_string(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+def mel_value(value):
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, float):
+        return repr(value)
+    if isinstance(value, string_types):
+        return mel_string(value)
+    return str(value)
+
+
+class MelCommandBuffer(object):
+
+    def __init__(self, evaluate, limit=2000, set_attr=None, connect_attr=None):
+        """
+        evaluate runs a MEL string and returns its result, maya.mel.eval in Maya. set_attr and
+        connect_attr, cmds.setAttr and cmds.connectAttr in Maya, run the failed commands again.
+        """
+        self.evaluate = evaluate
+        self.limit = limit
+        self.set_function = set_attr
+        self.connect_function = connect_attr
+        # (kind, plug, value, setAttr type)
+        self.commands = []
+        self.tags = []
+
+    def __len__(self):
+        return len(self.commands)
+
+    def is_full(self):
+        return len(self.commands) >= self.limit
+
+    def set_attr(self, plug, value, value_type=None, tag=None):
+        self.commands.append(('set', plug, value, value_type))
+        self.tags.append(tag)
+
+    def connect_attr(self, source, destination, tag=None):
+        self.commands.append(('connect', source, destination, None))
+        self.tags.append(tag)
+
+    def mel(self, command):
+        kind, plug, value, value_type = command
+        if kind == 'connect':
+            return 'connectAttr -f {0} {1}'.format(mel_string(plug), mel_string(value))
+        if isinstance(value, (list, tuple)):
+            values = ' '.join(mel_value(v) for v in value)
+        else:
+            values = mel_value(value)
+        type_flag = '-type {0} '.format(mel_string(value_type)) if value_type else ''
+        return 'setAttr {0}{1} {2}'.format(type_flag, mel_string(plug), values)
+
+    def code(self):
+        lines = ['global proc int[] {0}()'.format(PROCEDURE), '{', '    int $failed[];']
+        for i, command in enumerate(self.commands):
+            lines.append('    if (catchQuiet(`{0}`)) $failed[size($failed)] = {1};'.format(self.mel(command), i))
+        lines.extend(['    return $failed;', '}', PROCEDURE + '();'])
+        return '\n'.join(lines)
+
+    def run(self, command):
+        kind, plug, value, value_type = command
+        if kind == 'connect':
+            self.connect_function(plug, value, f=True)
+        elif isinstance(value, (list, tuple)):
+            self.set_function(plug, *value, type=value_type)
+        elif value_type is not None:
+            self.set_function(plug, value, type=value_type)
+        else:
+            self.set_function(plug, value)
+
+    def error(self, command):
+        """The error of a command, None when it runs."""
+        try:
+            self.run(command)
+        except Exception as error:
+            return str(error).strip() or type(error).__name__
+        return None
+
+    def flush(self):
+        """
+        Runs every queued command in one evaluation, returns [(tag, error)] in queue order, the error
+        being None for the commands that succeeded.
+        """
+        if not self.commands:
+            return []
+        failed = set(self.evaluate(self.code()) or [])
+        result = []
+        for i, (command, tag) in enumerate(zip(self.commands, self.tags)):
+            if i not in failed:
+                result.append((tag, None))
+            elif self.set_function is None:
+                result.append((tag, 'failed in ' + PROCEDURE))
+            else:
+                # run again on its own for its error, it may also succeed now e.g. after an earlier failure
+                result.append((tag, self.error(command)))
+        self.commands = []
+        self.tags = []
+        return result
+
+
+class CallCommandBuffer(MelCommandBuffer):
+    """The same buffer calling setAttr/connectAttr functions one by one on flush, for backends without MEL."""
+
+    def __init__(self, set_attr, connect_attr, limit=2000):
+        super(CallCommandBuffer, self).__init__(None, limit, set_attr, connect_attr)
+
+    def flush(self):
+        result = [(tag, self.error(command)) for command, tag in zip(self.commands, self.tags)]
+        self.commands = []
+        self.tags = []
+        return result
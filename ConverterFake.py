@@ -0,0 +1,788 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+An in-memory dependency graph implementing ConverterBackend.SceneBackend, to run ConverterClass
+without Maya in tests and benchmarks.
+
+    scene = ConverterFake.load_maya_ascii('scene.ma', aliases=ConverterOffline.load_aliases('aliases.json'))
+    scene = ConverterFake.generate_scene(rules, materials=1000)
+    ConverterClass(backend=scene).convert_scene('vray_To_arnold', selected=False)
+
+Only what the converter uses is modelled: node types with their classification, plugin and
+attributes, values, connections, parenting, default nodes, the selection and loaded plugins.
+Node types without declared attributes accept any attribute, e.g. the types read from a .ma file.
+This module must not import maya.
+"""
+
+import random
+from collections import OrderedDict
+
+import ConverterBackend as Backend
+import ConverterOffline as Offline
+import ConverterRules as Rules
+import ConverterSchema as Schema
+
+try:
+    string_types = basestring  # Python 2.7
+except NameError:
+    string_types = str
+
+BACKEND_FAKE = 'fake'
+
+default_values = {'bool': False, 'long': 0, 'short': 0, 'byte': 0, 'enum': 0, 'float': 0.0, 'double': 0.0,
+                  'doubleLinear': 0.0, 'doubleAngle': 0.0, 'string': '', 'typed': None, 'message': None}
+
+# classification and common attributes of the maya types of a new scene: {type: (classification, attributes)}
+maya_node_types = {
+    'transform': ('', {'translate': 'double3', 'rotate': 'double3', 'scale': 'double3', 'visibility': 'bool'}),
+    'mesh': ('shape', {}),
+    'shadingEngine': ('', {'surfaceShader': 'float3', 'volumeShader': 'float3', 'displacementShader': 'float3',
+                           'dagSetMembers': 'message'}),
+    'renderGlobals': ('', {'currentRenderer': 'string'}),
+    'lambert': ('shader/surface', {'color': 'float3', 'transparency': 'float3', 'diffuse': 'float',
+                                   'outColor': 'float3'}),
+    'blinn': ('shader/surface', {'color': 'float3', 'transparency': 'float3', 'diffuse': 'float',
+                                 'eccentricity': 'float', 'outColor': 'float3'}),
+    'phong': ('shader/surface', {'color': 'float3', 'transparency': 'float3', 'diffuse': 'float',
+                                 'cosinePower': 'float', 'outColor': 'float3'}),
+    'file': ('texture/2d', {'fileTextureName': 'string', 'outColor': 'float3', 'outAlpha': 'float'}),
+    'ramp': ('texture/2d', {'outColor': 'float3', 'outAlpha': 'float'}),
+    'checker': ('texture/2d', {'color1': 'float3', 'color2': 'float3', 'outColor': 'float3', 'outAlpha': 'float'}),
+    'place2dTexture': ('utility/general', {'outUV': 'float2'}),
+    'reverse': ('utility/general', {'input': 'float3', 'output': 'float3'}),
+    'multiplyDivide': ('utility/general', {'input1': 'float3', 'input2': 'float3', 'operation': 'enum',
+                                           'output': 'float3'}),
+    'pointLight': ('light', {'color': 'float3', 'intensity': 'float'}),
+    'spotLight': ('light', {'color': 'float3', 'intensity': 'float', 'coneAngle': 'doubleAngle'}),
+    'directionalLight': ('light', {'color': 'float3', 'intensity': 'float'}),
+    'ambientLight': ('light', {'color': 'float3', 'intensity': 'float'}),
+    'areaLight': ('light', {'color': 'float3', 'intensity': 'float'}),
+    'volumeLight': ('light', {'color': 'float3', 'intensity': 'float'}),
+}
+
+# short names maya saves these attributes with
+maya_short_names = {'message': 'msg', 'outColor': 'oc', 'outAlpha': 'oa', 'color': 'c', 'transparency': 'it',
+                    'diffuse': 'dc', 'eccentricity': 'ec', 'cosinePower': 'cp', 'fileTextureName': 'ftn',
+                    'surfaceShader': 'ss', 'volumeShader': 'vs', 'displacementShader': 'ds',
+                    'dagSetMembers': 'dsm', 'currentRenderer': 'ren', 'intensity': 'in', 'input': 'i',
+                    'output': 'o', 'input1': 'i1', 'input2': 'i2', 'operation': 'op', 'outUV': 'uv'}
+
+default_node_names = [('lambert1', 'lambert'), ('particleCloud1', 'lambert'),
+                      ('initialShadingGroup', 'shadingEngine'), ('defaultRenderGlobals', 'renderGlobals')]
+
+
+def compound_children(name, attr_type):
+    """Children names maya gives to compounds: RGB for colors, XYZ otherwise."""
+    size = int(attr_type[-1])
+    suffixes = 'RGB' if 'olor' in name or name in ('transparency', 'incandescence') else 'XYZ'
+    return [name + suffix for suffix in suffixes[:size]]
+
+
+def guess_classification(node_type):
+    """Classification of a node type from its name, for types generated from rules files."""
+    lowered = node_type.lower()
+    if ('light' in lowered or 'sun' in lowered) and not lowered.endswith('mtl'):
+        return 'light'
+    if lowered.endswith(('mtl', 'material', 'shader', 'surface', 'hair', 'toon', 'paint', 'flat')) or \
+            lowered in ('lambert', 'blinn', 'phong', 'phonge', 'anisotropic', 'ailambert'):
+        return 'shader/surface'
+    if any(word in lowered for word in ('tex', 'noise', 'ramp', 'checker', 'file', 'image', 'curvature', 'dirt',
+                                         'edges', 'sky', 'triplanar', 'occlusion', 'wireframe', 'fractal')):
+        return 'texture/2d'
+    return 'utility/general'
+
+
+class FakeAttribute(object):
+    __slots__ = ('name', 'attr_type', 'short_name', 'default', 'children', 'parent', 'enum')
+
+    def __init__(self, name, attr_type, short_name=None, default=None, children=(), parent=None, enum=None):
+        self.name = name
+        self.attr_type = attr_type
+        self.short_name = short_name or name
+        self.default = default_values.get(attr_type) if default is None else default
+        self.children = list(children)
+        self.parent = parent
+        self.enum = enum
+
+    @property
+    def message(self):
+        return self.attr_type == 'message'
+
+
+class FakeNodeType(object):
+
+    def __init__(self, name, classification='', plugin=None):
+        self.name = name
+        self.classification = classification
+        self.plugin = plugin
+        self.attributes = OrderedDict()
+        self.short_names = {}
+
+    @property
+    def strict(self):
+        """Types with declared attributes, besides message, reject the others like maya does."""
+        return len(self.attributes) > 1
+
+    def add_attribute(self, name, attr_type, short_name=None, default=None, enum=None):
+        if name in self.attributes:
+            return self.attributes[name]
+        children = []
+        if attr_type in Rules.compound_types:
+            children = compound_children(name, attr_type)
+            child_type = attr_type[:-1]
+            for child in children:
+                self.attributes[child] = FakeAttribute(child, child_type, parent=name)
+                self.short_names[child] = child
+        attribute = FakeAttribute(name, attr_type, short_name, default, children, enum=enum)
+        self.attributes[name] = attribute
+        self.short_names[attribute.short_name] = name
+        return attribute
+
+    def resolve(self, attribute):
+        """Long name of an attribute given by its long or short name, None when the type has no such attribute."""
+        if attribute in self.attributes:
+            return attribute
+        name = self.short_names.get(attribute)
+        if name is not None:
+            return name
+        if not self.strict:
+            return attribute
+        return None
+
+    def attribute(self, name):
+        name = self.resolve(name)
+        if name is None:
+            return None
+        return self.attributes.get(name) or FakeAttribute(name, 'message' if name in ('message', 'msg') else 'float')
+
+
+class FakeNode(object):
+    __slots__ = ('name', 'node_type', 'values', 'inputs', 'outputs', 'parent', 'children')
+
+    def __init__(self, name, node_type):
+        self.name = name
+        self.node_type = node_type
+        self.values = {}
+        # attribute: (source node, source attribute)
+        self.inputs = OrderedDict()
+        # attribute: [(destination node, destination attribute)]
+        self.outputs = OrderedDict()
+        self.parent = None
+        self.children = []
+
+
+def flag(flags, long_name, short_name=None, default=None):
+    if long_name in flags:
+        return flags[long_name]
+    if short_name is not None and short_name in flags:
+        return flags[short_name]
+    return default
+
+
+def as_list(items):
+    if items is None:
+        return []
+    if isinstance(items, string_types):
+        return [items]
+    return list(items)
+
+
+def split_attribute(attribute):
+    """'input[2]' -> ('input', '[2]'), 'color.colorR' -> ('colorR', '')"""
+    attribute = attribute.rsplit('.', 1)[-1]
+    index = attribute.find('[')
+    if index < 0:
+        return attribute, ''
+    return attribute[:index], attribute[index:]
+
+
+class FakeScene(Backend.SceneBackend):
+    name = BACKEND_FAKE
+
+    def __init__(self, maya_version='2020'):
+        self.type_cache = {}
+        self.schema = Schema.SchemaCache()
+        self.maya_version = maya_version
+        self.node_types = {}
+        self.nodes = OrderedDict()
+        self.defaults = set()
+        self.selection = []
+        # plugin: [node types]
+        self.plugins = OrderedDict()
+        self.renderers = ['mayaSoftware']
+        for node_type, (classification, attributes) in maya_node_types.items():
+            self.register_type(node_type, classification, attributes=attributes)
+        for name, node_type in default_node_names:
+            self.createNode(node_type, name=name)
+            self.defaults.add(name)
+        self.setAttr('defaultRenderGlobals.currentRenderer', 'mayaSoftware', type='string')
+
+    def __repr__(self):
+        return 'FakeScene({0} nodes, {1} types)'.format(len(self.nodes), len(self.node_types))
+
+    # scene building ##################################
+
+    def register_type(self, name, classification='', plugin=None, attributes=None):
+        """Declares a node type, attributes maps long names to attribute types. Returns the FakeNodeType."""
+        node_type = self.node_types.get(name)
+        if node_type is None:
+            node_type = FakeNodeType(name, classification, plugin)
+            node_type.add_attribute('message', 'message', 'msg')
+            self.node_types[name] = node_type
+        else:
+            node_type.classification = node_type.classification or classification
+            node_type.plugin = node_type.plugin or plugin
+        for attribute, attr_type in (attributes or {}).items():
+            node_type.add_attribute(attribute, attr_type or 'float', maya_short_names.get(attribute))
+        if plugin is not None:
+            types = self.plugins.setdefault(plugin, [])
+            if name not in types:
+                types.append(name)
+        self.type_cache.clear()
+        self.schema.clear()
+        return node_type
+
+    def load_plugin(self, plugin, engine=None):
+        self.plugins.setdefault(plugin, [])
+        if engine is not None and engine not in self.renderers:
+            self.renderers.append(engine)
+        self.type_cache.clear()
+
+    def set_current_renderer(self, engine):
+        self.setAttr('defaultRenderGlobals.currentRenderer', engine, type='string')
+
+    # lookups ##################################
+
+    def node(self, name):
+        node = self.nodes.get(name)
+        if node is None:
+            node = self.nodes.get(Offline.short_node_name(name))
+        if node is None:
+            raise ValueError('No object matches name: ' + name)
+        return node
+
+    def plug(self, plug):
+        """(node, attribute long name with its index, FakeAttribute) of a plug."""
+        node_name, _, attribute = plug.partition('.')
+        node = self.node(node_name)
+        name, index = split_attribute(attribute)
+        spec = self.node_types[node.node_type].attribute(name)
+        if spec is None and node.node_type == 'transform' and node.children:
+            # like maya, the attributes of a shape can be given on its transform
+            node = node.children[0]
+            spec = self.node_types[node.node_type].attribute(name)
+        if spec is None:
+            raise ValueError('No object matches name: ' + plug)
+        return node, spec.name + index, spec
+
+    def path(self, node):
+        names = []
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return '|' + '|'.join(reversed(names))
+
+    def unique_name(self, name):
+        if name not in self.nodes:
+            return name
+        base = name.rstrip('0123456789')
+        number = int(name[len(base):] or 0) + 1
+        while base + str(number) in self.nodes:
+            number += 1
+        return base + str(number)
+
+    # maya.cmds ##################################
+
+    def ls(self, *args, **flags):
+        if args:
+            nodes = []
+            for name in as_list(args[0]):
+                try:
+                    nodes.append(self.node(name))
+                except ValueError:
+                    continue
+        elif flag(flags, 'selection', 'sl'):
+            nodes = [self.nodes[name] for name in self.selection if name in self.nodes]
+        else:
+            nodes = list(self.nodes.values())
+        if flag(flags, 'selection', 'sl') and args:
+            selected = set(self.selection)
+            nodes = [node for node in nodes if node.name in selected]
+        types = flag(flags, 'type', 'typ')
+        if types is not None:
+            types = set(as_list(types))
+            nodes = [node for node in nodes if node.node_type in types]
+        for long_name, short_name, classification in (('materials', 'mat', 'shader'), ('textures', 'tex', 'texture'),
+                                                      ('lights', 'lt', 'light')):
+            if flag(flags, long_name, short_name):
+                nodes = [node for node in nodes
+                         if self.node_types[node.node_type].classification.startswith(classification)]
+        if flag(flags, 'defaultNodes', 'dn'):
+            nodes = [node for node in nodes if node.name in self.defaults]
+        if flag(flags, 'dag'):
+            nodes = [node for node in nodes if node.parent is not None or node.children or
+                     node.node_type == 'transform']
+        long_names = flag(flags, 'long', 'l')
+        names = [self.path(node) if long_names else node.name for node in nodes]
+        if flag(flags, 'showType', 'st'):
+            return [item for node, name in zip(nodes, names) for item in (name, node.node_type)]
+        return names
+
+    def select(self, *items, **flags):
+        names = [self.node(name).name for item in items for name in as_list(item)]
+        if flag(flags, 'clear', 'cl'):
+            self.selection = []
+        elif flag(flags, 'add', 'add'):
+            self.selection.extend(name for name in names if name not in self.selection)
+        else:
+            self.selection = names
+
+    def nodeType(self, node):
+        return self.node(node).node_type
+
+    def getAttr(self, plug, **flags):
+        node, attribute, spec = self.plug(plug)
+        if spec.children:
+            return [tuple(self.getAttr(node.name + '.' + child) for child in spec.children)]
+        return node.values.get(attribute, spec.default)
+
+    def setAttr(self, plug, *values, **flags):
+        node, attribute, spec = self.plug(plug)
+        if attribute in node.inputs:
+            raise RuntimeError('The attribute {0} is locked or connected and cannot be modified.'.format(plug))
+        if len(values) == 1 and isinstance(values[0], (list, tuple)):
+            values = tuple(values[0])
+        if spec.children:
+            if len(values) != len(spec.children):
+                raise RuntimeError('Wrong number of values for {0}'.format(plug))
+            for child, value in zip(spec.children, values):
+                node.values[child] = value
+            return
+        if len(values) != 1:
+            raise RuntimeError('Wrong number of values for {0}'.format(plug))
+        if spec.message:
+            raise RuntimeError('Message attributes have no data values: ' + plug)
+        node.values[attribute] = values[0]
+
+    def connectAttr(self, source, destination, **flags):
+        source_node, source_attribute, _ = self.plug(source)
+        destination_node, destination_attribute, destination_spec = self.plug(destination)
+        if flag(flags, 'nextAvailable', 'na'):
+            name, _ = split_attribute(destination_attribute)
+            index = 0
+            while '{0}[{1}]'.format(name, index) in destination_node.inputs:
+                index += 1
+            destination_attribute = '{0}[{1}]'.format(name, index)
+        current = destination_node.inputs.get(destination_attribute)
+        if current is not None:
+            if current == (source_node, source_attribute):
+                raise RuntimeError('{0} is already connected to {1}.'.format(source, destination))
+            if not flag(flags, 'force', 'f'):
+                raise RuntimeError('{0} already has an incoming connection.'.format(destination))
+            self.disconnect(destination_node, destination_attribute)
+        destination_node.inputs[destination_attribute] = (source_node, source_attribute)
+        source_node.outputs.setdefault(source_attribute, []).append((destination_node, destination_attribute))
+
+    def disconnect(self, node, attribute):
+        source_node, source_attribute = node.inputs.pop(attribute)
+        destinations = source_node.outputs.get(source_attribute, [])
+        destinations.remove((node, attribute))
+        if not destinations:
+            del source_node.outputs[source_attribute]
+
+    def disconnectAttr(self, source, destination, **flags):
+        destination_node, destination_attribute, _ = self.plug(destination)
+        if destination_attribute not in destination_node.inputs:
+            raise RuntimeError('There is no connection from {0} to {1} to disconnect'.format(source, destination))
+        self.disconnect(destination_node, destination_attribute)
+
+    def createNode(self, node_type, **flags):
+        if node_type not in self.node_types:
+            raise RuntimeError('Unknown object type: ' + node_type)
+        name = self.unique_name(flag(flags, 'name', 'n') or node_type + '1')
+        node = FakeNode(name, node_type)
+        self.nodes[name] = node
+        parent = flag(flags, 'parent', 'p')
+        if parent:
+            self.set_parent(node, self.node(parent))
+        return name
+
+    def shadingNode(self, node_type, **flags):
+        if not flag(flags, 'asLight', 'al'):
+            return self.createNode(node_type, name=flag(flags, 'name', 'n'))
+        transform = self.createNode('transform', name=flag(flags, 'name', 'n') or node_type + '1')
+        self.createNode(node_type, name=transform + 'Shape', parent=transform)
+        return transform
+
+    def set_parent(self, node, parent):
+        if node.parent is not None:
+            node.parent.children.remove(node)
+        node.parent = parent
+        if parent is not None:
+            parent.children.append(node)
+
+    def parent(self, node, parent, **flags):
+        self.set_parent(self.node(as_list(node)[0]), self.node(as_list(parent)[0]))
+
+    def matchTransform(self, *nodes, **flags):
+        pass
+
+    def inViewMessage(self, **flags):
+        pass
+
+    def delete(self, *items, **flags):
+        for item in items:
+            for name in as_list(item):
+                self.delete_node(self.node(name))
+
+    def delete_node(self, node):
+        for child in list(node.children):
+            self.delete_node(child)
+        for attribute in list(node.inputs):
+            self.disconnect(node, attribute)
+        for attribute, destinations in list(node.outputs.items()):
+            for destination_node, destination_attribute in list(destinations):
+                self.disconnect(destination_node, destination_attribute)
+        self.set_parent(node, None)
+        del self.nodes[node.name]
+        self.defaults.discard(node.name)
+        if node.name in self.selection:
+            self.selection.remove(node.name)
+
+    def rename(self, node, new_name, **flags):
+        node = self.node(node)
+        del self.nodes[node.name]
+        node.name = self.unique_name(new_name)
+        self.nodes[node.name] = node
+        return node.name
+
+    def listConnections(self, items=None, **flags):
+        source = flag(flags, 'source', 's', True)
+        destination = flag(flags, 'destination', 'd', True)
+        connections = flag(flags, 'connections', 'c', False)
+        plugs = flag(flags, 'plugs', 'p', False)
+        node_type = flag(flags, 'type', 't')
+        result = []
+        for item in as_list(items):
+            node_name, _, attribute = item.partition('.')
+            node = self.node(node_name)
+            own_attribute = self.plug(item)[1] if attribute else None
+            linked = []
+            if source:
+                linked.extend((attr, other) for attr, other in node.inputs.items())
+            if destination:
+                linked.extend((attr, other) for attr, others in node.outputs.items() for other in others)
+            for attr, (other_node, other_attribute) in linked:
+                if own_attribute is not None and split_attribute(attr)[0] != split_attribute(own_attribute)[0]:
+                    continue
+                if node_type is not None and other_node.node_type != node_type:
+                    continue
+                if connections:
+                    result.append(node.name + '.' + attr)
+                result.append(other_node.name + '.' + other_attribute if plugs else other_node.name)
+        return result
+
+    def listRelatives(self, objects=None, **flags):
+        full_path = flag(flags, 'fullPath', 'f')
+        result = []
+        for name in as_list(objects):
+            node = self.node(name)
+            if flag(flags, 'parent', 'p'):
+                related = [node.parent] if node.parent is not None else []
+            else:
+                related = list(node.children)
+                if flag(flags, 'shapes', 's'):
+                    related = [child for child in related if child.node_type != 'transform']
+            result.extend(self.path(n) if full_path else n.name for n in related)
+        return result or None
+
+    def listNodeTypes(self, classification, **flags):
+        return [name for name, node_type in sorted(self.node_types.items())
+                if node_type.classification.split('/')[0] == classification.split('/')[0] and
+                node_type.classification.startswith(classification)]
+
+    def pluginInfo(self, *args, **flags):
+        if flag(flags, 'listPlugins', 'ls'):
+            return list(self.plugins)
+        plugin = args[0] if args else None
+        if flag(flags, 'loaded', 'l'):
+            return plugin in self.plugins
+        if flag(flags, 'dependNode', 'dn'):
+            return list(self.plugins.get(plugin, [])) or None
+        if flag(flags, 'version', 'v'):
+            return '1.0' if plugin in self.plugins else None
+        return None
+
+    def renderer(self, *args, **flags):
+        if flag(flags, 'namesOfAvailableRenderers', 'ava'):
+            return list(self.renderers)
+        return None
+
+    def attributeQuery(self, attribute, **flags):
+        node_type = flag(flags, 'type', 'typ')
+        if node_type is None:
+            node_type = self.nodeType(flag(flags, 'node', 'n'))
+        spec = self.node_types[node_type].attribute(attribute) if node_type in self.node_types else None
+        if flag(flags, 'exists', 'ex'):
+            return spec is not None
+        if spec is None:
+            raise RuntimeError('No attribute named {0} on {1}'.format(attribute, node_type))
+        if flag(flags, 'message', 'msg'):
+            return spec.message
+        if flag(flags, 'attributeType', 'at'):
+            return spec.attr_type
+        if flag(flags, 'listChildren', 'lc'):
+            return list(spec.children) or None
+        if flag(flags, 'listEnum', 'le'):
+            return [spec.enum] if spec.enum else None
+        if flag(flags, 'listDefault', 'ld'):
+            if spec.children:
+                return [self.node_types[node_type].attribute(child).default for child in spec.children]
+            if isinstance(spec.default, (bool, int, float)):
+                return [float(spec.default)]
+            return None
+        if flag(flags, 'shortName', 'sn'):
+            return spec.short_name
+        if flag(flags, 'longName', 'ln'):
+            return spec.name
+        return None
+
+    def about(self, **flags):
+        if flag(flags, 'version', 'v'):
+            return self.maya_version
+        return None
+
+    def attributeInfo(self, *args, **flags):
+        node_type = self.node_types.get(flag(flags, 'type', 't'))
+        if node_type is None:
+            return None
+        return [name for name, spec in node_type.attributes.items() if spec.parent is None]
+
+
+def load_maya_ascii(file_path, aliases=None, scene=None):
+    """
+    Reads the nodes, values and connections of a .ma file into a FakeScene. aliases maps the short
+    attribute names of node types to their long names, like for ConverterOffline.
+    """
+    aliases = aliases or {}
+    scene = scene or FakeScene()
+    current = [None]
+
+    def long_name(node, attribute):
+        name, index = split_attribute(attribute)
+        node_type = scene.nodes[node].node_type
+        return aliases.get(node_type, {}).get(name, name) + index
+
+    def resolve(plug):
+        if plug.startswith('.'):
+            node, attribute = current[0], plug[1:]
+        else:
+            node, attribute = Offline.split_plug(plug)
+            node = Offline.short_node_name(node)
+        if node is None or node not in scene.nodes:
+            return None
+        return node + '.' + long_name(node, attribute)
+
+    with open(file_path, 'rb') as stream:
+        for statement in Offline.read_statements(stream):
+            if not statement.complete or not statement.terminated:
+                continue
+            _, tokens = Offline.split_statement(statement.data.decode(Offline.encoding))
+            if not tokens:
+                continue
+            command = tokens[0]
+            if command == 'createNode' and len(tokens) > 1:
+                node_type, name, parent = tokens[1], None, None
+                for i in range(2, len(tokens) - 1):
+                    if tokens[i] in ('-n', '-name'):
+                        name = Offline.short_node_name(Offline.unquote(tokens[i + 1]))
+                    elif tokens[i] in ('-p', '-parent'):
+                        parent = Offline.short_node_name(Offline.unquote(tokens[i + 1]))
+                if node_type not in scene.node_types:
+                    scene.register_type(node_type)
+                name = name or node_type + '1'
+                if name in scene.nodes and name in scene.defaults:
+                    current[0] = name
+                    continue
+                current[0] = scene.createNode(node_type, name=name,
+                                              parent=parent if parent in scene.nodes else None)
+            elif command == 'select':
+                names = [Offline.unquote(t) for t in tokens[1:] if not t.startswith('-')]
+                name = Offline.short_node_name(names[0]) if names else None
+                current[0] = name if name in scene.nodes else None
+            elif command == 'requires' and len(tokens) > 1 and not tokens[1].startswith('-'):
+                scene.load_plugin(Offline.unquote(tokens[1]))
+            elif command == 'setAttr':
+                load_set_attr(scene, tokens, resolve)
+            elif command == 'connectAttr' and len(tokens) > 2:
+                plugs = [resolve(Offline.unquote(t)) for t in tokens[1:] if not t.startswith('-')][:2]
+                if len(plugs) == 2 and None not in plugs:
+                    try:
+                        scene.connectAttr(plugs[0], plugs[1], f=True, na='-na' in tokens)
+                    except (RuntimeError, ValueError):
+                        pass
+    return scene
+
+
+def load_set_attr(scene, tokens, resolve):
+    value_type = None
+    plug = None
+    values = []
+    i = 1
+    while i < len(tokens):
+        token = tokens[i]
+        if token in Offline.set_attr_value_flags and i + 1 < len(tokens):
+            if token == '-type':
+                value_type = Offline.unquote(tokens[i + 1])
+            i += 2
+            continue
+        if plug is None:
+            if not token.startswith('-'):
+                plug = Offline.unquote(token)
+        elif not token.startswith('-') or Offline._is_number(token):
+            values.append(token)
+        i += 1
+    # sizes, multi ranges and data blocks are not modelled
+    if plug is None or not values or ':' in plug:
+        return
+    plug = resolve(plug)
+    if plug is None:
+        return
+    if value_type == 'string':
+        parsed = [Offline.unquote(values[0])]
+    else:
+        parsed = [Offline.parse_value(v) for v in values]
+    try:
+        scene.setAttr(plug, *parsed)
+    except (RuntimeError, ValueError):
+        pass
+
+
+def register_rules_types(scene, rules, categories=None):
+    """
+    Declares the source and target node types of a rule set with the attributes of its rules, in the
+    plugins of their engines. categories maps node types to classifications, guessed from the names otherwise.
+    """
+    categories = categories or {}
+    for engine in rules.engines:
+        plugin = Rules.render_engines_dic.get(engine)
+        if plugin is not None:
+            scene.load_plugin(plugin, engine)
+    source_plugin = Rules.render_engines_dic.get(rules.source_engine)
+    target_plugin = Rules.render_engines_dic.get(rules.target_engine)
+    for source_type, node_rule in sorted(rules.nodes.items()):
+        source_attributes = {'outColor': 'float3', 'outAlpha': 'float'}
+        target_attributes = {'outColor': 'float3', 'outAlpha': 'float'}
+        for name, attribute_rule in node_rule.attributes.items():
+            source_attributes[name] = attribute_rule.type or 'float'
+            if attribute_rule.target:
+                target_attributes[attribute_rule.target] = attribute_rule.type or 'float'
+        classification = categories.get(source_type) or guess_classification(source_type)
+        if source_type not in maya_node_types:
+            scene.register_type(source_type, classification, source_plugin, source_attributes)
+        else:
+            scene.register_type(source_type, attributes=source_attributes)
+        if node_rule.target_type:
+            target_type = node_rule.target_type
+            if target_type not in maya_node_types:
+                target_classification = categories.get(target_type) or classification
+                scene.register_type(target_type, target_classification, target_plugin, target_attributes)
+            else:
+                scene.register_type(target_type, attributes=target_attributes)
+    return scene
+
+
+def random_value(attr_type, generator):
+    if attr_type in Rules.compound_types:
+        return tuple(round(generator.random(), 3) for _ in range(int(attr_type[-1])))
+    if attr_type == 'bool':
+        return generator.random() > 0.5
+    if attr_type in ('long', 'short', 'enum', 'byte'):
+        return generator.randint(0, 2)
+    if attr_type == 'string':
+        return 'generated'
+    return round(generator.random(), 3)
+
+
+def generate_scene(rules, materials=100, textures=2, utilities=1, lights=10, seed=0, scene=None, depth=1,
+                   shared=0):
+    """
+    A scene of the source types of a rule set: materials assigned to meshes through shading engines,
+    textures connected to every material, chains of depth utilities connected to every texture and lights,
+    all with random values. shared utilities are created once and each connected to many textures.
+    """
+    generator = random.Random(seed)
+    scene = register_rules_types(scene or FakeScene(), rules)
+    scene.set_current_renderer(rules.source_engine)
+    by_class = {}
+    for source_type in sorted(rules.nodes):
+        classification = scene.node_types[source_type].classification.split('/')[0]
+        by_class.setdefault(classification, []).append(source_type)
+
+    def create(node_type):
+        name = scene.createNode(node_type, name=node_type + '1')
+        node_type_spec = scene.node_types[node_type]
+        for attribute_rule in rules.nodes[node_type].attributes.values():
+            spec = node_type_spec.attribute(attribute_rule.source)
+            if spec is None or spec.message or attribute_rule.source.startswith('out'):
+                continue
+            value = random_value(spec.attr_type, generator)
+            scene.setAttr(name + '.' + spec.name, *(value if isinstance(value, tuple) else (value,)))
+        return name
+
+    def connect(source, destination_type, destination):
+        inputs = [spec.name for spec in scene.node_types[destination_type].attributes.values()
+                  if spec.attr_type == 'float3' and not spec.name.startswith('out') and
+                  spec.name not in scene.nodes[destination].inputs]
+        if inputs:
+            scene.connectAttr(source + '.outColor', destination + '.' + generator.choice(inputs), f=True)
+
+    shared_utilities = []
+    for _ in range(shared if by_class.get('utility') else 0):
+        utility_type = generator.choice(by_class['utility'])
+        shared_utilities.append((utility_type, create(utility_type)))
+    texture_count = 0
+
+    for i in range(materials if by_class.get('shader') else 0):
+        material_type = by_class['shader'][i % len(by_class['shader'])]
+        material = create(material_type)
+        transform = scene.createNode('transform', name='mesh{0}'.format(i))
+        shape = scene.createNode('mesh', name='meshShape{0}'.format(i), parent=transform)
+        shading_engine = scene.createNode('shadingEngine', name=material + 'SG')
+        scene.connectAttr(material + '.outColor', shading_engine + '.surfaceShader')
+        scene.connectAttr(shape + '.message', shading_engine + '.dagSetMembers', na=True)
+        for _ in range(textures if by_class.get('texture') else 0):
+            texture_type = generator.choice(by_class['texture'])
+            texture = create(texture_type)
+            connect(texture, material_type, material)
+            for _ in range(utilities if by_class.get('utility') else 0):
+                destination_type, destination = texture_type, texture
+                for _ in range(depth):
+                    utility_type = generator.choice(by_class['utility'])
+                    utility = create(utility_type)
+                    connect(utility, destination_type, destination)
+                    destination_type, destination = utility_type, utility
+            if shared_utilities:
+                connect(shared_utilities[texture_count % len(shared_utilities)][1], texture_type, texture)
+            texture_count += 1
+    for i in range(lights if by_class.get('light') else 0):
+        light_type = by_class['light'][i % len(by_class['light'])]
+        transform = scene.createNode('transform', name='light{0}'.format(i))
+        light = scene.createNode(light_type, name=light_type + '1', parent=transform)
+        for attribute_rule in rules.nodes[light_type].attributes.values():
+            spec = scene.node_types[light_type].attribute(attribute_rule.source)
+            if spec is not None and not spec.message:
+                value = random_value(spec.attr_type, generator)
+                scene.setAttr(light + '.' + spec.name, *(value if isinstance(value, tuple) else (value,)))
+    return scene
@@ -0,0 +1,72 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Logging of the conversions.
+
+Only titles and the final summary are logged by default (INFO), every value set and every connection
+is logged at DEBUG so it costs nothing unless enabled. The Maya script editor is slow to append text,
+prefer the json lines file for full logs of large scenes:
+
+    ConverterLog.configure(logging.DEBUG, json_path='conversion.jsonl', stream=False)
+"""
+
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger('SceneConverter')
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+
+class JsonLinesHandler(logging.FileHandler):
+    """Writes every record as one json object per line, with the fields given in extra={'data': {...}}."""
+
+    def __init__(self, file_path, mode='a'):
+        super(JsonLinesHandler, self).__init__(file_path, mode=mode)
+
+    def format(self, record):
+        entry = {'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)),
+                 'level': record.levelname,
+                 'message': record.getMessage()}
+        data = getattr(record, 'data', None)
+        if data:
+            entry.update(data)
+        if record.exc_info:
+            entry['exception'] = logging.Formatter().formatException(record.exc_info)
+        return json.dumps(entry, sort_keys=True, default=str)
+
+
+def configure(level=logging.INFO, json_path=None, stream=True):
+    """Replaces the converter handlers: a plain stream to the script editor and/or a json lines file."""
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logger.setLevel(level)
+    if stream:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(stream_handler)
+    if json_path:
+        logger.addHandler(JsonLinesHandler(json_path))
+    return logger
+
+
+def verbose():
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+if not logger.handlers:
+    configure()
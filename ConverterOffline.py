@@ -0,0 +1,736 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Converts Maya ASCII scenes without Maya, applying the same rules files as ConverterClass.
+
+    python ConverterOffline.py vray_To_arnold in.ma out.ma --aliases aliases.json
+
+Maya saves attributes with their short names, the aliases file maps them back to the long names used
+by the rules, it is written from inside Maya with ConverterClass.export_attribute_aliases. That export
+also saves the short names and the defaults of the target attributes in the attribute schema file (see
+ConverterSchema), used when no aliases file is given, the values equal to the defaults are dropped.
+A converted node type without aliases fails the conversion, its short attribute names can not be read.
+The attributes of converted nodes without a rule are written back unchanged and listed as unresolved.
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+import ConverterPlan as Plan
+import ConverterRules as Rules
+import ConverterSchema as Schema
+
+
+message_attributes = ['msg', 'message']
+bool_values = {'yes': True, 'on': True, 'true': True, 'no': False, 'off': False, 'false': False}
+
+# setAttr flags followed by a value, every other flag stands alone
+set_attr_value_flags = ['-type', '-k', '-keyable', '-l', '-lock', '-s', '-size', '-cb', '-channelBox',
+                        '-ca', '-caching', '-ch', '-capacityHint']
+
+_code_re = re.compile(br'[";]|//')
+_string_re = re.compile(br'[\\"]')
+_command_re = re.compile(br'(?:\s+|//[^\n]*)*([A-Za-z]+)')
+_token_re = re.compile(r'"(?:[^"\\]|\\.)*"|[^\s"]+', re.DOTALL)
+_leading_re = re.compile(r'(?:\s+|//[^\n]*)*')
+
+# scanner states of StatementReader
+CODE = 0
+STRING = 1
+COMMENT = 2
+
+# .ma files are read and written as latin-1 so that any byte survives a decode/encode round trip
+encoding = 'latin-1'
+
+
+class Statement(object):
+    """
+    One MEL statement of a .ma file, data excludes the ';'.
+    Statements longer than the reader's limit only hold their head in data, the remaining raw bytes
+    (';' included) are streamed by rest() without ever being held in memory as a whole.
+    """
+    __slots__ = ('data', 'start', 'terminated', 'complete', '_rest')
+
+    def __init__(self, data, start, terminated=True, complete=True, rest=None):
+        self.data = data
+        self.start = start
+        self.terminated = terminated
+        self.complete = complete
+        self._rest = rest
+
+    def command(self):
+        match = _command_re.match(self.data)
+        if match is not None and (self.complete or match.end() < len(self.data)):
+            return match.group(1)
+        return
+
+    def rest(self):
+        if self._rest is None:
+            return iter(())
+        return self._rest
+
+
+class StatementReader(object):
+    """
+    Generator based reader of the statements of a binary .ma stream with bounded memory.
+    Quoted strings and // comments are skipped so that a ';' inside them does not split a statement.
+    """
+
+    def __init__(self, stream, chunk_size=1 << 20, max_statement=1 << 16):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.max_statement = max_statement
+        self.buffer = b''
+        self.offset = 0
+        self.start = 0
+        self.position = 0
+        self.state = CODE
+        self.eof = False
+
+    def fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return
+        self.buffer = self.buffer[self.start:] + chunk
+        self.offset += self.start
+        self.position -= self.start
+        self.start = 0
+
+    def scan(self):
+        """Advances to the end of the current statement, returns the index of its ';' or None."""
+        buffer = self.buffer
+        position = self.position
+        state = self.state
+        size = len(buffer)
+        while True:
+            if state == CODE:
+                match = _code_re.search(buffer, position)
+                if match is None:
+                    # a '/' at the very end may be the first half of a comment
+                    position = size - 1 if buffer.endswith(b'/') and not self.eof else size
+                    break
+                token = match.group()
+                position = match.end()
+                if token == b';':
+                    self.position = position
+                    self.state = CODE
+                    return match.start()
+                state = STRING if token == b'"' else COMMENT
+            elif state == STRING:
+                match = _string_re.search(buffer, position)
+                if match is None:
+                    position = size
+                    break
+                if match.group() == b'"':
+                    state = CODE
+                    position = match.end()
+                elif match.end() < size:
+                    position = match.end() + 1
+                else:
+                    # the escaped character is in the next chunk
+                    position = match.start() if not self.eof else size
+                    break
+            else:
+                end = buffer.find(b'\n', position)
+                if end == -1:
+                    position = size
+                    break
+                state = CODE
+                position = end + 1
+        self.position = position
+        self.state = state
+        return
+
+    def __iter__(self):
+        while True:
+            end = self.scan()
+            if end is not None:
+                statement = Statement(self.buffer[self.start:end], self.offset + self.start)
+                self.start = self.position
+                yield statement
+                continue
+            if self.position - self.start > self.max_statement:
+                head_end = self.start + self.max_statement
+                statement = Statement(self.buffer[self.start:head_end], self.offset + self.start,
+                                      complete=False, rest=self.stream_rest(head_end))
+                yield statement
+                for _ in statement.rest():
+                    pass
+                continue
+            if self.eof:
+                if self.start < len(self.buffer):
+                    yield Statement(self.buffer[self.start:], self.offset + self.start, terminated=False)
+                return
+            self.fill()
+
+    def stream_rest(self, head_end):
+        self.start = head_end
+        while True:
+            end = self.scan()
+            if end is not None:
+                data = self.buffer[self.start:self.position]
+                self.start = self.position
+                yield data
+                return
+            if self.position > self.start:
+                data = self.buffer[self.start:self.position]
+                self.start = self.position
+                yield data
+            if self.eof:
+                if self.start < len(self.buffer):
+                    data = self.buffer[self.start:]
+                    self.start = len(self.buffer)
+                    yield data
+                return
+            self.fill()
+
+
+def read_statements(stream, chunk_size=1 << 20, max_statement=1 << 16):
+    return iter(StatementReader(stream, chunk_size, max_statement))
+
+
+def split_statement(text):
+    """Returns the leading whitespace and comments of a statement and its tokens."""
+    leading = _leading_re.match(text).group()
+    return leading, _token_re.findall(text, len(leading))
+
+
+def unquote(token):
+    if len(token) > 1 and token[0] == '"' and token[-1] == '"':
+        return token[1:-1]
+    return token
+
+
+def quote(text):
+    return '"' + text + '"'
+
+
+def split_plug(plug):
+    node, _, attribute = plug.partition('.')
+    return node, attribute
+
+
+def is_related(attribute, name):
+    """True when two attributes set the same value: the same name, or a compound and one of its children."""
+    return name == attribute or Rules.channel_index(attribute, name) is not None or \
+        Rules.channel_index(name, attribute) is not None
+
+
+def short_node_name(node):
+    return node.split('|')[-1].lstrip(':')
+
+
+def format_value(value):
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def parse_value(token):
+    lowered = token.lower()
+    if lowered in bool_values:
+        return bool_values[lowered]
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token)
+    except ValueError:
+        return token
+
+
+def load_aliases(file_path):
+    if not file_path:
+        return {}
+    with open(file_path) as json_file:
+        return json.load(json_file)
+
+
+class MayaAsciiConverter(object):
+    """Rewrites createNode, setAttr and connectAttr statements of a .ma scene following a rule set."""
+
+    def __init__(self, rules, aliases=None, defaults=None):
+        self.rules = rules
+        self.aliases = aliases or {}
+        # {node type: {attribute: default}} of the source and target types, see ConverterSchema.load_defaults
+        self.defaults = defaults or {}
+        self.reset()
+
+    def reset(self):
+        self.node_types = {}
+        self.node_names = set()
+        self.current_node = None
+        self.current_converted = False
+        self.converted_nodes = []
+        self.unconverted_nodes = []
+        self.unconverted_attributes = []
+        # plugs of converted nodes without a rule, written back unchanged
+        self.unresolved_attributes = []
+        # converted node types without aliases
+        self.missing_aliases = set()
+        self.reverse_nodes = []
+        self.reverse_pool = Plan.ReversePool(self.new_reverse_node)
+        self.multiply_nodes = []
+        self.multiply_pool = Plan.MultiplyPool(self.new_multiply_node)
+        # createNode and setAttr of the new utility nodes, written before the connection needing them
+        self.utility_statements = []
+        self.skipped_values = 0
+        # {converted node: source attributes set in the file}, the others are at their source default
+        self.set_attributes = {}
+        self.filled_nodes = set()
+        self.filled_values = 0
+        self.target_required = False
+
+    def long_name(self, node_type, attribute):
+        return self.aliases.get(node_type, {}).get(attribute, attribute)
+
+    def resolve_attribute(self, node, attribute):
+        """Returns (node_rule, attribute_rule) for a plug of a converted node, or (None, None)."""
+        node_type = self.node_types.get(short_node_name(node))
+        node_rule = self.rules.node(node_type) if node_type is not None else None
+        if node_rule is None or not node_rule.target_type:
+            return None, None
+        return node_rule, node_rule.attributes.get(self.long_name(node_type, attribute))
+
+    def convert_stream(self, in_stream, out_stream):
+        """Converts a binary .ma stream into a binary output stream."""
+        self.reset()
+        for statement in read_statements(in_stream):
+            if not statement.complete:
+                self.convert_long_statement(statement, out_stream)
+            elif not statement.terminated:
+                out_stream.write(statement.data)
+            elif self.is_passthrough(statement):
+                out_stream.write(statement.data + b';')
+            else:
+                text = statement.data.decode(encoding)
+                for converted in self.convert_statement(text):
+                    out_stream.write((converted + ';').encode(encoding))
+        for converted in self.default_statements():
+            out_stream.write((converted + ';').encode(encoding))
+        return self.result()
+
+    def is_passthrough(self, statement):
+        """Tells without decoding it if a statement can be written back untouched."""
+        command = statement.command()
+        if command is None:
+            # an unknown command of a long statement may be cut in its head, read it whole to be safe
+            return statement.complete
+        if command in (b'createNode', b'select', b'connectAttr', b'requires'):
+            return False
+        if command == b'setAttr':
+            # .ma files set attributes relative to the current node, only converted nodes need the rules
+            quote_index = statement.data.find(b'"')
+            relative = statement.data[quote_index + 1:quote_index + 2] == b'.'
+            return relative and not self.current_converted
+        return True
+
+    def convert_long_statement(self, statement, out_stream):
+        if self.is_passthrough(statement):
+            out_stream.write(statement.data)
+            for data in statement.rest():
+                out_stream.write(data)
+            return
+        data = statement.data + b''.join(statement.rest())
+        terminated = data.endswith(b';')
+        text = (data[:-1] if terminated else data).decode(encoding)
+        if not terminated:
+            out_stream.write(data)
+            return
+        for converted in self.convert_statement(text):
+            out_stream.write((converted + ';').encode(encoding))
+
+    def convert_file(self, in_path, out_path):
+        with open(in_path, 'rb') as in_stream:
+            with open(out_path, 'wb') as out_stream:
+                result = self.convert_stream(in_stream, out_stream)
+        result['file'] = in_path
+        result['output'] = out_path
+        return result
+
+    def result(self):
+        return {'converted_nodes': list(self.converted_nodes),
+                'unconverted_nodes': list(self.unconverted_nodes),
+                'unconverted_attributes': list(self.unconverted_attributes),
+                'unresolved_attributes': list(self.unresolved_attributes),
+                'missing_aliases': sorted(self.missing_aliases),
+                'reverse_nodes': list(self.reverse_nodes),
+                'multiply_nodes': list(self.multiply_nodes),
+                'skipped_values': self.skipped_values,
+                'filled_values': self.filled_values}
+
+    def convert_statement(self, text):
+        leading, tokens = split_statement(text)
+        if not tokens:
+            return [text]
+        command = tokens[0]
+        if command == 'createNode':
+            return self.default_statements() + self.convert_create_node(text, leading, tokens)
+        if command == 'select':
+            statements = self.default_statements()
+            self.select_node(tokens)
+            return statements + [text]
+        elif command == 'setAttr':
+            return self.convert_set_attr(text, leading, tokens)
+        elif command == 'connectAttr':
+            return self.default_statements() + self.convert_connect_attr(text, leading, tokens)
+        elif command == 'requires':
+            return self.convert_requires(text, leading, tokens)
+        return [text]
+
+    def convert_requires(self, text, leading, tokens):
+        target_plugin = Rules.render_engines_dic.get(self.rules.target_engine)
+        if target_plugin is not None and target_plugin in [unquote(t) for t in tokens]:
+            self.target_required = True
+        return [text]
+
+    def select_node(self, tokens):
+        names = [unquote(t) for t in tokens[1:] if not t.startswith('-')]
+        self.set_current_node(short_node_name(names[0]) if names else None)
+
+    def set_current_node(self, node_name):
+        self.current_node = node_name
+        node_rule = self.rules.node(self.node_types.get(node_name))
+        self.current_converted = node_rule is not None and bool(node_rule.target_type)
+
+    def convert_create_node(self, text, leading, tokens):
+        node_type = tokens[1] if len(tokens) > 1 else ''
+        node_name = None
+        for i, token in enumerate(tokens):
+            if token in ('-n', '-name') and i + 1 < len(tokens):
+                node_name = unquote(tokens[i + 1])
+        if node_name is None:
+            node_name = node_type + '1'
+        node_name = short_node_name(node_name)
+        self.node_types[node_name] = node_type
+        self.node_names.add(node_name)
+        self.set_current_node(node_name)
+
+        statements = []
+        node_rule = self.rules.node(node_type)
+        if node_rule is not None:
+            if node_rule.target_type:
+                tokens = list(tokens)
+                tokens[1] = node_rule.target_type
+                self.converted_nodes.append(node_name)
+                if node_type not in self.aliases:
+                    self.missing_aliases.add(node_type)
+                text = leading + ' '.join(tokens)
+            else:
+                self.unconverted_nodes.append(node_type + ' : ' + node_name)
+            if not self.target_required:
+                statements.extend(self.require_target())
+        statements.append(text)
+        return statements
+
+    def require_target(self):
+        self.target_required = True
+        target_plugin = Rules.render_engines_dic.get(self.rules.target_engine)
+        if target_plugin is None:
+            return []
+        return ['\nrequires ' + quote(target_plugin) + ' ' + quote('0')]
+
+    def convert_set_attr(self, text, leading, tokens):
+        plug_index = None
+        type_index = None
+        value_indices = []
+        i = 1
+        while i < len(tokens):
+            token = tokens[i]
+            if token in set_attr_value_flags and i + 1 < len(tokens):
+                if token == '-type':
+                    type_index = i + 1
+                i += 2
+                continue
+            if plug_index is None:
+                if not token.startswith('-') or _is_number(token):
+                    plug_index = i
+            else:
+                value_indices.append(i)
+            i += 1
+
+        if plug_index is None:
+            return [text]
+        plug = unquote(tokens[plug_index])
+        if plug.startswith('.'):
+            node, attribute = self.current_node, plug[1:]
+        else:
+            node, attribute = split_plug(plug)
+        if node is None:
+            return [text]
+
+        node_rule, attribute_rule = self.resolve_attribute(node, attribute)
+        if node_rule is None:
+            return [text]
+        self.set_attributes.setdefault(short_node_name(node), set()).add(
+            self.long_name(node_rule.source_type, re.split(r'[.\[]', attribute, 1)[0]))
+        if attribute_rule is None:
+            # no rule, or a short name without alias: kept as it is rather than lost
+            self.unresolved_attributes.append(node + '.' + attribute)
+            return [text]
+
+        tokens = list(tokens)
+        tokens[plug_index] = quote(('.' if plug.startswith('.') else node + '.') + attribute_rule.target)
+        if type_index is not None and attribute_rule.compound:
+            tokens[type_index] = quote(attribute_rule.type)
+        if value_indices:
+            values = self.convert_values(attribute_rule, [tokens[v] for v in value_indices])
+            # 'setAttr plug [-type t] values' equal to the default of the new node is dropped, flags like -l are kept
+            extra_tokens = len(tokens) - len(value_indices) - (4 if type_index is not None else 2)
+            if not extra_tokens and self.is_default(node_rule.target_type, attribute_rule.target, values):
+                self.skipped_values += 1
+                return []
+            for value_index, value in zip(value_indices, values):
+                tokens[value_index] = value
+        return [leading + ' '.join(tokens)]
+
+    def default_statements(self):
+        """
+        setAttr of the mapped attributes the block of the current node left at their source default, once
+        converted they may differ from the defaults of the new node, e.g. overridden or inverted values.
+        """
+        node = self.current_node
+        if not self.current_converted or node in self.filled_nodes:
+            return []
+        self.filled_nodes.add(node)
+        node_rule = self.rules.node(self.node_types[node])
+        set_attributes = self.set_attributes.get(node, set())
+        source_defaults = self.defaults.get(node_rule.source_type, {})
+        target_defaults = self.defaults.get(node_rule.target_type, {})
+        statements = []
+        for attribute in sorted(node_rule.value_attributes()):
+            attribute_rule = node_rule.attributes[attribute]
+            if not attribute_rule.target or attribute in message_attributes or \
+                    any(is_related(attribute, name) for name in set_attributes):
+                continue
+            default = source_defaults.get(attribute)
+            if default is None:
+                if attribute_rule.factor_kind != Rules.FACTOR_OVERRIDE:
+                    continue
+                # an override does not depend on the source value
+                default = [0.0] * int(attribute_rule.type[-1]) if attribute_rule.compound else 0.0
+            value, value_type = Plan.static_value(attribute_rule, tuple(default) if isinstance(default, list)
+                                                  else default)
+            if value is None or Schema.is_default(value, target_defaults.get(attribute_rule.target)):
+                continue
+            values = value if isinstance(value, list) else [value]
+            type_flag = ' -type ' + quote(value_type) if value_type else ''
+            statements.append('\n\tsetAttr ' + quote('.' + attribute_rule.target) + type_flag + ' ' +
+                              ' '.join(format_value(v) for v in values))
+            self.filled_values += 1
+        return statements
+
+    def is_default(self, node_type, attribute, values):
+        default = self.defaults.get(node_type, {}).get(attribute)
+        if default is None:
+            return False
+        parsed = [parse_value(v) for v in values]
+        return Schema.is_default(parsed if isinstance(default, list) else parsed[0], default)
+
+    def convert_values(self, attribute_rule, values):
+        parsed = [parse_value(v) for v in values]
+        if attribute_rule.compound:
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in parsed):
+                return values
+            converted = attribute_rule.convert_value(tuple(float(v) for v in parsed))
+        elif len(parsed) == 1:
+            value = parsed[0]
+            if attribute_rule.type == 'float' and isinstance(value, int) and not isinstance(value, bool):
+                value = float(value)
+            converted = [attribute_rule.convert_value(value)]
+        else:
+            return values
+        return [format_value(v) for v in converted]
+
+    def convert_connect_attr(self, text, leading, tokens):
+        plugs = [(i, t) for i, t in enumerate(tokens[1:], 1) if not t.startswith('-')]
+        if len(plugs) < 2:
+            return [text]
+        (source_index, source_token), (destination_index, destination_token) = plugs[0], plugs[1]
+        source = unquote(source_token)
+        destination = unquote(destination_token)
+
+        new_source, _ = self.convert_plug(source)
+        new_destination, destination_rule = self.convert_plug(destination)
+        if new_source is None or new_destination is None:
+            self.unconverted_attributes.append(source + ' -> ' + destination)
+            return []
+
+        tokens = list(tokens)
+        if destination_rule is not None and destination_rule.factor_kind == Rules.FACTOR_INVERSE:
+            return self.insert_reverse(leading, tokens, source_index, destination_index,
+                                       new_source, new_destination, destination_rule)
+        if destination_rule is not None and destination_rule.factor_kind == Rules.FACTOR_MULTIPLY and \
+                destination_rule.factor_value != 1:
+            return self.insert_multiply(leading, tokens, source_index, destination_index,
+                                        new_source, new_destination, destination_rule)
+        tokens[source_index] = quote(new_source)
+        tokens[destination_index] = quote(new_destination)
+        return [leading + ' '.join(tokens)]
+
+    def convert_plug(self, plug):
+        """Returns (new plug, attribute rule), the plug is None when it can not be converted."""
+        node, attribute = split_plug(plug)
+        top_attribute = re.split(r'[.\[]', attribute, 1)[0]
+        if top_attribute in message_attributes:
+            return plug, None
+        node_rule, attribute_rule = self.resolve_attribute(node, top_attribute)
+        if node_rule is None:
+            return plug, None
+        if attribute_rule is None:
+            self.unresolved_attributes.append(plug)
+            return plug, None
+        return node + '.' + attribute_rule.target + attribute[len(top_attribute):], attribute_rule
+
+    def new_utility_node(self, node_type, source):
+        """Creates a utility node named after its first source, its statements go before the next connection."""
+        node = self.unique_name(short_node_name(split_plug(source)[0]) + '_' + node_type, node_type)
+        self.utility_statements.extend(['createNode {0} -n {1}'.format(node_type, quote(node)),
+                                        'connectAttr ' + quote(node + '.message') +
+                                        ' ":defaultRenderUtilityList1.u" -na'])
+        return node
+
+    def new_reverse_node(self, source):
+        reverse_node = self.new_utility_node('reverse', source)
+        self.reverse_nodes.append(reverse_node)
+        return reverse_node
+
+    def new_multiply_node(self, source):
+        multiply_node = self.new_utility_node('multiplyDivide', source)
+        self.multiply_nodes.append(multiply_node)
+        return multiply_node
+
+    def source_key(self, source):
+        """The same plug may be written with its short or long name, the pools use the long one."""
+        node, attribute = split_plug(source)
+        node_type = self.node_types.get(short_node_name(node))
+        return node + '.' + self.long_name(node_type, attribute)
+
+    def utility_connections(self, leading, tokens, source_index, destination_index, source, destination,
+                            utility_output, utility_input):
+        statements = [leading + statement for statement in self.utility_statements]
+        del self.utility_statements[:]
+        if utility_input is not None:
+            into_utility = list(tokens)
+            into_utility[source_index] = quote(source)
+            into_utility[destination_index] = quote(utility_input)
+            statements.append(leading + ' '.join(into_utility))
+        from_utility = list(tokens)
+        from_utility[source_index] = quote(utility_output)
+        from_utility[destination_index] = quote(destination)
+        statements.append(leading + ' '.join(from_utility))
+        return statements
+
+    def insert_reverse(self, leading, tokens, source_index, destination_index, source, destination,
+                       attribute_rule):
+        """The connection through the reverse of its source, shared with the other inverse connections."""
+        reverse_output, reverse_input = self.reverse_pool.inverse(self.source_key(source), attribute_rule.compound)
+        return self.utility_connections(leading, tokens, source_index, destination_index, source, destination,
+                                        reverse_output, reverse_input)
+
+    def insert_multiply(self, leading, tokens, source_index, destination_index, source, destination,
+                        attribute_rule):
+        """The connection through the multiplyDivide of its source and factor, shared like the reverse nodes."""
+        factor = attribute_rule.factor_value
+        multiply_output, multiply_input, factor_input = self.multiply_pool.multiply(
+            self.source_key(source), attribute_rule.compound, factor)
+        if factor_input is not None:
+            if attribute_rule.compound:
+                self.utility_statements.append('setAttr {0} -type "float3" {1}'.format(
+                    quote(factor_input), ' '.join([format_value(factor)] * 3)))
+            else:
+                self.utility_statements.append('setAttr {0} {1}'.format(quote(factor_input), format_value(factor)))
+        return self.utility_connections(leading, tokens, source_index, destination_index, source, destination,
+                                        multiply_output, multiply_input)
+
+    def unique_name(self, name, node_type):
+        unique = name
+        index = 1
+        while unique in self.node_names:
+            unique = name + str(index)
+            index += 1
+        self.node_names.add(unique)
+        self.node_types[unique] = node_type
+        return unique
+
+
+def _is_number(token):
+    try:
+        float(token)
+        return True
+    except ValueError:
+        return False
+
+
+def load_defaults(schema_path=None):
+    """The defaults of the attribute schema file, the default schema file when it exists otherwise."""
+    schema_path = schema_path or Schema.default_path()
+    if not os.path.isfile(schema_path):
+        return {}
+    return Schema.load_defaults(schema_path)
+
+
+def load_schema_aliases(schema_path=None):
+    """The short names of the attribute schema file, the default schema file when it exists otherwise."""
+    schema_path = schema_path or Schema.default_path()
+    if not os.path.isfile(schema_path):
+        return {}
+    return Schema.load_aliases(schema_path)
+
+
+def convert_file(rules_name, in_path, out_path, aliases_path=None, schema_path=None):
+    rules = Rules.load_rules(Rules.rules_path(rules_name))
+    aliases = load_aliases(aliases_path) if aliases_path else load_schema_aliases(schema_path)
+    converter = MayaAsciiConverter(rules, aliases, load_defaults(schema_path))
+    return converter.convert_file(in_path, out_path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert a Maya ASCII scene with a rules file, without Maya.')
+    parser.add_argument('rules', help='rules file name from the Rules folder or a path to a rules file')
+    parser.add_argument('input', help='source .ma file')
+    parser.add_argument('output', help='converted .ma file')
+    parser.add_argument('--aliases', help='json file of short to long attribute names per node type, '
+                                          'read from the attribute schema file by default')
+    parser.add_argument('--schema', help='attribute schema file of the short names and defaults, the schema cache '
+                                         'by default')
+    args = parser.parse_args(argv)
+
+    result = convert_file(args.rules, args.input, args.output, args.aliases, args.schema)
+    print('Nodes converted: ' + str(len(result['converted_nodes'])))
+    print('Nodes failed to be converted: ' + str(len(result['unconverted_nodes'])))
+    for node in result['unconverted_nodes']:
+        print('\t' + node)
+    print('Attributes failed to be connected: ' + str(len(result['unconverted_attributes'])))
+    for attribute in result['unconverted_attributes']:
+        print('\t' + attribute)
+    print('Values left at their defaults: ' + str(result['skipped_values']))
+    print('Values set from the source defaults: ' + str(result['filled_values']))
+    print('Attributes without rule, kept unchanged: ' + str(len(result['unresolved_attributes'])))
+    if result['missing_aliases']:
+        print('No attribute aliases for: ' + ', '.join(result['missing_aliases']) +
+              ', export them from Maya with ConverterClass.export_attribute_aliases')
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,351 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Conversion plans, everything a conversion will do to a scene resolved before touching it.
+A plan is plain data, it can be saved, loaded, diffed and executed later by ConverterClass.execute_plan.
+This module must not import maya.
+"""
+
+import heapq
+import json
+
+import ConverterRules as Rules
+import ConverterSchema as Schema
+
+try:
+    string_types = basestring  # Python 2.7
+except NameError:
+    string_types = str
+
+
+class NodeStep(object):
+    """
+    The replacement of one node: the node to create, its static values and the connections made once it
+    took the name of the node it replaces. Plugs are given with the final node names, followed by the
+    plugs of the connection in the scene, made instead when one of its nodes stays as it was.
+    """
+    __slots__ = ('node', 'node_type', 'target_type', 'category', 'final_name', 'values', 'connections',
+                 'reverse_nodes', 'multiply_nodes')
+
+    def __init__(self, node, node_type, target_type, category, final_name=None):
+        self.node = node
+        self.node_type = node_type
+        self.target_type = target_type
+        self.category = category
+        self.final_name = final_name or node
+        # [target attribute, value, setAttr type, source attribute]
+        self.values = []
+        # [source plug, destination plug, scene source plug, scene destination plug]
+        self.connections = []
+        # [source plug, destination plug, compound, scene source plug, scene destination plug], connected
+        # through a new reverse node
+        self.reverse_nodes = []
+        # [source plug, destination plug, compound, factor, scene source plug, scene destination plug],
+        # connected through a multiplyDivide node
+        self.multiply_nodes = []
+
+    def to_dict(self):
+        return dict((key, getattr(self, key)) for key in self.__slots__)
+
+    @classmethod
+    def from_dict(cls, data):
+        step = cls(data['node'], data['node_type'], data['target_type'], data['category'], data['final_name'])
+        step.values = [list(v) for v in data.get('values', [])]
+        # plans saved without the scene plugs have None in their place
+        step.connections = [(list(c) + [None, None])[:4] for c in data.get('connections', [])]
+        step.reverse_nodes = [(list(r) + [None, None])[:5] for r in data.get('reverse_nodes', [])]
+        step.multiply_nodes = [(list(m) + [None, None])[:6] for m in data.get('multiply_nodes', [])]
+        return step
+
+
+class ConversionPlan(object):
+
+    def __init__(self, rules_name='', engines=None):
+        self.rules_name = rules_name
+        self.engines = list(engines or [])
+        self.steps = []
+        # {'node', 'node_type', 'category', 'attribute', 'reason'} of everything known to fail before execution
+        self.failures = []
+        # values not set since the new nodes already have them by default
+        self.skipped_values = 0
+
+    def __repr__(self):
+        return 'ConversionPlan({0}, {1} nodes, {2} failures)'.format(self.rules_name, len(self.steps),
+                                                                     len(self.failures))
+
+    def add_failure(self, node, node_type, reason, attribute=None, category=None):
+        self.failures.append({'node': node, 'node_type': node_type, 'category': category, 'attribute': attribute,
+                              'reason': reason})
+
+    def counts(self):
+        return {'nodes': len(self.steps),
+                'values': sum(len(s.values) for s in self.steps),
+                'connections': sum(len(s.connections) for s in self.steps),
+                'reverse_nodes': sum(len(s.reverse_nodes) for s in self.steps),
+                'multiply_nodes': sum(len(s.multiply_nodes) for s in self.steps),
+                'skipped_values': self.skipped_values,
+                'failures': len(self.failures)}
+
+    def to_dict(self):
+        return {'rules': self.rules_name, 'engines': self.engines, 'counts': self.counts(),
+                'steps': [s.to_dict() for s in self.steps], 'failures': list(self.failures)}
+
+    @classmethod
+    def from_dict(cls, data):
+        plan = cls(data.get('rules', ''), data.get('engines'))
+        plan.steps = [NodeStep.from_dict(s) for s in data.get('steps', [])]
+        plan.failures = list(data.get('failures', []))
+        plan.skipped_values = data.get('counts', {}).get('skipped_values', 0)
+        return plan
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True, indent=4, separators=(',', ': '))
+
+    def save(self, file_path):
+        with open(file_path, 'w') as outfile:
+            outfile.write(self.to_json())
+
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path) as json_file:
+            return cls.from_dict(json.load(json_file))
+
+
+def split_plug(plug):
+    node, _, attribute = plug.partition('.')
+    return node, attribute
+
+
+def top_attribute(attribute):
+    for separator in ('.', '['):
+        attribute = attribute.split(separator, 1)[0]
+    return attribute
+
+
+def static_value(attribute_rule, value):
+    """Returns (value, setAttr type) of a snapshot value, or (None, None) when it can not be written."""
+    if value is None:
+        return None, None
+    if attribute_rule.compound:
+        value = Rules.unpack_value(value)
+        if not isinstance(value, tuple):
+            return None, None
+        return list(attribute_rule.convert_value(value)), attribute_rule.type
+    if isinstance(value, (list, dict, tuple)):
+        return None, None
+    if isinstance(value, string_types):
+        return value, 'string'
+    return attribute_rule.convert_value(value), None
+
+
+class UtilityPool(object):
+    """
+    Utility nodes shared by the connections going through them. A source plug goes through one node
+    and its output is shared by every destination, and up to three scalar sources are packed in the
+    X, Y and Z channels of one node. create(source plug) makes a new node for a source and returns
+    its name. Sources are pooled by key, the source plug and what else makes the node, e.g. a factor.
+    """
+    channels = 'XYZ'
+    input = 'input'
+    output = 'output'
+
+    def __init__(self, create):
+        self.create = create
+        self.nodes = []
+        # (source plug, key): node of the compound sources
+        self.compounds = {}
+        # (source plug, key): output plug of the scalar sources
+        self.outputs = {}
+        # node being packed and its used channels
+        self.packed = None
+        self.packed_count = 0
+
+    def new_node(self, source):
+        node = self.create(source)
+        self.nodes.append(node)
+        return node
+
+    def route(self, source, compound, key=None):
+        """
+        Returns (output plug, input plug) of the node source goes through, the input plug is None when
+        the source is already connected to it.
+        """
+        if compound:
+            node = self.compounds.get((source, key))
+            if node is not None:
+                return node + '.' + self.output, None
+            node = self.compounds[(source, key)] = self.new_node(source)
+            return node + '.' + self.output, node + '.' + self.input
+        output = self.outputs.get((source, key))
+        if output is not None:
+            return output, None
+        # a channel of a pooled compound, e.g. file1.outColorR of file1.outColor, one letter shorter
+        node = self.compounds.get((source[:-1], key))
+        index = None if node is None else Rules.channel_index(source[:-1], source)
+        if index is not None:
+            output = self.outputs[(source, key)] = node + '.' + self.output + self.channels[index]
+            return output, None
+        if self.packed is None or self.packed_count == len(self.channels):
+            self.packed = self.new_node(source)
+            self.packed_count = 0
+        channel = self.channels[self.packed_count]
+        self.packed_count += 1
+        output = self.outputs[(source, key)] = self.packed + '.' + self.output + channel
+        return output, self.packed + '.' + self.input + channel
+
+
+class ReversePool(UtilityPool):
+    """The reverse nodes of the inverse connections, one input per source plug."""
+
+    def inverse(self, source, compound):
+        return self.route(source, compound)
+
+
+class MultiplyPool(UtilityPool):
+    """
+    The multiplyDivide nodes of the multiply connections, one input1 per source plug and factor,
+    the factors are set on input2.
+    """
+    input = 'input1'
+
+    def multiply(self, source, compound, factor):
+        """Returns (output plug, input1 plug, input2 plug), the inputs are None when already connected."""
+        output, input1 = self.route(source, compound, factor)
+        if input1 is None:
+            return output, None, None
+        return output, input1, input1.replace('.input1', '.input2', 1)
+
+
+def dependency_order(entries):
+    """
+    Sorts (snapshot, category, final name) entries so every node comes after the nodes of the entries it
+    reads from, leaves first. Independent nodes keep their given order, a cycle is entered at its
+    earliest entry.
+    """
+    index = dict((snapshot.node, i) for i, (snapshot, _, _) in enumerate(entries))
+    readers = [set() for _ in entries]
+    for i, (snapshot, _, _) in enumerate(entries):
+        for source in snapshot.inputs.values():
+            j = index.get(split_plug(source)[0])
+            if j is not None and j != i:
+                readers[j].add(i)
+        for destinations in snapshot.outputs.values():
+            for destination in destinations:
+                j = index.get(split_plug(destination)[0])
+                if j is not None and j != i:
+                    readers[i].add(j)
+    pending = [0] * len(entries)
+    for reader_indices in readers:
+        for j in reader_indices:
+            pending[j] += 1
+
+    ready = [i for i, count in enumerate(pending) if count == 0]
+    heapq.heapify(ready)
+    placed = [False] * len(entries)
+    order = []
+    earliest = 0
+    while len(order) < len(entries):
+        if not ready:
+            # only cycles are left
+            while placed[earliest]:
+                earliest += 1
+            heapq.heappush(ready, earliest)
+        i = heapq.heappop(ready)
+        if placed[i]:
+            continue
+        placed[i] = True
+        order.append(i)
+        for j in readers[i]:
+            pending[j] -= 1
+            if pending[j] == 0 and not placed[j]:
+                heapq.heappush(ready, j)
+    return [entries[i] for i in order]
+
+
+def build_plan(rules, entries, rules_name='', defaults=None):
+    """
+    Resolves every node through the rule set. entries are (snapshot, category, final name) tuples of
+    the nodes to convert, the final name being the name the new node will take. The steps follow the
+    dependency order of the nodes, so a connection between two converted nodes is made once, by the
+    step of its destination.
+    defaults(target type, attribute) returns the default value of an attribute of a new node, or None,
+    the values equal to it are not set.
+    """
+    plan = ConversionPlan(rules_name, rules.engines)
+    converted = {}
+    for snapshot, category, final_name in dependency_order(list(entries)):
+        node_rule = rules.node(snapshot.node_type)
+        if node_rule is None or not node_rule.target_type:
+            plan.add_failure(snapshot.node, snapshot.node_type, 'no rule for this node type', category=category)
+            continue
+        converted[snapshot.node] = (len(plan.steps), node_rule, snapshot)
+        plan.steps.append(NodeStep(snapshot.node, snapshot.node_type, node_rule.target_type, category,
+                                   final_name))
+
+    def final_plug(plug):
+        """Returns (final plug, attribute rule, step index), the plug is None when it is not mapped."""
+        node, attribute = split_plug(plug)
+        if node not in converted:
+            return plug, None, -1
+        index, node_rule, _ = converted[node]
+        name = top_attribute(attribute)
+        attribute_rule = node_rule.attributes.get(name)
+        if attribute_rule is None:
+            return None, None, index
+        new_plug = plan.steps[index].final_name + '.' + attribute_rule.target + attribute[len(name):]
+        return new_plug, attribute_rule, index
+
+    planned = set()
+
+    def add_connection(source, destination, owner_node, owner_type):
+        if (source, destination) in planned:
+            return
+        planned.add((source, destination))
+        new_source, _, source_index = final_plug(source)
+        new_destination, destination_rule, destination_index = final_plug(destination)
+        if new_source is None or new_destination is None:
+            failed = destination if new_destination is None else source
+            plan.add_failure(owner_node, owner_type, 'attribute has no rule', failed)
+            return
+        # connections between two converted nodes are made once both of them are replaced, by the
+        # destination step unless they are in a cycle
+        step = plan.steps[max(source_index, destination_index)]
+        if destination_rule is not None and destination_rule.factor_kind == Rules.FACTOR_INVERSE:
+            step.reverse_nodes.append([new_source, new_destination, destination_rule.compound, source, destination])
+        elif destination_rule is not None and destination_rule.factor_kind == Rules.FACTOR_MULTIPLY and \
+                destination_rule.factor_value != 1:
+            step.multiply_nodes.append([new_source, new_destination, destination_rule.compound,
+                                        destination_rule.factor_value, source, destination])
+        else:
+            step.connections.append([new_source, new_destination, source, destination])
+
+    for node, (index, node_rule, snapshot) in sorted(converted.items(), key=lambda item: item[1][0]):
+        step = plan.steps[index]
+        for attribute, value in sorted(snapshot.values.items()):
+            attribute_rule = node_rule.attributes.get(attribute)
+            if attribute_rule is None:
+                continue
+            value, value_type = static_value(attribute_rule, value)
+            if value is None:
+                continue
+            if defaults is not None and Schema.is_default(value, defaults(step.target_type, attribute_rule.target)):
+                plan.skipped_values += 1
+                continue
+            step.values.append([attribute_rule.target, value, value_type, attribute])
+        for attribute, source in sorted(snapshot.inputs.items()):
+            add_connection(source, node + '.' + attribute, node, snapshot.node_type)
+        for attribute, destinations in sorted(snapshot.outputs.items()):
+            for destination in destinations:
+                add_connection(node + '.' + attribute, destination, node, snapshot.node_type)
+    return plan
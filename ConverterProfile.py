@@ -0,0 +1,203 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Profiling of the scene access of a conversion: the calls, cumulative time and call sites of every
+backend command, saved as pstats (cProfile) or Chrome trace events (chrome://tracing, Perfetto).
+This module must not import maya.
+
+    backend = ConverterProfile.ProfiledBackend('cmds', trace=True)
+    converter = Converter.ConverterClass(backend)
+    converter.convert_scene('mayaSoftware_To_arnold')
+    print(backend.profile.format_summary())
+    backend.profile.save_stats('conversion.prof')  # python -m pstats conversion.prof
+    backend.profile.save_trace('conversion.json')
+"""
+
+import json
+import marshal
+import os
+import sys
+
+import ConverterBackend as Backend
+import ConverterBuffer as Buffer
+import ConverterReport as Report
+
+# the bulk methods of SceneBackend, profiled with the commands they are made of
+bulk_methods = ('node_type', 'get_attr', 'get_attributes', 'list_connections', 'create_node')
+
+
+def source_file(file_path):
+    file_path = os.path.normcase(os.path.abspath(file_path))
+    if file_path.endswith(('.pyc', '.pyo')):
+        file_path = file_path[:-1]
+    return file_path
+
+
+class CommandStats(object):
+    __slots__ = ('calls', 'total', 'own', 'sites')
+
+    def __init__(self):
+        self.calls = 0
+        # seconds including the commands called inside, and without them
+        self.total = 0.0
+        self.own = 0.0
+        # {(file, first line, function, line): [calls, total, own]}
+        self.sites = {}
+
+
+class CallProfile(object):
+    """Calls of the wrapped functions, by name and by the first caller outside of the backend modules."""
+
+    def __init__(self, trace=False, skip_files=()):
+        self.trace = trace
+        self.skip_files = set(source_file(f) for f in skip_files)
+        self.skip_files.update(source_file(f) for f in (__file__, Backend.__file__, Buffer.__file__))
+        self._file_cache = {}
+        self.stats = {}
+        self.events = []
+        self._children = []
+        self.start = Report.timer()
+
+    def reset(self):
+        self.stats = {}
+        self.events = []
+        self._children = []
+        self.start = Report.timer()
+
+    def skipped(self, code):
+        skipped = self._file_cache.get(code.co_filename)
+        if skipped is None:
+            skipped = self._file_cache[code.co_filename] = source_file(code.co_filename) in self.skip_files
+        return skipped
+
+    def call_site(self):
+        frame = sys._getframe(2)
+        while frame is not None and self.skipped(frame.f_code):
+            frame = frame.f_back
+        if frame is None:
+            return '~', 0, '<unknown>', 0
+        code = frame.f_code
+        return code.co_filename, code.co_firstlineno, code.co_name, frame.f_lineno
+
+    def wrap(self, name, function):
+        def profiled(*args, **kwargs):
+            site = self.call_site()
+            self._children.append(0.0)
+            start = Report.timer()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = Report.timer() - start
+                own = elapsed - self._children.pop()
+                if self._children:
+                    self._children[-1] += elapsed
+                self.add(name, site, elapsed, own, start)
+        profiled.__name__ = name
+        return profiled
+
+    def add(self, name, site, elapsed, own, start):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = CommandStats()
+        stats.calls += 1
+        stats.total += elapsed
+        stats.own += own
+        site_stats = stats.sites.get(site)
+        if site_stats is None:
+            site_stats = stats.sites[site] = [0, 0.0, 0.0]
+        site_stats[0] += 1
+        site_stats[1] += elapsed
+        site_stats[2] += own
+        if self.trace:
+            self.events.append((name, start, elapsed, site))
+
+    def summary(self, sites=3):
+        """[{name, calls, total, own, per_call, sites}] by total time, sites are the most expensive callers."""
+        rows = []
+        for name, stats in self.stats.items():
+            top_sites = sorted(stats.sites.items(), key=lambda item: -item[1][1])[:sites]
+            rows.append({'name': name, 'calls': stats.calls, 'total': stats.total, 'own': stats.own,
+                         'per_call': stats.total / stats.calls,
+                         'sites': [{'site': '{0}:{1} {2}'.format(os.path.basename(s[0]), s[3], s[2]),
+                                    'calls': v[0], 'total': v[1]} for s, v in top_sites]})
+        rows.sort(key=lambda row: -row['total'])
+        return rows
+
+    def format_summary(self, limit=20):
+        lines = ['{0:<28}{1:>10}{2:>12}{3:>12}{4:>14}'.format('command', 'calls', 'total s', 'own s', 'per call ms')]
+        for row in self.summary()[:limit]:
+            lines.append('{0:<28}{1:>10}{2:>12.4f}{3:>12.4f}{4:>14.4f}'.format(
+                row['name'], row['calls'], row['total'], row['own'], row['per_call'] * 1000))
+            for site in row['sites']:
+                lines.append('    {0:<52}{1:>10}{2:>12.4f}'.format(site['site'], site['calls'], site['total']))
+        return '\n'.join(lines)
+
+    def pstats(self):
+        """The stats in the marshalled format of cProfile, the commands called from their call sites."""
+        stats = {}
+        for name, command_stats in self.stats.items():
+            callers = {}
+            for site, (calls, total, own) in command_stats.sites.items():
+                caller = site[:3]
+                previous = callers.get(caller, (0, 0, 0.0, 0.0))
+                callers[caller] = (previous[0] + calls, previous[1] + calls, previous[2] + own,
+                                   previous[3] + total)
+            stats[('~', 0, name)] = (command_stats.calls, command_stats.calls, command_stats.own,
+                                     command_stats.total, callers)
+        return stats
+
+    def save_stats(self, file_path):
+        """Readable by pstats.Stats, snakeviz and the other cProfile viewers."""
+        with open(file_path, 'wb') as outfile:
+            marshal.dump(self.pstats(), outfile)
+
+    def trace_events(self):
+        pid = os.getpid()
+        events = []
+        for name, start, elapsed, site in self.events:
+            events.append({'name': name, 'cat': 'scene', 'ph': 'X', 'pid': pid, 'tid': 0,
+                           'ts': round((start - self.start) * 1e6, 1), 'dur': round(elapsed * 1e6, 1),
+                           'args': {'site': '{0}:{1} {2}'.format(os.path.basename(site[0]), site[3], site[2])}})
+        return events
+
+    def save_trace(self, file_path):
+        """Chrome trace events of every call, the profile must be created with trace=True."""
+        with open(file_path, 'w') as outfile:
+            json.dump({'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, outfile)
+
+
+class ProfiledBackend(Backend.SceneBackend):
+    """
+    A backend profiling the calls made to another one. The commands are also replaced on the wrapped
+    backend, so the ones its bulk methods are made of are profiled too.
+    """
+
+    def __init__(self, backend=None, trace=False):
+        self.backend = Backend.create_backend(backend)
+        self.name = self.backend.name
+        self.type_cache = self.backend.type_cache
+        self.schema = self.backend.schema
+        backend_module = sys.modules.get(type(self.backend).__module__)
+        skip_files = [backend_module.__file__] if getattr(backend_module, '__file__', None) else []
+        self.profile = CallProfile(trace, skip_files)
+        for name in Backend.scene_commands + bulk_methods:
+            profiled = self.profile.wrap(name, getattr(self.backend, name))
+            setattr(self.backend, name, profiled)
+            setattr(self, name, profiled)
+
+    def command_buffer(self):
+        buffer = self.backend.command_buffer()
+        buffer.flush = self.profile.wrap('command_buffer.flush', buffer.flush)
+        return buffer
@@ -0,0 +1,171 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Machine readable conversion reports: per node timings of every phase, counts per category and
+failure reasons, exported as json or csv to compare conversions between scenes and tool versions.
+This module must not import maya.
+"""
+
+import csv
+import json
+import time
+
+timer = getattr(time, 'perf_counter', time.time)
+
+# set and connect time the queueing of the commands, flush their run: they run together in one buffer,
+# each node gets an estimate, the flush time split by its number of commands
+PHASES = ('snapshot', 'create', 'set', 'connect', 'swap', 'flush')
+ESTIMATED_PHASES = ('flush',)
+
+STATUS_CONVERTED = 'converted'
+STATUS_FAILED = 'failed'
+STATUS_PLANNED = 'planned'
+
+
+class NodeReport(object):
+    __slots__ = ('node', 'node_type', 'target_type', 'category', 'status', 'timings', 'failures')
+
+    def __init__(self, node, node_type=None, target_type=None, category=None):
+        self.node = node
+        self.node_type = node_type
+        self.target_type = target_type
+        self.category = category
+        self.status = STATUS_PLANNED
+        self.timings = dict((phase, 0.0) for phase in PHASES)
+        # [reason, attribute, error]
+        self.failures = []
+
+    def total(self):
+        return sum(self.timings.values())
+
+    def to_dict(self):
+        data = dict((key, getattr(self, key)) for key in self.__slots__)
+        data['timings'] = dict(self.timings)
+        data['total'] = self.total()
+        return data
+
+
+class ConversionReport(object):
+
+    def __init__(self, rules_name=''):
+        self.rules_name = rules_name
+        self.created = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.nodes = {}
+        self.order = []
+        # [reason, attribute, error] that do not belong to a node, e.g. connections of unmapped attributes
+        self.failures = []
+        # values left at the defaults of the new nodes
+        self.skipped_values = 0
+
+    def __repr__(self):
+        return 'ConversionReport({0}, {1} nodes)'.format(self.rules_name, len(self.nodes))
+
+    def node(self, node, node_type=None, target_type=None, category=None):
+        node_report = self.nodes.get(node)
+        if node_report is None:
+            node_report = NodeReport(node, node_type, target_type, category)
+            self.nodes[node] = node_report
+            self.order.append(node)
+        else:
+            node_report.node_type = node_type or node_report.node_type
+            node_report.target_type = target_type or node_report.target_type
+            node_report.category = category or node_report.category
+        return node_report
+
+    def add_time(self, node, phase, seconds):
+        self.node(node).timings[phase] += seconds
+
+    def add_failure(self, node, reason, attribute=None, error=None):
+        """error is the message maya gave, when there is one."""
+        if node is None:
+            self.failures.append([reason, attribute, error])
+        else:
+            self.node(node).failures.append([reason, attribute, error])
+
+    def set_status(self, node, status):
+        self.node(node).status = status
+
+    def category_counts(self):
+        counts = {}
+        for node_report in self.nodes.values():
+            category = counts.setdefault(node_report.category or 'other',
+                                         {STATUS_CONVERTED: 0, STATUS_FAILED: 0, STATUS_PLANNED: 0,
+                                          'failed_attributes': 0})
+            category[node_report.status] += 1
+            category['failed_attributes'] += len([f for f in node_report.failures if f[1] is not None])
+        return counts
+
+    def phase_totals(self):
+        totals = dict((phase, 0.0) for phase in PHASES)
+        for node_report in self.nodes.values():
+            for phase, seconds in node_report.timings.items():
+                totals[phase] += seconds
+        return totals
+
+    def type_timings(self):
+        """Total and mean seconds per source node type, slowest first."""
+        types = {}
+        for node_report in self.nodes.values():
+            entry = types.setdefault(node_report.node_type, {'node_type': node_report.node_type, 'count': 0,
+                                                             'total': 0.0})
+            entry['count'] += 1
+            entry['total'] += node_report.total()
+        result = sorted(types.values(), key=lambda entry: entry['total'], reverse=True)
+        for entry in result:
+            entry['mean'] = entry['total'] / entry['count']
+        return result
+
+    def failure_reasons(self):
+        reasons = {}
+        for node_report in self.nodes.values():
+            for failure in node_report.failures:
+                reasons[failure[0]] = reasons.get(failure[0], 0) + 1
+        for failure in self.failures:
+            reasons[failure[0]] = reasons.get(failure[0], 0) + 1
+        return reasons
+
+    def to_dict(self):
+        return {'rules': self.rules_name,
+                'created': self.created,
+                'phases': self.phase_totals(),
+                'estimated_phases': list(ESTIMATED_PHASES),
+                'categories': self.category_counts(),
+                'types': self.type_timings(),
+                'failure_reasons': self.failure_reasons(),
+                'failures': list(self.failures),
+                'skipped_values': self.skipped_values,
+                'nodes': [self.nodes[node].to_dict() for node in self.order]}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), sort_keys=True, indent=4, separators=(',', ': '))
+
+    def save_json(self, file_path):
+        with open(file_path, 'w') as outfile:
+            outfile.write(self.to_json())
+
+    def save_csv(self, file_path):
+        """One row per node with its timings and failure count, the columns of estimated timings say so."""
+        phase_columns = [phase + ' (estimate)' if phase in ESTIMATED_PHASES else phase for phase in PHASES]
+        columns = ['node', 'node_type', 'target_type', 'category', 'status'] + phase_columns + ['total', 'failures']
+        with open(file_path, 'w') as outfile:
+            writer = csv.writer(outfile, lineterminator='\n')
+            writer.writerow(columns)
+            for node in self.order:
+                node_report = self.nodes[node]
+                row = [node_report.node, node_report.node_type, node_report.target_type, node_report.category,
+                       node_report.status]
+                row.extend('{0:.6f}'.format(node_report.timings[phase]) for phase in PHASES)
+                row.append('{0:.6f}'.format(node_report.total()))
+                row.append(len(node_report.failures))
+                writer.writerow(row)
@@ -0,0 +1,298 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Compiled rules files, built once per file and shared by every conversion path.
+This module must not import maya so it can be used outside of Maya.
+"""
+
+import json
+import os
+
+FACTOR_IDENTITY = 'identity'
+FACTOR_INVERSE = 'inverse'
+FACTOR_OVERRIDE = 'override'
+FACTOR_MULTIPLY = 'multiply'
+
+# factor column values as written by the Editor
+INVERSE_FACTOR = 'Inverse'
+MULTIPLY_PREFIX = '*'
+
+# the name of  render engines differs from their plugins, so this needs to be edited if adding new renderer
+render_engines_dic = {'arnold': 'mtoa', 'vray': 'vrayformaya', 'renderman': 'RenderMan_for_Maya',
+                      'redshift': 'redshift4maya'}
+
+ignore_attributes = ['message', 'caching', 'frozen', 'isHistoricallyInteresting', 'nodeState', 'binMembership',
+                     'lightData', 'iconName']
+compound_types = ['float3', 'double3', 'float2', 'double2']
+# suffixes maya gives to the children of compounds, by channel
+channel_suffixes = ['RGB', 'XYZ']
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# process wide caches, rules files are compiled once and reused until they change on disk
+_rules_cache = {}
+_filenames_cache = {}
+
+
+def isfloat(value):
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
+
+
+def classify_factor(factor):
+    """Returns (kind, value) for the factor column of a rule entry, a number or its text."""
+    if factor is None or factor == '':
+        return FACTOR_IDENTITY, None
+    # json rules files may hold overrides as numbers
+    factor = str(factor)
+    if factor == INVERSE_FACTOR:
+        return FACTOR_INVERSE, None
+    if factor.startswith(MULTIPLY_PREFIX) and isfloat(factor[len(MULTIPLY_PREFIX):]):
+        return FACTOR_MULTIPLY, float(factor[len(MULTIPLY_PREFIX):])
+    if isfloat(factor):
+        return FACTOR_OVERRIDE, float(factor)
+    return FACTOR_IDENTITY, None
+
+
+def unpack_value(value):
+    """getAttr returns compound values as [(x, y, z)], this returns the bare tuple."""
+    if isinstance(value, list) and len(value) == 1 and isinstance(value[0], tuple):
+        return value[0]
+    return value
+
+
+class AttributeRule(object):
+    __slots__ = ('source', 'target', 'type', 'factor', 'factor_kind', 'factor_value', 'compound')
+
+    def __init__(self, source, target, attr_type, factor):
+        self.source = source
+        self.target = target
+        self.type = attr_type
+        self.factor = factor
+        self.factor_kind, self.factor_value = classify_factor(factor)
+        self.compound = attr_type in compound_types
+
+    def __repr__(self):
+        return 'AttributeRule({0!r} -> {1!r}, {2}, {3})'.format(self.source, self.target, self.type,
+                                                              self.factor_kind)
+
+    def convert_value(self, value):
+        """Applies the factor to a static value, compound values are given as tuples."""
+        if self.compound:
+            if not isinstance(value, (list, tuple)):
+                return value
+            return tuple(self.convert_scalar(v) for v in value)
+        return self.convert_scalar(value)
+
+    def convert_scalar(self, value):
+        kind = self.factor_kind
+        if kind == FACTOR_IDENTITY:
+            return value
+        if kind == FACTOR_OVERRIDE:
+            return self.factor_value
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return value
+        if kind == FACTOR_INVERSE:
+            return abs(1 - value) if isinstance(value, float) else value
+        return value * self.factor_value
+
+    def to_list(self):
+        return [self.target, self.type, self.factor]
+
+
+class NodeRule(object):
+    __slots__ = ('source_type', 'target_type', 'attributes', 'covered')
+
+    def __init__(self, source_type, target_type, attributes):
+        self.source_type = source_type
+        self.target_type = target_type
+        self.attributes = attributes
+        # {child: parent} of the children whose values the rule of their compound already converts
+        self.covered = covered_children(attributes)
+
+    def value_attributes(self, attributes=None):
+        """The attributes whose values are read and set, the covered children go with their compound."""
+        if attributes is None:
+            attributes = self.attributes
+        return [name for name in attributes if name not in self.covered]
+
+    def __repr__(self):
+        return 'NodeRule({0!r} -> {1!r}, {2} attributes)'.format(self.source_type, self.target_type,
+                                                                 len(self.attributes))
+
+    def attribute(self, name):
+        return self.attributes.get(name)
+
+
+class RuleSet(object):
+
+    def __init__(self, data, path=None):
+        self.path = path
+        self.engines = list(data.get('Engines', ['', '']))
+        self.source_engine = self.engines[0]
+        self.target_engine = self.engines[1]
+        self.nodes = {}
+        for source_type, entries in data.items():
+            if source_type == 'Engines':
+                continue
+            self.nodes[source_type] = compile_node(source_type, entries)
+
+    def __repr__(self):
+        return 'RuleSet({0} -> {1}, {2} node types)'.format(self.source_engine, self.target_engine,
+                                                           len(self.nodes))
+
+    def __contains__(self, node_type):
+        return node_type in self.nodes
+
+    @classmethod
+    def from_file(cls, file_path):
+        with open(file_path) as json_file:
+            return cls(json.load(json_file), path=file_path)
+
+    def node(self, node_type):
+        return self.nodes.get(node_type)
+
+    def target_type(self, node_type):
+        node_rule = self.nodes.get(node_type)
+        if node_rule is not None:
+            return node_rule.target_type
+        return
+
+    def attribute(self, node_type, attribute):
+        node_rule = self.nodes.get(node_type)
+        if node_rule is not None:
+            return node_rule.attributes.get(attribute)
+        return
+
+    def to_dict(self):
+        data = {'Engines': list(self.engines)}
+        for source_type, node_rule in self.nodes.items():
+            entries = {source_type: node_rule.target_type}
+            for name, rule in node_rule.attributes.items():
+                entries[name] = rule.to_list()
+            data[source_type] = entries
+        return data
+
+
+def channel_index(parent, child):
+    """The channel of a compound a child name stands for, e.g. ('color', 'colorG') -> 1, None for other names."""
+    if len(child) != len(parent) + 1 or not child.startswith(parent):
+        return None
+    for suffixes in channel_suffixes:
+        if child[-1] in suffixes:
+            return suffixes.index(child[-1])
+    return None
+
+
+def covered_children(attributes):
+    """
+    {child: parent} of the child rules a compound rule makes redundant for values: the child maps to the
+    same channel of the compound target with the same factor. Children mapped anywhere else, e.g.
+    normalCameraX -> bumpMapB, keep their own value.
+    """
+    covered = {}
+    for name, rule in attributes.items():
+        if not rule.compound or not rule.target:
+            continue
+        for suffixes in channel_suffixes:
+            for index, suffix in enumerate(suffixes[:int(rule.type[-1])]):
+                child = attributes.get(name + suffix)
+                if child is None or child.compound or channel_index(rule.target, child.target) != index:
+                    continue
+                if (child.factor_kind, child.factor_value) == (rule.factor_kind, rule.factor_value):
+                    covered[child.source] = name
+    return covered
+
+
+def compile_node(source_type, entries):
+    target_type = entries.get(source_type)
+    attributes = {}
+    for name, entry in entries.items():
+        if name == source_type or name in ignore_attributes:
+            continue
+        target, attr_type, factor = (list(entry) + ['', '', ''])[:3]
+        attributes[name] = AttributeRule(name, target, attr_type, factor)
+    return NodeRule(source_type, target_type, attributes)
+
+
+def file_key(file_path):
+    stat = os.stat(file_path)
+    return stat.st_mtime, stat.st_size
+
+
+def rules_path(rules_name):
+    """The file of a rules name of the Rules folder, a path to a rules file is returned as it is."""
+    if os.path.isfile(rules_name):
+        return rules_name
+    return os.path.join(script_dir, 'Rules', rules_name + '.json')
+
+
+def load_rules(file_path):
+    """Returns the compiled rule set of a rules file, compiling it only when the file changed."""
+    file_path = os.path.normcase(os.path.abspath(file_path))
+    key = file_key(file_path)
+    cached = _rules_cache.get(file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    rules = RuleSet.from_file(file_path)
+    _rules_cache[file_path] = (key, rules)
+    return rules
+
+
+def directories_changed(directories):
+    """True when one of the {directory: mtime} was modified or removed since."""
+    for directory, mtime in directories.items():
+        try:
+            if os.stat(directory).st_mtime != mtime:
+                return True
+        except OSError:
+            return True
+    return False
+
+
+def list_rules(directory):
+    """
+    Returns the names of the rules files found under directory. They are cached on the mtimes of all
+    the folders walked, a file added in a subfolder changes only the mtime of that subfolder.
+    """
+    directory = os.path.normcase(os.path.abspath(directory))
+    cached = _filenames_cache.get(directory)
+    if cached is not None and not directories_changed(cached[0]):
+        return list(cached[1])
+    key = {}
+    file_list = []
+    for root_paths, _, file_names in os.walk(directory):
+        key[root_paths] = os.stat(root_paths).st_mtime
+        for f in file_names:
+            file_name, extension = os.path.splitext(f)
+            if extension == '.json':
+                file_list.append(file_name)
+    _filenames_cache[directory] = (key, file_list)
+    return list(file_list)
+
+
+def invalidate_rules(file_path=None):
+    """Drops a rules file from the caches, or everything when no file is given."""
+    if file_path is None:
+        _rules_cache.clear()
+        _filenames_cache.clear()
+        return
+    file_path = os.path.normcase(os.path.abspath(file_path))
+    _rules_cache.pop(file_path, None)
+    for directory in list(_filenames_cache):
+        if file_path.startswith(os.path.join(directory, '')):
+            del _filenames_cache[directory]
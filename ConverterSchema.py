@@ -0,0 +1,223 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+
+"""
+Attribute schemas of node types: the type, short name, children, enum fields, message flag and default
+value of their attributes, queried once per node type and version and kept on disk between sessions.
+A node type is versioned by its plugin, or by maya for the types of maya itself, a schema saved for
+another version is queried again. The file is read once, on the first lookup.
+
+    SCENE_CONVERTER_SCHEMA=/path/to/attribute_schema.json  moves the file, from Cache next to this module
+
+This module must not import maya, the queries go through the scene backend.
+"""
+
+import json
+import os
+import tempfile
+
+import ConverterLog as Log
+
+SCHEMA_FORMAT = 1
+script_dir = os.path.dirname(os.path.abspath(__file__))
+logger = Log.logger
+
+
+def default_path():
+    return os.environ.get('SCENE_CONVERTER_SCHEMA') or os.path.join(script_dir, 'Cache', 'attribute_schema.json')
+
+
+def query_default(backend, node_type, attribute):
+    """The default value as a number, a list for compounds, None for the attributes without one (strings...)."""
+    try:
+        default = backend.attributeQuery(attribute, type=node_type, listDefault=True)
+    except RuntimeError:
+        return None
+    if not default:
+        return None
+    return default[0] if len(default) == 1 else list(default)
+
+
+def query_attribute(backend, node_type, attribute):
+    """The schema record of an attribute, raises RuntimeError when the node type has no such attribute."""
+    attr_type = backend.attributeQuery(attribute, type=node_type, attributeType=True)
+    enum = None
+    if attr_type == 'enum':
+        enum = backend.attributeQuery(attribute, type=node_type, listEnum=True)
+    return {'type': attr_type,
+            'short': backend.attributeQuery(attribute, type=node_type, shortName=True),
+            'children': list(backend.attributeQuery(attribute, type=node_type, listChildren=True) or []),
+            'enum': list(enum) if enum else None,
+            'message': attr_type == 'message',
+            'default': query_default(backend, node_type, attribute)}
+
+
+def is_default(value, default, tolerance=1e-6):
+    """True when a value to set equals a default value, numbers and lists of numbers only."""
+    if default is None or value is None:
+        return False
+    if isinstance(value, (list, tuple)) or isinstance(default, (list, tuple)):
+        if not isinstance(value, (list, tuple)) or not isinstance(default, (list, tuple)) or \
+                len(value) != len(default):
+            return False
+        return all(is_default(v, d, tolerance) for v, d in zip(value, default))
+    if not isinstance(value, (bool, int, float)) or not isinstance(default, (bool, int, float)):
+        return False
+    return abs(value - default) <= tolerance * max(1.0, abs(default))
+
+
+def load_defaults(file_path):
+    """{node type: {attribute: default}} of a schema file whatever the versions, for ConverterOffline."""
+    cache = SchemaCache(file_path)
+    defaults = {}
+    for node_type, entry in cache.load().items():
+        type_defaults = dict((attribute, record['default']) for attribute, record in entry['attributes'].items()
+                             if record.get('default') is not None)
+        if type_defaults:
+            defaults[node_type] = type_defaults
+    return defaults
+
+
+def replace_file(source, destination):
+    """os.replace, which Python 2 lacks: os.rename there, it does not overwrite on Windows."""
+    replace = getattr(os, 'replace', None)
+    if replace is not None:
+        replace(source, destination)
+        return
+    if os.name == 'nt' and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+
+def load_aliases(file_path):
+    """{node type: {short name: long name}} of a schema file, like the aliases of ConverterOffline."""
+    cache = SchemaCache(file_path)
+    aliases = {}
+    for node_type, entry in cache.load().items():
+        aliases[node_type] = dict((record['short'], attribute) for attribute, record in entry['attributes'].items()
+                                  if record.get('short') and record['short'] != attribute)
+    return aliases
+
+
+class SchemaCache(object):
+    """
+    {node type: {'version', 'all', 'own', 'attributes': {attribute: record}}}, filled as the types are
+    looked up. Without file_path the schemas live in memory only, e.g. for ConverterFake scenes.
+    """
+
+    def __init__(self, file_path=None):
+        self.file_path = file_path
+        self.types = None
+        self.changed = False
+        # cleared since the last save, the file is then replaced rather than merged
+        self.cleared = False
+
+    def __repr__(self):
+        return 'SchemaCache({0}, {1} types)'.format(self.file_path, len(self.load()))
+
+    def load(self):
+        if self.types is None:
+            self.types = self.read()
+        return self.types
+
+    def read(self):
+        """The schemas saved in the file, {} when it is missing or unreadable."""
+        if not self.file_path or not os.path.isfile(self.file_path):
+            return {}
+        try:
+            with open(self.file_path) as json_file:
+                data = json.load(json_file)
+        except (IOError, OSError, ValueError) as error:
+            logger.warning('Ignored the attribute schema cache %s: %s', self.file_path, error)
+            return {}
+        if data.get('format') != SCHEMA_FORMAT:
+            return {}
+        return data.get('types', {})
+
+    def merge(self, types):
+        """Adds the schemas of types saved meanwhile by another process, the loaded ones win."""
+        for node_type, saved in types.items():
+            entry = self.types.get(node_type)
+            if entry is None:
+                self.types[node_type] = saved
+            elif entry['version'] == saved.get('version'):
+                for key in ('all', 'own'):
+                    if entry[key] is None:
+                        entry[key] = saved.get(key)
+                for attribute, record in saved.get('attributes', {}).items():
+                    entry['attributes'].setdefault(attribute, record)
+
+    def save(self):
+        """
+        Writes the schemas when they changed since the last save, returns True when written. Maya
+        workers share the file, it is merged with what they saved and replaced in one move so a
+        reader never sees it half written.
+        """
+        if not self.changed or not self.file_path:
+            return False
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        try:
+            if not self.cleared:
+                self.merge(self.read())
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            handle, temp_path = tempfile.mkstemp(suffix='.tmp', prefix='attribute_schema', dir=directory)
+            try:
+                with os.fdopen(handle, 'w') as outfile:
+                    json.dump({'format': SCHEMA_FORMAT, 'types': self.types}, outfile, sort_keys=True)
+                replace_file(temp_path, self.file_path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+        except Exception as error:
+            # a cache that can not be written never stops a conversion
+            logger.warning('Could not save the attribute schema cache %s: %s', self.file_path, error)
+            return False
+        self.changed = False
+        self.cleared = False
+        return True
+
+    def clear(self):
+        self.types = {}
+        self.changed = True
+        self.cleared = True
+
+    def type_entry(self, node_type, version):
+        types = self.load()
+        entry = types.get(node_type)
+        if entry is None or entry.get('version') != version:
+            entry = types[node_type] = {'version': version, 'all': None, 'own': None, 'attributes': {}}
+            self.changed = True
+        return entry
+
+    def attribute(self, backend, node_type, version, attribute):
+        entry = self.type_entry(node_type, version)
+        record = entry['attributes'].get(attribute)
+        if record is None:
+            record = entry['attributes'][attribute] = query_attribute(backend, node_type, attribute)
+            self.changed = True
+        return record
+
+    def attribute_names(self, backend, node_type, version, inherited=True):
+        """The attributes of a node type, attributeInfo(leaf=False), only its own ones when not inherited."""
+        entry = self.type_entry(node_type, version)
+        key = 'all' if inherited else 'own'
+        if entry[key] is None:
+            if inherited:
+                names = backend.attributeInfo(leaf=False, type=node_type)
+            else:
+                names = backend.attributeInfo(inherited=False, leaf=False, logicalAnd=True, type=node_type)
+            entry[key] = list(names or [])
+            self.changed = True
+        return entry[key]
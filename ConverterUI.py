@@ -30,6 +30,7 @@ except ImportError:
 
 import Converter as Conv
 reload(Conv)
+import ConverterRules as Rules
 
 script_dir = os.path.dirname(__file__)
 
@@ -474,6 +475,7 @@ class EditorUI(QtWidgets.QWidget):
                                 child_attribute_item = QtWidgets.QTreeWidgetItem([child_attribute, 'float'])
                                 item.addChild(child_attribute_item)
                                 child_attribute_item.setHidden(True)
+        self.Converter.save_schema()
 
         self.resize_trees(tree_widget)
 
@@ -671,10 +673,10 @@ class EditorUI(QtWidgets.QWidget):
                 item.setText(3, str(value))
 
     def add_multiply(self):
-        value, ok_pressed = QtWidgets.QInputDialog.getDouble(self, "Enter Value", "Multiply:", 0, 0, 100, 2)
+        value, ok_pressed = QtWidgets.QInputDialog.getDouble(self, "Enter Value", "Multiply:", 1, -10000, 10000, 4)
         if ok_pressed:
             for item in self.render_tree.selectedItems():
-                item.setText(3, str(value))
+                item.setText(3, Rules.MULTIPLY_PREFIX + str(value))
 
     def remove_override(self):
         for item in self.render_tree.selectedItems():
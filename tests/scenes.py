@@ -0,0 +1,82 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""A small rule set and the ConverterFake scenes of the tests."""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Converter  # noqa: E402
+import ConverterFake  # noqa: E402
+import ConverterRules as Rules  # noqa: E402
+
+RULES = {
+    'Engines': ['mayaSoftware', 'mayaSoftware'],
+    'srcMat': {'srcMat': 'dstMat',
+               'color': ['baseColor', 'float3', ''],
+               'colorR': ['baseColorR', 'float', ''],
+               'colorG': ['baseColorG', 'float', ''],
+               'colorB': ['baseColorB', 'float', ''],
+               'transparency': ['opacity', 'float3', 'Inverse'],
+               'rough': ['roughness', 'float', 'Inverse'],
+               'gloss': ['glossiness', 'float', 'Inverse'],
+               'gain': ['weight', 'float', '*2'],
+               'spec': ['specular', 'float', '0.5'],
+               'outColor': ['outColor', 'float3', '']},
+    'srcTex': {'srcTex': 'dstTex',
+               'color': ['color', 'float3', ''],
+               'outColor': ['outColor', 'float3', ''],
+               'outColorR': ['outColorR', 'float', ''],
+               'outAlpha': ['outAlpha', 'float', '']},
+    'srcBroken': {'srcBroken': '',
+                  'outColor': ['outColor', 'float3', '']},
+}
+CATEGORIES = {'srcMat': 'shader/surface', 'dstMat': 'shader/surface', 'srcTex': 'texture/2d',
+              'dstTex': 'texture/2d', 'srcBroken': 'texture/2d'}
+
+
+def new_scene(rules):
+    return ConverterFake.register_rules_types(ConverterFake.FakeScene(), rules, CATEGORIES)
+
+
+def load_scene(file_path, rules, aliases=None):
+    """A .ma file read in a scene knowing the types of the rules."""
+    return ConverterFake.load_maya_ascii(file_path, aliases, new_scene(rules))
+
+
+def add_material(scene, name):
+    material = scene.createNode('srcMat', name=name)
+    shading_engine = scene.createNode('shadingEngine', name=name + 'SG')
+    scene.connectAttr(material + '.outColor', shading_engine + '.surfaceShader')
+    return material
+
+
+def step_of(plan, node):
+    return [step for step in plan.steps if step.node == node][0]
+
+
+class FakeSceneTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = Rules.RuleSet(RULES)
+        self.scene = new_scene(self.rules)
+        self.converter = Converter.ConverterClass(backend=self.scene)
+
+    def plan(self, nodes):
+        return self.converter.plan_nodes(self.rules, nodes, 'test')
+
+    def convert(self, nodes):
+        return self.converter.execute_plan(self.plan(nodes))
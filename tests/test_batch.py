@@ -0,0 +1,109 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The output paths and the process pools of ConverterBatch, in offline mode."""
+
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import RULES
+
+import ConverterBatch as Batch
+import ConverterRules as Rules
+
+SCENE = '''//Maya ASCII 2020 scene
+requires maya "2020";
+createNode srcMat -n "mtl";
+\tsetAttr ".rough" 0.25;
+'''
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rules_path = self.write('rules.json', json.dumps(RULES))
+        self.aliases_path = self.write('aliases.json', json.dumps({'srcMat': {}}))
+        self.files = [self.write(os.path.join('shots', shot, 'scene.ma'), SCENE) for shot in ('a', 'b')]
+        self.pool = Batch.ProcessPoolExecutor, Batch.as_completed
+        # no schema cache of the user
+        self.schema_path = os.environ.get('SCENE_CONVERTER_SCHEMA')
+        os.environ['SCENE_CONVERTER_SCHEMA'] = os.path.join(self.directory, 'attribute_schema.json')
+
+    def tearDown(self):
+        Batch.ProcessPoolExecutor, Batch.as_completed = self.pool
+        if self.schema_path is None:
+            del os.environ['SCENE_CONVERTER_SCHEMA']
+        else:
+            os.environ['SCENE_CONVERTER_SCHEMA'] = self.schema_path
+        shutil.rmtree(self.directory)
+
+    def write(self, name, text):
+        file_path = os.path.join(self.directory, name)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with io.open(file_path, 'w', newline='\n') as text_file:
+            text_file.write(text)
+        return file_path
+
+    def convert(self, files, **kwargs):
+        return Batch.convert_files(files, self.rules_path, aliases_path=self.aliases_path, workers=2, **kwargs)
+
+    def test_rules_path(self):
+        self.assertEqual(Rules.rules_path(self.rules_path), self.rules_path)
+        self.assertEqual(os.path.basename(Rules.rules_path('vray_To_arnold')), 'vray_To_arnold.json')
+
+    def test_output_keeps_relative_folders(self):
+        output_dir = os.path.join(self.directory, 'converted')
+        records = self.convert(self.files, output_dir=output_dir)
+        self.assertEqual([r['error'] for r in records], [None, None])
+        self.assertEqual([r['output'] for r in records],
+                         [os.path.join(output_dir, 'a', 'scene.ma'), os.path.join(output_dir, 'b', 'scene.ma')])
+        self.assertEqual([r['converted_nodes'] for r in records], [['mtl'], ['mtl']])
+        scene = scenes.load_scene(records[0]['output'], Rules.RuleSet(RULES))
+        self.assertEqual(scene.nodeType('mtl'), 'dstMat')
+
+    def test_output_next_to_sources(self):
+        records = self.convert(self.files)
+        self.assertEqual([r['output'] for r in records],
+                         [os.path.join(os.path.dirname(f), 'scene_converted.ma') for f in self.files])
+
+    def test_collisions_are_refused(self):
+        # a source named like the converted file of another one
+        self.write(os.path.join('shots', 'a', 'scene_converted.ma'), SCENE)
+        with self.assertRaises(ValueError):
+            self.convert(os.path.join(self.directory, 'shots', 'a', '*.ma'))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'shots', 'a', 'scene_converted_converted.ma')))
+
+    def test_binary_files_fail_offline(self):
+        binary_path = self.write(os.path.join('shots', 'c', 'scene.mb'), 'binary')
+        records = self.convert(self.files + [binary_path], output_dir=os.path.join(self.directory, 'converted'))
+        self.assertEqual([bool(r['error']) for r in records], [False, False, True])
+        self.assertIn('.mb', records[2]['error'])
+        self.assertEqual(Batch.summary(records)['failed_files'], 1)
+
+    def test_multiprocessing_pool(self):
+        # the pool of Python 2, without concurrent.futures
+        Batch.ProcessPoolExecutor = Batch.as_completed = None
+        records = self.convert(self.files, output_dir=os.path.join(self.directory, 'converted'))
+        self.assertEqual([r['error'] for r in records], [None, None])
+        self.assertEqual([r['converted_nodes'] for r in records], [['mtl'], ['mtl']])
+
+
+if __name__ == '__main__':
+    unittest.main()
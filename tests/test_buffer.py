@@ -0,0 +1,83 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The MEL generated by the command buffers and the errors of their failed commands."""
+
+import unittest
+
+import scenes  # noqa: F401, puts the modules on the path
+
+import ConverterBuffer as Buffer
+import ConverterFake
+
+
+class MelCommandBufferTest(unittest.TestCase):
+
+    def test_code(self):
+        buffer = Buffer.MelCommandBuffer(None)
+        buffer.set_attr('mtl.baseColor', [0.2, 0.5, 1], 'float3')
+        buffer.set_attr('file1.fileTextureName', 'C:\\tex "a".png', 'string')
+        buffer.set_attr('mtl.thin', True)
+        buffer.connect_attr('tex.outColor', 'mtl.baseColor')
+        self.assertEqual(buffer.code().split('\n'), [
+            'global proc int[] sceneConverterFlush()',
+            '{',
+            '    int $failed[];',
+            '    if (catchQuiet(`setAttr -type "float3" "mtl.baseColor" 0.2 0.5 1`)) $failed[size($failed)] = 0;',
+            '    if (catchQuiet(`setAttr -type "string" "file1.fileTextureName" "C:\\\\tex \\"a\\".png"`)) '
+            '$failed[size($failed)] = 1;',
+            '    if (catchQuiet(`setAttr "mtl.thin" 1`)) $failed[size($failed)] = 2;',
+            '    if (catchQuiet(`connectAttr -f "tex.outColor" "mtl.baseColor"`)) $failed[size($failed)] = 3;',
+            '    return $failed;',
+            '}',
+            'sceneConverterFlush();'])
+
+    def test_flush_returns_errors(self):
+        scene = ConverterFake.FakeScene()
+        scene.createNode('lambert', name='mtl')
+        evaluated = []
+
+        def evaluate(code):
+            evaluated.append(code)
+            return [1]
+        buffer = Buffer.MelCommandBuffer(evaluate, set_attr=scene.setAttr, connect_attr=scene.connectAttr)
+        buffer.set_attr('mtl.diffuse', 0.5, tag='ok')
+        buffer.set_attr('mtl.missing', 0.5, tag='missing')
+        # the failed command runs again on its own for its error
+        self.assertEqual(buffer.flush(), [('ok', None), ('missing', 'No object matches name: mtl.missing')])
+        self.assertEqual(len(evaluated), 1)
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(buffer.flush(), [])
+
+    def test_flush_without_functions(self):
+        buffer = Buffer.MelCommandBuffer(lambda code: [0])
+        buffer.connect_attr('a.b', 'c.d', tag='tag')
+        self.assertEqual(buffer.flush(), [('tag', 'failed in sceneConverterFlush')])
+
+
+class CallCommandBufferTest(unittest.TestCase):
+
+    def test_flush(self):
+        scene = ConverterFake.FakeScene()
+        scene.createNode('lambert', name='mtl')
+        buffer = scene.command_buffer()
+        buffer.set_attr('mtl.color', [0.1, 0.2, 0.3], 'float3', tag=0)
+        buffer.set_attr('mtl.missing', 1, tag=1)
+        self.assertFalse(buffer.is_full())
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.flush(), [(0, None), (1, 'No object matches name: mtl.missing')])
+        self.assertEqual(scene.getAttr('mtl.color'), [(0.1, 0.2, 0.3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
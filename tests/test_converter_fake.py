@@ -0,0 +1,193 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Behaviour of the ConverterFake scene the other tests convert, compared with what maya.cmds does:
+
+    python -m pytest -q tests
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import RULES, add_material
+
+import ConverterFake
+import ConverterRules as Rules
+
+
+class FakeSceneTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = Rules.RuleSet(RULES)
+        self.scene = scenes.new_scene(self.rules)
+
+    def test_default_nodes(self):
+        self.assertEqual(self.scene.ls(dn=True, mat=True), ['lambert1', 'particleCloud1'])
+        self.assertEqual(self.scene.getAttr('defaultRenderGlobals.currentRenderer'), 'mayaSoftware')
+
+    def test_unique_names(self):
+        self.assertEqual(self.scene.createNode('srcMat', name='mtl'), 'mtl')
+        self.assertEqual(self.scene.createNode('srcMat', name='mtl'), 'mtl1')
+        self.assertEqual(self.scene.createNode('srcMat'), 'srcMat1')
+        self.assertEqual(self.scene.rename('mtl1', 'renamed'), 'renamed')
+        self.assertEqual(self.scene.rename('renamed', 'mtl'), 'mtl1')
+        with self.assertRaises(RuntimeError):
+            self.scene.createNode('unknownType')
+
+    def test_values(self):
+        material = self.scene.createNode('srcMat', name='mtl')
+        self.assertEqual(self.scene.getAttr(material + '.color'), [(0.0, 0.0, 0.0)])
+        self.scene.setAttr(material + '.color', 0.2, 0.3, 0.4)
+        self.assertEqual(self.scene.getAttr(material + '.colorG'), 0.3)
+        self.scene.setAttr(material + '.color', (0.5, 0.5, 0.5))
+        self.assertEqual(self.scene.getAttr(material + '.color'), [(0.5, 0.5, 0.5)])
+        with self.assertRaises(RuntimeError):
+            self.scene.setAttr(material + '.color', 0.5)
+        with self.assertRaises(ValueError):
+            self.scene.getAttr(material + '.unknown')
+
+    def test_connections(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.connectAttr(texture + '.outColor', material + '.color')
+        self.assertEqual(self.scene.listConnections('mtl.color', plugs=True), ['tex.outColor'])
+        self.assertEqual(self.scene.listConnections('mtl', source=False, connections=True, plugs=True),
+                         ['mtl.outColor', 'mtlSG.surfaceShader'])
+        self.assertEqual(self.scene.listConnections('mtl', type='shadingEngine'), ['mtlSG'])
+        # like maya, a connected attribute can not be set, and a second input needs force
+        with self.assertRaises(RuntimeError):
+            self.scene.setAttr('mtl.color', 0.5, 0.5, 0.5)
+        other = self.scene.createNode('srcTex', name='other')
+        with self.assertRaises(RuntimeError):
+            self.scene.connectAttr(other + '.outColor', 'mtl.color')
+        self.scene.connectAttr(other + '.outColor', 'mtl.color', force=True)
+        self.assertEqual(self.scene.listConnections('tex', plugs=True), [])
+        self.scene.disconnectAttr('other.outColor', 'mtl.color')
+        self.assertEqual(self.scene.listConnections('mtl.color'), [])
+
+    def test_next_available(self):
+        shading_engine = self.scene.createNode('shadingEngine', name='SG')
+        for name in ('a', 'b'):
+            mesh = self.scene.createNode('mesh', name=name)
+            self.scene.connectAttr(mesh + '.message', shading_engine + '.dagSetMembers', na=True)
+        self.assertEqual(self.scene.listConnections('SG.dagSetMembers', connections=True, plugs=True),
+                         ['SG.dagSetMembers[0]', 'a.message', 'SG.dagSetMembers[1]', 'b.message'])
+
+    def test_delete(self):
+        material = add_material(self.scene, 'mtl')
+        self.scene.select(material)
+        self.scene.delete(material)
+        self.assertEqual(self.scene.ls(type='srcMat'), [])
+        self.assertEqual(self.scene.ls(sl=True), [])
+        self.assertEqual(self.scene.listConnections('mtlSG.surfaceShader'), [])
+
+    def test_hierarchy(self):
+        transform = self.scene.shadingNode('pointLight', asLight=True, name='light')
+        self.assertEqual(self.scene.listRelatives(transform, shapes=True), ['lightShape'])
+        self.assertEqual(self.scene.listRelatives('lightShape', parent=True, fullPath=True), ['|light'])
+        self.assertEqual(self.scene.ls('lightShape', long=True), ['|light|lightShape'])
+        # the attributes of the shape given on its transform
+        self.scene.setAttr('light.intensity', 2.0)
+        self.assertEqual(self.scene.getAttr('lightShape.intensity'), 2.0)
+
+    def test_listing(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.createNode('srcBroken', name='broken')
+        self.assertEqual(self.scene.ls(mat=True), ['lambert1', 'particleCloud1', 'mtl'])
+        self.assertEqual(self.scene.ls(tex=True), ['tex', 'broken'])
+        self.assertEqual(self.scene.ls([material, texture, 'missing'], type='srcTex'), ['tex'])
+        self.scene.select(texture)
+        self.scene.select(material, add=True)
+        self.assertEqual(self.scene.ls(sl=True), ['tex', 'mtl'])
+        self.assertEqual(self.scene.ls([material, 'broken'], sl=True), ['mtl'])
+        self.assertEqual(self.scene.listNodeTypes('texture'), ['checker', 'dstTex', 'file', 'ramp', 'srcBroken',
+                                                                'srcTex'])
+
+    def test_plugins(self):
+        self.assertFalse(self.scene.pluginInfo('mtoa', query=True, loaded=True))
+        self.scene.load_plugin('mtoa', 'arnold')
+        self.assertTrue(self.scene.pluginInfo('mtoa', query=True, loaded=True))
+        self.assertIn('arnold', self.scene.renderer(query=True, namesOfAvailableRenderers=True))
+
+    def test_attribute_query(self):
+        self.assertEqual(self.scene.attributeQuery('color', type='srcMat', attributeType=True), 'float3')
+        self.assertEqual(self.scene.attributeQuery('color', type='srcMat', listChildren=True),
+                         ['colorR', 'colorG', 'colorB'])
+        self.assertEqual(self.scene.attributeQuery('color', type='lambert', shortName=True), 'c')
+        self.assertEqual(self.scene.attributeQuery('rough', type='srcMat', listDefault=True), [0.0])
+        self.assertTrue(self.scene.attributeQuery('message', type='srcMat', message=True))
+        self.assertFalse(self.scene.attributeQuery('unknown', type='srcMat', exists=True))
+        with self.assertRaises(RuntimeError):
+            self.scene.attributeQuery('unknown', type='srcMat', attributeType=True)
+
+
+class LoadMayaAsciiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'scene.ma')
+        with io.open(self.file_path, 'w', newline='\n') as scene_file:
+            scene_file.write('''//Maya ASCII 2020 scene
+requires maya "2020";
+requires "mtoa" "4.0";
+createNode transform -n "light";
+createNode pointLight -n "lightShape" -p "light";
+\tsetAttr ".in" 2;
+createNode lambert -n "mtl";
+\tsetAttr ".c" -type "float3" 0.2 0.3 0.4 ;
+createNode file -n "tex";
+\tsetAttr ".ftn" -type "string" "a;b.png";
+select -ne :lambert1;
+\tsetAttr ".dc" 0.5;
+connectAttr "tex.oc" "mtl.c";
+''')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load(self):
+        aliases = dict((node_type, dict((short, name) for name, short in ConverterFake.maya_short_names.items()))
+                       for node_type in ('lambert', 'file', 'pointLight'))
+        scene = ConverterFake.load_maya_ascii(self.file_path, aliases)
+        self.assertEqual(scene.listRelatives('light', shapes=True), ['lightShape'])
+        self.assertEqual(scene.getAttr('lightShape.intensity'), 2)
+        self.assertEqual(scene.getAttr('mtl.color'), [(0.2, 0.3, 0.4)])
+        self.assertEqual(scene.getAttr('tex.fileTextureName'), 'a;b.png')
+        # the default node is selected, not created again
+        self.assertEqual(scene.getAttr('lambert1.diffuse'), 0.5)
+        self.assertEqual(scene.ls(type='lambert'), ['lambert1', 'particleCloud1', 'mtl'])
+        self.assertEqual(scene.listConnections('mtl.color', plugs=True), ['tex.outColor'])
+        self.assertTrue(scene.pluginInfo('mtoa', query=True, loaded=True))
+
+    def test_generate_scene(self):
+        rules = Rules.RuleSet(RULES)
+        scene = ConverterFake.generate_scene(rules, materials=3, textures=1, utilities=0, lights=0, seed=1,
+                                             scene=scenes.new_scene(rules))
+        materials = scene.ls(type='srcMat')
+        self.assertEqual(len(materials), 3)
+        for material in materials:
+            self.assertEqual(len(scene.listConnections(material, type='shadingEngine')), 1)
+        again = ConverterFake.generate_scene(rules, materials=3, textures=1, utilities=0, lights=0, seed=1,
+                                             scene=scenes.new_scene(rules))
+        self.assertEqual([scene.getAttr(m + '.rough') for m in materials],
+                         [again.getAttr(m + '.rough') for m in materials])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""Execution of conversion plans when some of their steps fail."""
+
+import unittest
+
+import scenes
+from scenes import add_material
+
+
+class FailingStepTest(scenes.FakeSceneTestCase):
+
+    def setUp(self):
+        super(FailingStepTest, self).setUp()
+        self.material = add_material(self.scene, 'mtl')
+        self.texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.setAttr(self.material + '.color', 0.2, 0.3, 0.4)
+        self.scene.connectAttr(self.texture + '.outColor', self.material + '.color')
+        self.nodes = [(self.material, 'material'), (self.texture, 'texture')]
+
+    def fail_type(self, node_type, error):
+        """Makes the creation of node_type raise error."""
+        create_node = self.converter.create_node
+
+        def failing(target_type, category):
+            if target_type == node_type:
+                raise error
+            return create_node(target_type, category)
+        self.converter.create_node = failing
+
+    def test_exception_flushes_earlier_steps(self):
+        plan = self.plan(self.nodes)
+        # the texture is swapped first, the material then raises
+        self.fail_type('dstMat', RuntimeError('boom'))
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['converted_nodes'], ['tex'])
+        self.assertEqual(result['unconverted_nodes'], ['srcMat : mtl'])
+        self.assertEqual(result['report'].nodes['mtl'].failures, [['conversion failed', None, 'boom']])
+        # the material is kept with its value, its texture connection and its shading engine
+        self.assertEqual(self.scene.nodeType('mtl'), 'srcMat')
+        self.assertEqual(self.scene.getAttr('mtl.color'), [(0.2, 0.3, 0.4)])
+        self.assertEqual(self.scene.listConnections('mtl.color', plugs=True), ['tex.outColor'])
+        self.assertEqual(self.scene.listConnections('mtlSG.surfaceShader', plugs=True), ['mtl.outColor'])
+
+    def test_exception_does_not_lose_queued_values(self):
+        other = add_material(self.scene, 'other')
+        plan = self.plan(self.nodes + [(other, 'material')])
+        node_type = self.scene.node_type
+        # the last step raises after the material swapped, before its values are flushed
+
+        def failing(node):
+            if node.startswith('dstMat') and self.scene.nodes.get('mtl') and \
+                    self.scene.nodes['mtl'].node_type == 'dstMat':
+                raise RuntimeError('boom')
+            return node_type(node)
+        self.scene.node_type = failing
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['converted_nodes'], ['tex', 'mtl'])
+        self.assertEqual(self.scene.getAttr('mtl.baseColor'), [(0.2, 0.3, 0.4)])
+        self.assertEqual(self.scene.listConnections('mtl.baseColor', plugs=True), ['tex.outColor'])
+        self.assertEqual(self.scene.listConnections('mtlSG.surfaceShader', plugs=True), ['mtl.outColor'])
+
+    def test_failed_destination_keeps_its_connections(self):
+        plan = self.plan(self.nodes)
+        node_type = self.scene.node_type
+        self.scene.node_type = lambda node: 'unknown' if node.startswith('dstMat') else node_type(node)
+        result = self.converter.execute_plan(plan)
+        self.scene.node_type = node_type
+        self.assertEqual(result['unconverted_nodes'], ['srcMat : mtl'])
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(self.scene.nodeType('tex'), 'dstTex')
+        # the new texture is connected to the material left as it was
+        self.assertEqual(self.scene.listConnections('mtl.color', plugs=True), ['tex.outColor'])
+        self.assertEqual(self.scene.listConnections('mtlSG.surfaceShader', plugs=True), ['mtl.outColor'])
+
+    def test_failed_source_keeps_its_connections(self):
+        plan = self.plan(self.nodes)
+        self.fail_type('dstTex', RuntimeError('boom'))
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['unconverted_nodes'], ['srcTex : tex'])
+        self.assertEqual(result['unconverted_attributes'], [])
+        # the new material reads the texture left as it was through its scene plug
+        self.assertEqual(self.scene.nodeType('mtl'), 'dstMat')
+        self.assertEqual(self.scene.listConnections('mtl.baseColor', plugs=True), ['tex.outColor'])
+
+    def test_failed_commands_keep_their_error(self):
+        plan = self.plan(self.nodes)
+        plan.steps[-1].values.append(['missing', 1.0, None, 'missing'])
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['unconverted_attributes'], ['mtl.missing'])
+        self.assertEqual(result['report'].nodes['mtl'].failures,
+                         [['setAttr failed', 'missing', 'No object matches name: mtl.missing']])
+
+
+if __name__ == '__main__':
+    unittest.main()
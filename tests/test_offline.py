@@ -0,0 +1,217 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The statement reader and the offline converter of ConverterOffline, checked against ConverterFake scenes."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import RULES
+
+import Converter
+import ConverterOffline as Offline
+import ConverterRules as Rules
+import ConverterSchema as Schema
+
+
+PASSTHROUGH_SCENE = (b'//Maya ASCII 2020 scene\n// a comment; with a semicolon\nrequires maya "2020";\n'
+                     b'createNode transform -n "group";\n\tsetAttr ".name" -type "string" "a;b \\" c";\n'
+                     b'createNode mesh -n "meshShape" -p "group";\n\tsetAttr -s 4 ".vt[0:3]" ' +
+                     b' 0.5 0.25 1' * 20000 + b';\n// End of file\n')
+
+
+class StatementReaderTest(unittest.TestCase):
+
+    def read(self, data, chunk_size, max_statement=1 << 16):
+        statements = []
+        for statement in Offline.read_statements(io.BytesIO(data), chunk_size, max_statement):
+            statements.append((statement, statement.data + b''.join(statement.rest())))
+        return statements
+
+    def test_statements(self):
+        for chunk_size in (1, 7, 1 << 20):
+            statements = self.read(PASSTHROUGH_SCENE, chunk_size)
+            self.assertEqual([s.command() for s, _ in statements[:5]],
+                             [b'requires', b'createNode', b'setAttr', b'createNode', b'setAttr'])
+            # a ';' in a comment or a string does not end a statement
+            self.assertTrue(statements[0][1].endswith(b'requires maya "2020"'))
+            self.assertEqual(statements[2][1], b'\n\tsetAttr ".name" -type "string" "a;b \\" c"')
+            # the statements and the trailing data rebuild the file
+            rebuilt = b''.join(data + (b';' if s.complete and s.terminated else b'') for s, data in statements)
+            self.assertEqual(rebuilt, PASSTHROUGH_SCENE)
+
+    def test_long_statements_stream(self):
+        statements = self.read(PASSTHROUGH_SCENE, 1024, max_statement=4096)
+        long_statement, data = statements[4]
+        self.assertFalse(long_statement.complete)
+        self.assertEqual(len(long_statement.data), 4096)
+        self.assertEqual(long_statement.command(), b'setAttr')
+        # the rest holds the end of the statement with its ';'
+        self.assertTrue(data.endswith(b' 0.5 0.25 1;'))
+        self.assertFalse(statements[-1][0].terminated)
+
+    def test_passthrough_is_unchanged(self):
+        out_stream = io.BytesIO()
+        converter = Offline.MayaAsciiConverter(Rules.RuleSet(RULES))
+        result = converter.convert_stream(io.BytesIO(PASSTHROUGH_SCENE), out_stream)
+        self.assertEqual(out_stream.getvalue(), PASSTHROUGH_SCENE)
+        self.assertEqual(result['converted_nodes'], [])
+
+
+SCENE = '''//Maya ASCII 2020 scene
+requires maya "2020";
+createNode srcTex -n "tex";
+createNode srcMat -n "mtl";
+\tsetAttr ".c" -type "float3" 0.2 0.3 0.4 ;
+\tsetAttr ".rough" 0.25;
+\tsetAttr ".gain" 0;
+createNode shadingEngine -n "mtlSG";
+connectAttr "tex.oc" "mtl.it";
+connectAttr "tex.oa" "mtl.gain";
+connectAttr "mtl.oc" "mtlSG.ss";
+'''
+
+
+class OfflineRoundTripTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rules = Rules.RuleSet(RULES)
+        self.aliases = {'srcTex': {'oc': 'outColor', 'oa': 'outAlpha'},
+                        'srcMat': {'c': 'color', 'oc': 'outColor', 'it': 'transparency'}}
+        self.in_path = os.path.join(self.directory, 'in.ma')
+        self.out_path = os.path.join(self.directory, 'out.ma')
+        with io.open(self.in_path, 'w', newline='\n') as scene_file:
+            scene_file.write(SCENE)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_round_trip(self):
+        converter = Offline.MayaAsciiConverter(self.rules, self.aliases)
+        result = converter.convert_file(self.in_path, self.out_path)
+        self.assertEqual(sorted(result['converted_nodes']), ['mtl', 'tex'])
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(result['missing_aliases'], [])
+
+        scene = scenes.load_scene(self.out_path, self.rules)
+        self.assertEqual(scene.nodeType('mtl'), 'dstMat')
+        self.assertEqual(scene.nodeType('tex'), 'dstTex')
+        self.assertEqual(scene.getAttr('mtl.baseColor'), [(0.2, 0.3, 0.4)])
+        self.assertAlmostEqual(scene.getAttr('mtl.roughness'), 0.75)
+        self.assertEqual(scene.listConnections('mtlSG.ss', plugs=True), ['mtl.outColor'])
+        reverse_node = result['reverse_nodes'][0]
+        self.assertEqual(scene.listConnections('mtl.opacity', plugs=True), [reverse_node + '.output'])
+        self.assertEqual(scene.listConnections(reverse_node + '.input', plugs=True), ['tex.outColor'])
+        multiply_node = result['multiply_nodes'][0]
+        self.assertEqual(scene.listConnections('mtl.weight', plugs=True), [multiply_node + '.outputX'])
+        self.assertEqual(scene.getAttr(multiply_node + '.input2X'), 2.0)
+
+    def test_round_trip_matches_live_conversion(self):
+        offline = Offline.MayaAsciiConverter(self.rules, self.aliases).convert_file(self.in_path, self.out_path)
+        offline_scene = scenes.load_scene(self.out_path, self.rules)
+        live_scene = scenes.load_scene(self.in_path, self.rules, self.aliases)
+        converter = Converter.ConverterClass(backend=live_scene)
+        live = converter.execute_plan(converter.plan_nodes(self.rules, [('tex', 'texture'), ('mtl', 'material')]))
+
+        self.assertEqual(sorted(live['converted_nodes']), sorted(offline['converted_nodes']))
+        for plug in ('mtl.baseColor', 'mtl.roughness'):
+            self.assertEqual(live_scene.getAttr(plug), offline_scene.getAttr(plug))
+        self.assertEqual(len(live['reverse_nodes']), len(offline['reverse_nodes']))
+        self.assertEqual(len(live['multiply_nodes']), len(offline['multiply_nodes']))
+
+    def test_missing_aliases_keep_attributes(self):
+        del self.aliases['srcMat']
+        result = Offline.MayaAsciiConverter(self.rules, self.aliases).convert_file(self.in_path, self.out_path)
+        self.assertEqual(result['missing_aliases'], ['srcMat'])
+        self.assertIn('mtl.oc', result['unresolved_attributes'])
+        with io.open(self.out_path, newline='\n') as scene_file:
+            self.assertIn('connectAttr "mtl.oc" "mtlSG.ss";', scene_file.read())
+
+
+DEFAULTS_SCENE = '''//Maya ASCII 2020 scene
+requires maya "2020";
+createNode srcMat -n "plain";
+createNode srcMat -n "glossy";
+\tsetAttr ".gloss" 0.25;
+\tsetAttr ".spec" 0.1;
+\tsetAttr ".cR" 0.5;
+createNode shadingEngine -n "plainSG";
+connectAttr "plain.oc" "plainSG.ss";
+'''
+
+
+class OfflineDefaultsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rules = Rules.RuleSet(RULES)
+        self.aliases = {'srcMat': {'c': 'color', 'cR': 'colorR', 'oc': 'outColor'}}
+        self.in_path = os.path.join(self.directory, 'in.ma')
+        self.out_path = os.path.join(self.directory, 'out.ma')
+        with io.open(self.in_path, 'w', newline='\n') as scene_file:
+            scene_file.write(DEFAULTS_SCENE)
+        # the defaults of the source and target types, exported like from Maya
+        schema_path = os.path.join(self.directory, 'attribute_schema.json')
+        scene = scenes.new_scene(self.rules)
+        scene.schema = Schema.SchemaCache(schema_path)
+        Converter.ConverterClass(backend=scene).export_attribute_aliases(
+            self.rules, os.path.join(self.directory, 'aliases.json'))
+        self.defaults = Offline.load_defaults(schema_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def convert(self):
+        converter = Offline.MayaAsciiConverter(self.rules, self.aliases, self.defaults)
+        return converter.convert_file(self.in_path, self.out_path)
+
+    def test_source_defaults_are_converted(self):
+        result = self.convert()
+        scene = scenes.load_scene(self.out_path, self.rules)
+        # an override and the inverse of the source default differ from the defaults of the new node
+        self.assertEqual(scene.getAttr('plain.specular'), 0.5)
+        self.assertEqual(scene.getAttr('plain.glossiness'), 1.0)
+        self.assertEqual(scene.getAttr('plain.opacity'), [(1.0, 1.0, 1.0)])
+        # set values win over the defaults, and a set child keeps its compound from being set
+        self.assertEqual(scene.getAttr('glossy.specular'), 0.5)
+        self.assertEqual(scene.getAttr('glossy.glossiness'), 0.75)
+        self.assertEqual(scene.getAttr('glossy.baseColorR'), 0.5)
+        with io.open(self.out_path, newline='\n') as scene_file:
+            text = scene_file.read()
+        self.assertEqual(text.count('setAttr ".glossiness"'), 2)
+        self.assertNotIn('setAttr ".baseColor"', text)
+        self.assertEqual(text.count('setAttr ".roughness" 1.0'), 2)
+        # weight and outColor stay at the defaults of the new node
+        self.assertNotIn('setAttr ".weight"', text)
+        self.assertNotIn('setAttr ".outColor"', text)
+        self.assertEqual(result['filled_values'], 6)
+
+    def test_source_defaults_match_live_conversion(self):
+        self.convert()
+        offline_scene = scenes.load_scene(self.out_path, self.rules)
+        live_scene = scenes.load_scene(self.in_path, self.rules, self.aliases)
+        converter = Converter.ConverterClass(backend=live_scene)
+        converter.execute_plan(converter.plan_nodes(self.rules, [('plain', 'material'), ('glossy', 'material')]))
+        for node in ('plain', 'glossy'):
+            for attribute in ('specular', 'glossiness', 'roughness', 'opacity', 'weight', 'baseColor'):
+                plug = node + '.' + attribute
+                self.assertEqual(live_scene.getAttr(plug), offline_scene.getAttr(plug), plug)
+
+
+if __name__ == '__main__':
+    unittest.main()
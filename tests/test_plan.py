@@ -0,0 +1,184 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The dry-run plans of ConverterPlan and their execution on ConverterFake scenes."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import add_material, step_of
+
+import ConverterPlan as Plan
+
+
+class PlanTest(scenes.FakeSceneTestCase):
+
+    def test_plan_values(self):
+        material = add_material(self.scene, 'mtl')
+        self.scene.setAttr(material + '.color', 0.2, 0.3, 0.4)
+        self.scene.setAttr(material + '.rough', 0.25)
+        self.scene.setAttr(material + '.gain', 0.5)
+        self.scene.setAttr(material + '.spec', 0.9)
+        values = dict((target, value) for target, value, _, _ in step_of(self.plan([(material, 'material')]),
+                                                                         material).values)
+        self.assertEqual(values['baseColor'], [0.2, 0.3, 0.4])
+        self.assertAlmostEqual(values['roughness'], 0.75)
+        self.assertAlmostEqual(values['weight'], 1.0)
+        self.assertEqual(values['specular'], 0.5)
+
+
+    def test_plan_connections(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.connectAttr(texture + '.outColor', material + '.color')
+        plan = self.plan([(material, 'material'), (texture, 'texture')])
+        # the connection between two converted nodes is made once, by the step of its destination
+        self.assertEqual(step_of(plan, material).connections,
+                         [['tex.outColor', 'mtl.baseColor', 'tex.outColor', 'mtl.color'],
+                          ['mtl.outColor', 'mtlSG.surfaceShader', 'mtl.outColor', 'mtlSG.surfaceShader']])
+        self.assertEqual(step_of(plan, texture).connections, [])
+        self.assertEqual([step.node for step in plan.steps], [texture, material])
+
+
+    def test_plan_failures(self):
+        material = add_material(self.scene, 'mtl')
+        broken = self.scene.createNode('srcBroken', name='broken')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.createNode('transform', name='other')
+        # a connection from a node left as it is keeps its source
+        self.scene.connectAttr('other.visibility', texture + '.outAlpha')
+        plan = self.plan([(material, 'material'), (broken, 'texture'), (texture, 'texture'),
+                          ('other', 'utility')])
+        reasons = sorted((failure['node'], failure['attribute'], failure['reason']) for failure in plan.failures)
+        self.assertEqual(reasons, [('broken', None, 'no rule for this node type'),
+                                   ('other', None, 'no rule for this node type')])
+
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(sorted(result['unconverted_nodes']), ['srcBroken : broken', 'transform : other'])
+        self.assertEqual(sorted(result['converted_nodes']), ['mtl', 'tex'])
+        self.assertEqual(self.scene.listConnections('tex.outAlpha', plugs=True), ['other.visibility'])
+
+
+    def test_plan_attribute_failures(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.node_types['srcMat'].add_attribute('unmapped', 'float')
+        self.scene.connectAttr(texture + '.outAlpha', material + '.unmapped')
+        plan = self.plan([(material, 'material'), (texture, 'texture')])
+        self.assertEqual([(f['node'], f['attribute'], f['reason']) for f in plan.failures],
+                         [('tex', 'mtl.unmapped', 'attribute has no rule')])
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['unconverted_attributes'], ['mtl.unmapped'])
+        self.assertEqual(sorted(result['converted_nodes']), ['mtl', 'tex'])
+
+
+    def test_execute_replaces_nodes(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.setAttr(material + '.color', 0.2, 0.3, 0.4)
+        self.scene.connectAttr(texture + '.outColor', material + '.color')
+        result = self.convert([(material, 'material'), (texture, 'texture')])
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(self.scene.nodeType('mtl'), 'dstMat')
+        self.assertEqual(self.scene.nodeType('tex'), 'dstTex')
+        self.assertEqual(self.scene.listConnections('mtl.baseColor', source=True, destination=False, plugs=True),
+                         ['tex.outColor'])
+        self.assertEqual(self.scene.listConnections('mtlSG.surfaceShader', plugs=True), ['mtl.outColor'])
+
+
+    def test_plan_dry_run(self):
+        material = add_material(self.scene, 'mtl')
+        plan = self.plan([(material, 'material')])
+        # nothing changes until the plan is executed
+        self.assertEqual(self.scene.nodeType('mtl'), 'srcMat')
+        self.assertEqual(plan.counts()['nodes'], 1)
+        self.assertEqual(plan.rules_name, 'test')
+
+    def test_save_and_load(self):
+        material = add_material(self.scene, 'mtl')
+        texture = self.scene.createNode('srcTex', name='tex')
+        self.scene.setAttr(material + '.rough', 0.25)
+        self.scene.connectAttr(texture + '.outColor', material + '.color')
+        plan = self.plan([(material, 'material'), (texture, 'texture')])
+        directory = tempfile.mkdtemp()
+        try:
+            file_path = os.path.join(directory, 'plan.json')
+            plan.save(file_path)
+            loaded = Plan.ConversionPlan.load(file_path)
+        finally:
+            shutil.rmtree(directory)
+        self.assertEqual(loaded.to_dict(), plan.to_dict())
+        result = self.converter.execute_plan(loaded)
+        self.assertEqual(sorted(result['converted_nodes']), ['mtl', 'tex'])
+        self.assertAlmostEqual(self.scene.getAttr('mtl.roughness'), 0.75)
+
+
+    def test_dependency_order(self):
+        material = add_material(self.scene, 'mtl')
+        first = self.scene.createNode('srcTex', name='texA')
+        second = self.scene.createNode('srcTex', name='texB')
+        other = add_material(self.scene, 'other')
+        self.scene.connectAttr(second + '.outColor', first + '.color')
+        self.scene.connectAttr(first + '.outColor', material + '.color')
+        plan = self.plan([(material, 'material'), (other, 'material'), (first, 'texture'), (second, 'texture')])
+        # leaves first, the independent node keeps its place
+        self.assertEqual([step.node for step in plan.steps], ['other', 'texB', 'texA', 'mtl'])
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(self.scene.listConnections('texA.color', plugs=True), ['texB.outColor'])
+
+    def test_dependency_cycle(self):
+        first = self.scene.createNode('srcTex', name='texA')
+        second = self.scene.createNode('srcTex', name='texB')
+        self.scene.connectAttr(first + '.outColor', second + '.color')
+        self.scene.connectAttr(second + '.outColor', first + '.color')
+        plan = self.plan([(second, 'texture'), (first, 'texture')])
+        # entered at the earliest entry
+        self.assertEqual([step.node for step in plan.steps], ['texB', 'texA'])
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(self.scene.listConnections('texA.color', plugs=True), ['texB.outColor'])
+        self.assertEqual(self.scene.listConnections('texB.color', plugs=True), ['texA.outColor'])
+    def test_default_values_are_skipped(self):
+        material = add_material(self.scene, 'mtl')
+        # inverted to 0, the default of roughness, and multiplied to 0, the default of weight
+        self.scene.setAttr(material + '.rough', 1.0)
+        self.scene.setAttr(material + '.gain', 0.0)
+        self.scene.setAttr(material + '.color', 0.5, 0.5, 0.5)
+        plan = self.plan([(material, 'material')])
+        targets = [target for target, _, _, _ in step_of(plan, material).values]
+        self.assertNotIn('roughness', targets)
+        self.assertNotIn('weight', targets)
+        self.assertIn('baseColor', targets)
+        self.assertGreaterEqual(plan.skipped_values, 2)
+        result = self.converter.execute_plan(plan)
+        self.assertEqual(result['skipped_values'], plan.skipped_values)
+        self.assertEqual(self.scene.getAttr('mtl.roughness'), 0.0)
+    def test_compound_children_collapse(self):
+        material = add_material(self.scene, 'mtl')
+        self.scene.setAttr(material + '.color', 0.2, 0.3, 0.4)
+        step = step_of(self.plan([(material, 'material')]), material)
+        targets = [target for target, _, _, _ in step.values]
+        # the children map to the channels of the compound target, the compound value sets them all
+        self.assertIn('baseColor', targets)
+        self.assertFalse(set(targets) & {'baseColorR', 'baseColorG', 'baseColorB'})
+        self.assertEqual(self.rules.node('srcMat').covered,
+                         {'colorR': 'color', 'colorG': 'color', 'colorB': 'color'})
+
+
+
+if __name__ == '__main__':
+    unittest.main()
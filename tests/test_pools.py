@@ -0,0 +1,77 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The reverse and multiplyDivide nodes ConverterPlan pools between connections."""
+
+import unittest
+
+import scenes
+from scenes import add_material
+
+import ConverterPlan as Plan
+
+
+class UtilityPoolTest(scenes.FakeSceneTestCase):
+
+    def test_reverse_nodes_are_shared(self):
+        texture = self.scene.createNode('srcTex', name='tex')
+        materials = [add_material(self.scene, 'mtl{0}'.format(i)) for i in range(2)]
+        for material in materials:
+            self.scene.connectAttr(texture + '.outColor', material + '.transparency')
+            self.scene.connectAttr(texture + '.outAlpha', material + '.rough')
+            self.scene.connectAttr(texture + '.outColorR', material + '.gloss')
+        result = self.convert([(texture, 'texture')] + [(material, 'material') for material in materials])
+        self.assertEqual(result['unconverted_attributes'], [])
+        # one node inverts the color for both materials and its R channel serves the glossiness, the
+        # alpha goes through a second one
+        self.assertEqual(len(result['reverse_nodes']), 2)
+        inputs = dict((attribute, self.scene.listConnections('mtl0.' + attribute, plugs=True)[0])
+                      for attribute in ('opacity', 'roughness', 'glossiness'))
+        for material in materials[1:]:
+            for attribute, source in inputs.items():
+                self.assertEqual(self.scene.listConnections(material + '.' + attribute, plugs=True), [source])
+        compound = inputs['opacity'].split('.')[0]
+        packed = inputs['roughness'].split('.')[0]
+        self.assertEqual(sorted(result['reverse_nodes']), sorted([compound, packed]))
+        self.assertEqual(inputs['glossiness'], compound + '.outputX')
+        self.assertEqual(self.scene.listConnections(packed + '.inputX', plugs=True), ['tex.outAlpha'])
+        self.assertEqual(self.scene.listConnections(compound + '.input', plugs=True), ['tex.outColor'])
+
+    def test_channel_of_pooled_compound(self):
+        nodes = []
+        pool = Plan.ReversePool(lambda source: nodes.append('reverse{0}'.format(len(nodes) + 1)) or nodes[-1])
+        self.assertEqual(pool.inverse('tex.outColor', True), ('reverse1.output', 'reverse1.input'))
+        # a channel of the pooled compound reads its output, no new node
+        self.assertEqual(pool.inverse('tex.outColorG', False), ('reverse1.outputY', None))
+        self.assertEqual(pool.inverse('tex.outAlpha', False), ('reverse2.outputX', 'reverse2.inputX'))
+        self.assertEqual(pool.inverse('tex.outAlpha', False), ('reverse2.outputX', None))
+        self.assertEqual(nodes, ['reverse1', 'reverse2'])
+
+    def test_multiply_nodes_are_shared(self):
+        texture = self.scene.createNode('srcTex', name='tex')
+        materials = [add_material(self.scene, 'mtl{0}'.format(i)) for i in range(2)]
+        for material in materials:
+            self.scene.connectAttr(texture + '.outAlpha', material + '.gain')
+        result = self.convert([(texture, 'texture')] + [(material, 'material') for material in materials])
+        self.assertEqual(result['unconverted_attributes'], [])
+        self.assertEqual(len(result['multiply_nodes']), 1)
+        node = result['multiply_nodes'][0]
+        self.assertEqual(self.scene.getAttr(node + '.input2X'), 2.0)
+        self.assertEqual(self.scene.listConnections(node + '.input1X', plugs=True), ['tex.outAlpha'])
+        for material in materials:
+            self.assertEqual(self.scene.listConnections(material + '.weight', plugs=True), [node + '.outputX'])
+
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The scene command profile of ConverterProfile on a ConverterFake scene."""
+
+import json
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import add_material
+
+import Converter
+import ConverterProfile as Profile
+
+
+class ProfiledBackendTest(scenes.FakeSceneTestCase):
+
+    def setUp(self):
+        super(ProfiledBackendTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.backend = Profile.ProfiledBackend(self.scene, trace=True)
+        self.converter = Converter.ConverterClass(backend=self.backend)
+        add_material(self.scene, 'mtl')
+        add_material(self.scene, 'other')
+        self.result = self.convert([('mtl', 'material'), ('other', 'material')])
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_summary(self):
+        self.assertEqual(sorted(self.result['converted_nodes']), ['mtl', 'other'])
+        rows = dict((row['name'], row) for row in self.backend.profile.summary())
+        self.assertEqual(rows['get_attributes']['calls'], 2)
+        self.assertEqual(rows['create_node']['calls'], 2)
+        self.assertEqual(rows['command_buffer.flush']['calls'], 1)
+        for row in rows.values():
+            self.assertLessEqual(row['own'], row['total'] + 1e-9)
+        # the callers are the converter, not the backend modules
+        sites = [site['site'] for site in rows['get_attributes']['sites']]
+        self.assertTrue(all(site.startswith('Converter.py:') for site in sites), sites)
+        self.assertIn('get_attributes', self.backend.profile.format_summary())
+
+    def test_save_stats(self):
+        file_path = os.path.join(self.directory, 'conversion.prof')
+        self.backend.profile.save_stats(file_path)
+        stats = pstats.Stats(file_path)
+        calls = dict((function[2], stat[1]) for function, stat in stats.stats.items())
+        self.assertEqual(calls['get_attributes'], 2)
+
+    def test_save_trace(self):
+        file_path = os.path.join(self.directory, 'conversion.json')
+        self.backend.profile.save_trace(file_path)
+        with open(file_path) as trace_file:
+            events = json.load(trace_file)['traceEvents']
+        self.assertEqual(len(events), sum(row['calls'] for row in self.backend.profile.summary()))
+        self.assertTrue(all(event['ph'] == 'X' and event['dur'] >= 0 for event in events))
+
+    def test_reset(self):
+        self.backend.profile.reset()
+        self.assertEqual(self.backend.profile.summary(), [])
+        self.assertEqual(self.backend.profile.trace_events(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
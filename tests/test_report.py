@@ -0,0 +1,67 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The conversion reports of ConverterReport, filled by a conversion of a ConverterFake scene."""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes
+from scenes import add_material
+
+import ConverterReport as Report
+
+
+class ConversionReportTest(scenes.FakeSceneTestCase):
+
+    def setUp(self):
+        super(ConversionReportTest, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        add_material(self.scene, 'mtl')
+        self.scene.setAttr('mtl.rough', 0.25)
+        self.report = self.convert([('mtl', 'material')])['report']
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_phases(self):
+        data = json.loads(self.report.to_json())
+        self.assertEqual(sorted(data['phases']), sorted(Report.PHASES))
+        self.assertEqual(data['estimated_phases'], ['flush'])
+        node = data['nodes'][0]
+        self.assertEqual((node['node'], node['status'], node['category']), ('mtl', 'converted', 'material'))
+        self.assertGreater(node['timings']['flush'], 0.0)
+        self.assertAlmostEqual(node['total'], sum(node['timings'].values()))
+
+    def test_csv_labels_estimates(self):
+        file_path = os.path.join(self.directory, 'report.csv')
+        self.report.save_csv(file_path)
+        with open(file_path) as csv_file:
+            rows = list(csv.reader(csv_file))
+        self.assertIn('flush (estimate)', rows[0])
+        self.assertIn('set', rows[0])
+        self.assertEqual(rows[1][0], 'mtl')
+
+    def test_failures(self):
+        self.report.add_failure('mtl', 'setAttr failed', 'specular', 'locked')
+        self.report.add_failure(None, 'connectAttr failed', 'mtl.other')
+        self.assertEqual(self.report.failure_reasons(), {'setAttr failed': 1, 'connectAttr failed': 1})
+        self.assertEqual(self.report.category_counts()['material']['failed_attributes'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The compiled rule sets of ConverterRules."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from scenes import RULES
+
+import ConverterRules as Rules
+
+
+class RuleSetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.rules = Rules.RuleSet(RULES)
+
+    def test_classify_factor(self):
+        self.assertEqual(Rules.classify_factor(''), (Rules.FACTOR_IDENTITY, None))
+        self.assertEqual(Rules.classify_factor(None), (Rules.FACTOR_IDENTITY, None))
+        self.assertEqual(Rules.classify_factor('Inverse'), (Rules.FACTOR_INVERSE, None))
+        self.assertEqual(Rules.classify_factor('*2'), (Rules.FACTOR_MULTIPLY, 2.0))
+        self.assertEqual(Rules.classify_factor('0.5'), (Rules.FACTOR_OVERRIDE, 0.5))
+        self.assertEqual(Rules.classify_factor('unknown'), (Rules.FACTOR_IDENTITY, None))
+
+    def test_classify_numeric_factor(self):
+        self.assertEqual(Rules.classify_factor(0.5), (Rules.FACTOR_OVERRIDE, 0.5))
+        self.assertEqual(Rules.classify_factor(0), (Rules.FACTOR_OVERRIDE, 0.0))
+        self.assertEqual(Rules.AttributeRule('spec', 'specular', 'float', 1).convert_value(0.2), 1.0)
+
+    def test_compile(self):
+        self.assertEqual(self.rules.engines, ['mayaSoftware', 'mayaSoftware'])
+        self.assertIn('srcMat', self.rules)
+        self.assertEqual(self.rules.target_type('srcMat'), 'dstMat')
+        self.assertEqual(self.rules.target_type('srcBroken'), '')
+        self.assertIsNone(self.rules.target_type('unknown'))
+        rule = self.rules.attribute('srcMat', 'transparency')
+        self.assertEqual((rule.target, rule.type, rule.factor_kind), ('opacity', 'float3', Rules.FACTOR_INVERSE))
+        self.assertTrue(rule.compound)
+        self.assertEqual(rule.convert_value((0.25, 0.5, 1.0)), (0.75, 0.5, 0.0))
+        self.assertEqual(Rules.RuleSet(self.rules.to_dict()).to_dict(), self.rules.to_dict())
+
+    def test_value_attributes(self):
+        node_rule = self.rules.node('srcMat')
+        self.assertEqual(node_rule.covered, {'colorR': 'color', 'colorG': 'color', 'colorB': 'color'})
+        self.assertNotIn('colorR', node_rule.value_attributes())
+        self.assertIn('color', node_rule.value_attributes())
+
+
+class RulesCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.rules_dir = os.path.join(self.directory, 'Rules')
+        self.rules_path = self.write(os.path.join('Rules', 'test.json'), RULES)
+        Rules.invalidate_rules()
+
+    def tearDown(self):
+        Rules.invalidate_rules()
+        shutil.rmtree(self.directory)
+
+    def write(self, name, data):
+        file_path = os.path.join(self.directory, name)
+        if not os.path.isdir(os.path.dirname(file_path)):
+            os.makedirs(os.path.dirname(file_path))
+        with open(file_path, 'w') as json_file:
+            json.dump(data, json_file)
+        return file_path
+
+    def touch(self, path, offset):
+        """Moves the mtime away from the one cached, file systems may store it to the second."""
+        mtime = os.stat(path).st_mtime + offset
+        os.utime(path, (mtime, mtime))
+
+    def test_rules_are_compiled_once(self):
+        rules = Rules.load_rules(self.rules_path)
+        self.assertIs(Rules.load_rules(self.rules_path), rules)
+        self.assertEqual(rules.path, os.path.normcase(os.path.abspath(self.rules_path)))
+
+    def test_changed_file_is_compiled_again(self):
+        rules = Rules.load_rules(self.rules_path)
+        changed = dict(RULES, Engines=['mayaSoftware', 'arnold'])
+        self.write(os.path.join('Rules', 'test.json'), changed)
+        self.touch(self.rules_path, 10)
+        reloaded = Rules.load_rules(self.rules_path)
+        self.assertIsNot(reloaded, rules)
+        self.assertEqual(reloaded.target_engine, 'arnold')
+
+    def test_invalidate_rules(self):
+        rules = Rules.load_rules(self.rules_path)
+        Rules.invalidate_rules(self.rules_path)
+        self.assertIsNot(Rules.load_rules(self.rules_path), rules)
+
+    def test_listing_sees_new_files_in_subfolders(self):
+        self.write(os.path.join('Rules', 'studio', 'other.json'), RULES)
+        self.assertEqual(sorted(Rules.list_rules(self.rules_dir)), ['other', 'test'])
+        # only the mtime of the subfolder changes
+        self.write(os.path.join('Rules', 'studio', 'new.json'), RULES)
+        self.touch(os.path.join(self.rules_dir, 'studio'), 10)
+        self.assertEqual(sorted(Rules.list_rules(self.rules_dir)), ['new', 'other', 'test'])
+
+    def test_invalidate_matches_folders_exactly(self):
+        other_dir = os.path.join(self.directory, 'Rules2')
+        self.write(os.path.join('Rules2', 'other.json'), RULES)
+        Rules.list_rules(self.rules_dir)
+        Rules.list_rules(other_dir)
+        Rules.invalidate_rules(os.path.join(self.rules_dir, 'test.json'))
+        self.assertNotIn(os.path.normcase(os.path.abspath(self.rules_dir)), Rules._filenames_cache)
+        self.assertIn(os.path.normcase(os.path.abspath(other_dir)), Rules._filenames_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,127 @@
+# Copyright 2020 by Mahmoud El-Ashry. All Rights Reserved.
+#
+# This library is free software: you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation, either
+# version 3 of the License, or (at your option) any later version.
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the GNU
+# Lesser General Public License for more details.
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library. If not, see <http://www.gnu.org/licenses/>.
+
+"""The attribute schema cache, its lookups and the file shared by processes."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import scenes  # noqa: F401, puts the modules on the path
+
+import ConverterFake
+import ConverterSchema as Schema
+
+
+class SchemaCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.directory, 'Cache', 'attribute_schema.json')
+        self.scene = ConverterFake.FakeScene()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def saved(self):
+        with open(self.file_path) as json_file:
+            return json.load(json_file)
+
+    def test_lookups_are_cached(self):
+        cache = Schema.SchemaCache(self.file_path)
+        record = cache.attribute(self.scene, 'lambert', '2020', 'color')
+        self.assertEqual(record['short'], 'c')
+        self.assertFalse(record['message'])
+        self.assertTrue(cache.attribute(self.scene, 'lambert', '2020', 'message')['message'])
+        self.assertIs(cache.attribute(self.scene, 'lambert', '2020', 'color'), record)
+        # a new version of the type drops its schema
+        cache.attribute(self.scene, 'lambert', '2022', 'diffuse')
+        self.assertEqual(sorted(cache.type_entry('lambert', '2022')['attributes']), ['diffuse'])
+
+    def test_save_and_load(self):
+        cache = Schema.SchemaCache(self.file_path)
+        self.assertFalse(cache.save())
+        cache.attribute(self.scene, 'lambert', '2020', 'color')
+        self.assertTrue(cache.save())
+        self.assertFalse(cache.save())
+        self.assertEqual(os.listdir(os.path.dirname(self.file_path)), ['attribute_schema.json'])
+        loaded = Schema.SchemaCache(self.file_path)
+        self.assertEqual(loaded.load(), cache.load())
+        self.assertEqual(Schema.load_aliases(self.file_path), {'lambert': {'c': 'color'}})
+
+    def test_save_merges_other_processes(self):
+        first = Schema.SchemaCache(self.file_path)
+        second = Schema.SchemaCache(self.file_path)
+        first.load()
+        second.load()
+        first.attribute(self.scene, 'lambert', '2020', 'color')
+        second.attribute(self.scene, 'lambert', '2020', 'diffuse')
+        second.attribute(self.scene, 'blinn', '2020', 'color')
+        self.assertTrue(first.save())
+        self.assertTrue(second.save())
+        types = self.saved()['types']
+        self.assertEqual(sorted(types), ['blinn', 'lambert'])
+        self.assertEqual(sorted(types['lambert']['attributes']), ['color', 'diffuse'])
+
+    def test_clear_replaces_the_file(self):
+        cache = Schema.SchemaCache(self.file_path)
+        cache.attribute(self.scene, 'lambert', '2020', 'color')
+        cache.save()
+        cache.clear()
+        cache.attribute(self.scene, 'blinn', '2020', 'color')
+        cache.save()
+        self.assertEqual(sorted(self.saved()['types']), ['blinn'])
+
+    def test_failed_save_is_reported(self):
+        # the folder of the cache is a file
+        open(os.path.join(self.directory, 'Cache'), 'w').close()
+        cache = Schema.SchemaCache(self.file_path)
+        cache.attribute(self.scene, 'lambert', '2020', 'color')
+        self.assertFalse(cache.save())
+        self.assertTrue(cache.changed)
+
+    def test_unreadable_file_is_ignored(self):
+        os.makedirs(os.path.dirname(self.file_path))
+        with open(self.file_path, 'w') as json_file:
+            json_file.write('{not json')
+        self.assertEqual(Schema.SchemaCache(self.file_path).load(), {})
+
+    def replace_file(self):
+        source = os.path.join(self.directory, 'source')
+        destination = os.path.join(self.directory, 'destination')
+        for file_path, text in ((source, 'new'), (destination, 'old')):
+            with open(file_path, 'w') as text_file:
+                text_file.write(text)
+        Schema.replace_file(source, destination)
+        self.assertFalse(os.path.exists(source))
+        with open(destination) as text_file:
+            self.assertEqual(text_file.read(), 'new')
+
+    def test_replace_file(self):
+        self.replace_file()
+
+    def test_replace_file_without_os_replace(self):
+        # Python 2, e.g. the mayapy of Maya 2018 to 2020
+        replace = getattr(os, 'replace', None)
+        if replace is not None:
+            del os.replace
+        try:
+            self.replace_file()
+        finally:
+            if replace is not None:
+                os.replace = replace
+
+if __name__ == '__main__':
+    unittest.main()